@@ -0,0 +1,16 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup() -> None:
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinema_rate.settings')
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark-only-secret-key')
+
+    import django
+
+    django.setup()
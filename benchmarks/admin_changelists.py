@@ -0,0 +1,84 @@
+"""Filtered and searched changelists of the large-table admins, and their count estimates.
+
+Signs in a throwaway superuser and requests every ``LargeTableAdmin``
+changelist plain, filtered and searched, reporting time and queries; each must
+answer ``200``. Then reads the planner row estimate from ``EXPLAIN`` output in
+both JSON shapes drivers return (the plan list and the bare plan object) and
+from a malformed plan. On PostgreSQL it also estimates a filtered queryset
+through ``estimate_count`` itself.
+
+Usage: python benchmarks/admin_changelists.py [--repeat 5]
+"""
+import argparse
+import json
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib import admin  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from core.admin import LargeTableAdmin, estimate_count, plan_rows  # noqa: E402
+from core.models import Country, Movie  # noqa: E402
+
+
+def measure(client: Client, url: str, repeat: int) -> None:
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            response = client.get(url)
+        elapsed = time.perf_counter() - started
+    assert response.status_code == 200, (url, response.status_code)
+    print(f'  {url:<55} {response.status_code}  {elapsed * 1000 / repeat:8.2f} ms  {queries / repeat:5.1f} queries')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    user = User.objects.create_superuser(f'admin-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+    country = Country.objects.first() or Country.objects.create(name='Benchmarkland', iso_code='BL')
+    try:
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        print(f'changelists, mean of {args.repeat} requests:')
+        for model, model_admin in admin.site._registry.items():
+            if not isinstance(model_admin, LargeTableAdmin):
+                continue
+            base = f'/admin/{model._meta.app_label}/{model._meta.model_name}/'
+            urls = [base]
+            for field in model_admin.list_filter:
+                value = country.pk if field == 'country' else model._meta.get_field(field).choices[0][0]
+                urls.append(f'{base}?{field}{"__id__exact" if field == "country" else "__exact"}={value}')
+            if model_admin.search_fields:
+                urls.append(f'{base}?q=a')
+            for url in urls:
+                measure(client, url, args.repeat)
+
+        plan = {'Plan': {'Node Type': 'Seq Scan', 'Plan Rows': 1234}}
+        assert plan_rows(json.dumps([plan])) == 1234
+        assert plan_rows(json.dumps(plan)) == 1234
+        assert plan_rows('[]') is None and plan_rows('{"Plan": {}}') is None and plan_rows('not json') is None
+        print('plan estimates read from list and object shaped EXPLAIN output; malformed plans give None')
+        if connection.vendor == 'postgresql':
+            estimate = estimate_count(Movie.objects.filter(country=country))
+            print(f'estimate_count on a filtered movie queryset: {estimate}')
+    finally:
+        User.objects.filter(pk=user.pk).delete()
+
+
+if __name__ == '__main__':
+    main()
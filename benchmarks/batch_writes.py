@@ -0,0 +1,117 @@
+"""Batch endpoint vs. the one-entry-per-POST flow.
+
+Signs in a throwaway user through the test client and, for N items, times
+adding movies, voting for catalog movies and deleting the added movies, first
+one POST at a time (each followed by the redirect to the home page, as a
+browser does) and then as a single request to ``/batch/``. Reports wall time
+and query count per flow, and checks that both leave the same ratings, list
+summary and vote counters behind.
+
+Usage: python benchmarks/batch_writes.py [--items 100]
+"""
+import argparse
+import json
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from core.models import Country, Movie, PersonalMovie, UserListSummary  # noqa: E402
+
+states = []
+
+
+def timed(label: str, run) -> None:
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+    print(f'  {label:<28} {elapsed * 1000:9.1f} ms  {queries:6d} queries')
+
+
+def list_state(user) -> tuple:
+    summary = UserListSummary.objects.filter(user=user).values_list('movie_count', 'movie_score_sum').first()
+    return summary, PersonalMovie.objects.filter(user=user).count()
+
+
+def one_by_one(client: Client, user, movies, items: int) -> None:
+    def add():
+        for index in range(items):
+            client.post('/home/', {
+                'add_movie': '1',
+                'movie-title': f'Batch movie {index}',
+                'movie-production_year': 2000,
+                'movie-score': index % 100,
+                'movie-country': 'Benchmarkland',
+            }, follow=True)
+
+    def vote():
+        for movie in movies:
+            client.post(f'/vote/movie/{movie.id}/', follow=True)
+
+    def delete():
+        for entry_id in list(PersonalMovie.objects.filter(user=user).values_list('id', flat=True)):
+            client.post('/home/', {'delete_movie': entry_id}, follow=True)
+
+    timed('add (one by one)', add)
+    states.append(list_state(user))
+    timed('vote (one by one)', vote)
+    timed('delete (one by one)', delete)
+
+
+def batched(client: Client, user, movies, items: int) -> None:
+    def post(operations):
+        response = client.post('/batch/', json.dumps({'operations': operations}), content_type='application/json')
+        assert response.status_code == 200, response.content
+
+    timed('add (batch)', lambda: post([
+        {'op': 'add_movie', 'title': f'Batch movie {index}', 'production_year': 2000, 'score': index % 100, 'country': 'Benchmarkland'}
+        for index in range(items)
+    ]))
+    states.append(list_state(user))
+    timed('vote (batch)', lambda: post([{'op': 'vote_movie', 'id': movie.id} for movie in movies]))
+    timed('delete (batch)', lambda: post([
+        {'op': 'delete_movie', 'id': entry_id}
+        for entry_id in PersonalMovie.objects.filter(user=user).values_list('id', flat=True)
+    ]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100)
+    args = parser.parse_args()
+
+    country, _ = Country.objects.get_or_create(name='Benchmarkland', defaults={'iso_code': 'QB'})
+    movies = Movie.objects.bulk_create([Movie(title=f'Batch catalog {index}', country=country) for index in range(args.items)])
+    users = []
+    try:
+        for label, flow in (('one by one', one_by_one), ('batch', batched)):
+            user = User.objects.create_user(f'batch-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+            users.append(user)
+            client = Client(HTTP_HOST='127.0.0.1')
+            client.force_login(user)
+            print(f'{args.items} items, {label}:')
+            flow(client, user, movies, args.items)
+        votes = set(Movie.objects.filter(id__in=[movie.id for movie in movies]).values_list('vote_count', flat=True))
+        print(f'(summary, entries) after adding: {states[0]} vs {states[1]}; catalog vote counts: {sorted(votes)}')
+        print(f'after deleting: {list_state(users[0])} vs {list_state(users[1])}')
+    finally:
+        User.objects.filter(id__in=[user.id for user in users]).delete()
+        Movie.objects.filter(id__in=[movie.id for movie in movies]).delete()
+
+
+if __name__ == '__main__':
+    main()
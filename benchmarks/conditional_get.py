@@ -0,0 +1,95 @@
+"""Conditional GETs and compression of the home page.
+
+Signs in a throwaway user with N movies and actors and requests ``/home/``
+repeatedly: once as a full render, once revalidated with ``If-None-Match``
+(``304``) and once after an edit (the ETag must change). Reports time, query
+count and bytes on the wire per request, and the page size uncompressed, with
+gzip and, when the ``brotli`` package is installed, with brotli.
+
+Usage: python benchmarks/conditional_get.py [--entries 50] [--repeat 20]
+"""
+import argparse
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from core import compression  # noqa: E402
+from core.models import Country, PersonalActor, PersonalMovie  # noqa: E402
+
+
+def measure(client: Client, repeat: int, **headers) -> tuple:
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            response = client.get('/home/', **headers)
+        elapsed = time.perf_counter() - started
+    return response, elapsed * 1000 / repeat, queries / repeat
+
+
+def report(label: str, response, elapsed: float, queries: float) -> None:
+    print(f'  {label:<30} {response.status_code}  {elapsed:8.2f} ms  {queries:5.1f} queries  {len(response.content):7d} bytes')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    country = Country.objects.first() or Country.objects.create(name='Benchmarkland')
+    user = User.objects.create_user(f'etag-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+    try:
+        PersonalMovie.objects.bulk_create([
+            PersonalMovie(user=user, title=f'Movie {index}', production_year=2000, score=index % 100, country=country)
+            for index in range(args.entries)
+        ])
+        PersonalActor.objects.bulk_create([
+            PersonalActor(user=user, full_name=f'Actor {index}', production_year=1970, score=index % 100, country=country)
+            for index in range(args.entries)
+        ])
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        # The first view creates the version row and sets the CSRF cookie the ETag depends on.
+        client.get('/home/')
+
+        print(f'/home/ with {args.entries} movies and {args.entries} actors, mean of {args.repeat} requests:')
+        response, elapsed, queries = measure(client, args.repeat)
+        report('full render', response, elapsed, queries)
+        etag = response['ETag']
+        report('If-None-Match (304)', *measure(client, args.repeat, HTTP_IF_NONE_MATCH=etag))
+
+        PersonalMovie.objects.filter(user=user).first().delete()
+        response, elapsed, queries = measure(client, 1, HTTP_IF_NONE_MATCH=etag)
+        report('If-None-Match after an edit', response, elapsed, queries)
+        assert response.status_code == 200 and response['ETag'] != etag, 'the edit did not change the ETag'
+
+        print('page size:')
+        identity = client.get('/home/')
+        print(f'  {"identity":<30} {len(identity.content):7d} bytes')
+        gzipped = client.get('/home/', HTTP_ACCEPT_ENCODING='gzip')
+        print(f'  {"gzip":<30} {len(gzipped.content):7d} bytes')
+        if compression.brotli is not None:
+            encoded = client.get('/home/', HTTP_ACCEPT_ENCODING='br')
+            print(f'  {"brotli":<30} {len(encoded.content):7d} bytes')
+        else:
+            print('  brotli                         (package not installed)')
+    finally:
+        User.objects.filter(pk=user.pk).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Import-time breakdown (``python -X importtime``) for the settings module and the core app.
+
+Usage: python benchmarks/importtime.py [--top 25]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from _django import ROOT
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+# Wall-clock totals are printed by the child because django.setup() loads settings and
+# INSTALLED_APPS through importlib.import_module, which -X importtime does not itemize
+# (their own nested ``import`` statements still show up).
+TARGETS = {
+    'settings': 'import time; t = time.perf_counter(); import cinema_rate.settings; print((time.perf_counter() - t) * 1000)',
+    'django.setup() + core': (
+        'import time; t = time.perf_counter(); import django; django.setup(); '
+        'import cinema_rate.urls, core.views, core.admin; print((time.perf_counter() - t) * 1000)'
+    ),
+}
+
+
+def profile(statement: str) -> tuple[float, list[tuple[str, int, int, int]]]:
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'cinema_rate.settings'}
+    env.setdefault('DJANGO_SECRET_KEY', 'benchmark-only-secret-key')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return float(result.stdout.strip().splitlines()[-1]), rows
+
+
+def report(title: str, wall_ms: float, rows, top: int) -> None:
+    total = sum(self_us for _, self_us, _, _ in rows)
+    print(f'\n== {title}: {wall_ms:.1f} ms wall clock, {len(rows)} itemized modules ({total / 1000:.1f} ms) ==')
+
+    packages = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        packages[module.split('.')[0]] += self_us
+    print(f'\n{"self ms":>9}  top-level package')
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f'{self_us / 1000:>9.1f}  {package}')
+
+    print(f'\n{"cumul ms":>9}  {"self ms":>8}  module (project modules only)')
+    for module, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[2]):
+        if module.split('.')[0] in {'cinema_rate', 'core'}:
+            print(f'{cumulative_us / 1000:>9.1f}  {self_us / 1000:>8.1f}  {module}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=15, help='Top-level packages to list.')
+    args = parser.parse_args()
+    for title, statement in TARGETS.items():
+        wall_ms, rows = profile(statement)
+        report(title, wall_ms, rows, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Memory and time of rendering personal lists from model instances versus slim rows.
+
+Creates a throwaway user with N personal movies and N actors (a mix of
+uploaded, mirrored and linked posters), then loads and renders each list two
+ways: full instances with ``select_related('country')``, as the home page used
+to, and ``core.list_rows``. Reports load time, memory held by the loaded list
+(tracemalloc) and the time to render the list markup, per 10k rows, and checks
+that both render the same poster URLs, flags and ages.
+
+Usage: python benchmarks/list_rows.py [--rows 10000] [--repeat 3]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.template import Context, Template  # noqa: E402
+
+from core.list_rows import actor_rows, movie_rows  # noqa: E402
+from core.models import Country, PersonalActor, PersonalMovie  # noqa: E402
+
+# The list markup of templates/core/home.html, spelled for instances and for rows.
+MARKUP = {
+    'instances': (
+        '{% for movie in movies %}<img src="{{ movie.poster_source }}">{{ movie.title }} {{ movie.production_year }} '
+        '{{ movie.country.flag_emoji }} {{ movie.country.name }} {{ movie.score }} {{ movie.id }}{% endfor %}'
+        '{% for actor in actors %}<img src="{{ actor.poster_source }}">{{ actor.full_name }} {{ actor.production_year }} '
+        '{{ actor.country.flag_emoji }} {{ actor.country.name }} {{ actor.age }} {{ actor.id }}{% endfor %}'
+    ),
+    'rows': (
+        '{% for movie in movies %}<img src="{{ movie.poster_source }}">{{ movie.title }} {{ movie.production_year }} '
+        '{{ movie.flag }} {{ movie.country_name }} {{ movie.score }} {{ movie.id }}{% endfor %}'
+        '{% for actor in actors %}<img src="{{ actor.poster_source }}">{{ actor.full_name }} {{ actor.production_year }} '
+        '{{ actor.flag }} {{ actor.country_name }} {{ actor.age }} {{ actor.id }}{% endfor %}'
+    ),
+}
+
+
+def load(path: str, user):
+    movies = PersonalMovie.objects.filter(user=user)
+    actors = PersonalActor.objects.filter(user=user)
+    if path == 'instances':
+        return list(movies.select_related('country')), list(actors.select_related('country'))
+    return movie_rows(movies), actor_rows(actors)
+
+
+def measure(path: str, user, repeat: int) -> tuple:
+    load_times, render_times = [], []
+    template = Template(MARKUP[path])
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        movies, actors = load(path, user)
+        load_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        html = template.render(Context({'movies': movies, 'actors': actors}))
+        render_times.append(time.perf_counter() - started)
+        del movies, actors
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    movies, actors = load(path, user)
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return min(load_times), min(render_times), held, html, (movies, actors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    countries = list(Country.objects.all()[:50]) or [Country.objects.create(name='Benchmarkland', iso_code='BL')]
+    user = User.objects.create_user(f'rows-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+
+    def poster(index: int) -> dict:
+        if index % 3 == 0:
+            return {'poster_image': f'posters/bench/{index}.jpg'}
+        if index % 3 == 1:
+            return {'poster_mirror': f'mirrored/{index}.jpg'}
+        return {'poster_url': f'https://images.example.com/{index}.jpg'}
+
+    try:
+        PersonalMovie.objects.bulk_create([
+            PersonalMovie(user=user, title=f'Movie {index}', production_year=1950 + index % 70, score=index % 100,
+                          country=countries[index % len(countries)], **poster(index))
+            for index in range(args.rows)
+        ], batch_size=2000)
+        PersonalActor.objects.bulk_create([
+            PersonalActor(user=user, full_name=f'Actor {index}', production_year=1930 + index % 80, score=index % 100,
+                          country=countries[index % len(countries)], **poster(index))
+            for index in range(args.rows)
+        ], batch_size=2000)
+
+        per = 10000 / (2 * args.rows)
+        print(f'{args.rows} movies + {args.rows} actors, best of {args.repeat}, scaled per 10k rows:')
+        results = {}
+        for path in ('instances', 'rows'):
+            load_time, render_time, held, html, loaded = measure(path, user, args.repeat)
+            results[path] = (html, loaded)
+            print(f'  {path:<10} load {load_time * per * 1000:7.1f} ms  render {render_time * per * 1000:7.1f} ms  '
+                  f'memory {held * per / 1024 / 1024:6.2f} MiB')
+
+        (old_movies, old_actors), (new_movies, new_actors) = results['instances'][1], results['rows'][1]
+        for old, new in zip(old_movies + old_actors, new_movies + new_actors):
+            assert (old.id, old.poster_source, old.country.flag_emoji, old.country.name) == (
+                new.id, new.poster_source, new.flag, new.country_name), (old.id, new.id)
+        assert all(old.age == new.age for old, new in zip(old_actors, new_actors))
+        assert results['instances'][0] == results['rows'][0], 'rendered markup differs'
+        print('both paths render identical markup')
+    finally:
+        User.objects.filter(pk=user.pk).delete()
+
+
+if __name__ == '__main__':
+    main()
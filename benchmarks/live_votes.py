@@ -0,0 +1,152 @@
+"""Connection scaling of the live vote stream, driving the ASGI application directly.
+
+Opens N concurrent ``/live/votes/`` streams for a signed-in user against
+``cinema_rate.asgi.application`` (no server, no sockets), then casts votes from
+a worker thread (one per throwaway voter, as the vote views do) and measures:
+
+* how long it took to open the streams, the threads alive while they sit idle
+  and the memory they hold (tracemalloc);
+* how long until every stream received the coalesced deltas, and that each
+  stream saw exactly the votes that were cast;
+* that closing the streams unsubscribes them all.
+
+Usage: python benchmarks/live_votes.py [--connections 2000] [--votes 200]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+
+from _django import setup
+
+setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from cinema_rate.asgi import application  # noqa: E402
+from core.live import feed  # noqa: E402
+from core.models import Country, Movie  # noqa: E402
+from core.voting import cast_movie_vote  # noqa: E402
+
+
+class Stream:
+    def __init__(self, cookie: str):
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/live/votes/',
+            'raw_path': b'/live/votes/',
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'127.0.0.1'), (b'cookie', cookie.encode()), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('127.0.0.1', 8000),
+        }
+        self.status = None
+        self.opened = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.votes: dict[int, int] = {}
+        self.received_at = None
+        self._request_sent = False
+
+    async def receive(self):
+        if not self._request_sent:
+            self._request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            return
+        body = message.get('body', b'')
+        if body.startswith(b'retry:'):
+            self.opened.set()
+        elif body.startswith(b'event: votes'):
+            data = json.loads(body.split(b'data: ', 1)[1])
+            for movie_id, delta in data.get('movie', {}).items():
+                self.votes[int(movie_id)] = self.votes.get(int(movie_id), 0) + delta
+            self.received_at = time.perf_counter()
+        if not message.get('more_body', False):
+            self.opened.set()
+
+
+async def run(connections: int, cookie: str, voters, movies) -> None:
+    votes = len(voters)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    threads_before = threading.active_count()
+    streams = [Stream(cookie) for _ in range(connections)]
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(application(stream.scope, stream.receive, stream.send)) for stream in streams]
+    await asyncio.gather(*(stream.opened.wait() for stream in streams))
+    opened = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    statuses = {stream.status for stream in streams}
+    print(f'{connections} streams open in {opened:.2f}s (status {statuses}), {feed.subscriber_count} subscribers')
+    print(f'  threads: {threads_before} before, {threading.active_count()} with all streams idle')
+    print(f'  memory held: {memory / 1024 / 1024:.1f} MiB, {memory / connections / 1024:.1f} KiB per stream')
+    # Tracing every allocation would slow the vote and fan-out timings below.
+    tracemalloc.stop()
+
+    def cast():
+        for index, voter in enumerate(voters):
+            cast_movie_vote(voter, movies[index % len(movies)])
+
+    cast_started = time.perf_counter()
+    await sync_to_async(cast, thread_sensitive=True)()
+    cast_finished = time.perf_counter()
+    cast_elapsed = cast_finished - cast_started
+    expected = {}
+    for index in range(votes):
+        movie_id = movies[index % len(movies)].id
+        expected[movie_id] = expected.get(movie_id, 0) + 1
+    deadline = time.perf_counter() + 10
+    while time.perf_counter() < deadline and not all(stream.votes == expected for stream in streams):
+        await asyncio.sleep(0.01)
+    delivered = sum(1 for stream in streams if stream.votes == expected)
+    latest = max((stream.received_at or 0) for stream in streams)
+    print(f'{votes} votes cast in {cast_elapsed:.2f}s over {len(movies)} movies '
+          f'(flush every {settings.LIVE_VOTES_FLUSH_MS} ms)')
+    print(f'  {delivered}/{connections} streams saw exactly the votes cast; last delivery '
+          f'{(latest - cast_finished) * 1000:.0f} ms after the last vote')
+
+    for stream in streams:
+        stream.closed.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f'streams closed: {feed.subscriber_count} subscribers left')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=2000)
+    parser.add_argument('--votes', type=int, default=200)
+    args = parser.parse_args()
+
+    country = Country.objects.first() or Country.objects.create(name='Benchmarkland', iso_code='BL')
+    user = User.objects.create_user(f'live-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+    movies = Movie.objects.bulk_create([Movie(title=f'Live {index}', country=country) for index in range(20)])
+    voters = User.objects.bulk_create([User(username=f'{user.username}-{index}') for index in range(args.votes)])
+    client = Client(HTTP_HOST='127.0.0.1')
+    client.force_login(user)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    try:
+        asyncio.run(run(args.connections, cookie, voters, movies))
+    finally:
+        User.objects.filter(username__startswith=user.username).delete()
+        Movie.objects.filter(id__in=[movie.id for movie in movies]).delete()
+
+
+if __name__ == '__main__':
+    main()
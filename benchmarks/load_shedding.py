@@ -0,0 +1,126 @@
+"""Fault injection for the load-shedding middleware.
+
+Adds artificial latency to every query (through an execute wrapper installed by
+an outermost middleware, so session and auth lookups slow down too) and walks
+through a database slowdown:
+
+1. healthy: the home page renders and is kept as the user's last good copy;
+2. slow: once the latency estimate passes the threshold, the home page is served
+   stale from that copy, an upload gets 503 + Retry-After, and a burst of
+   concurrent votes is admitted up to the concurrency plus queue bound;
+3. recovered: with the delay removed the estimate decays and pages render again.
+
+Usage: python benchmarks/load_shedding.py [--delay-ms 100] [--threshold-ms 50] [--votes 8]
+"""
+import argparse
+import threading
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from core import admission  # noqa: E402
+from core.models import Country, Movie  # noqa: E402
+
+FAULT = {'delay': 0.0}
+
+
+class SlowQueriesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with connection.execute_wrapper(self._slow):
+            return self.get_response(request)
+
+    def _slow(self, execute, *args):
+        if FAULT['delay']:
+            time.sleep(FAULT['delay'])
+        return execute(*args)
+
+
+def middleware() -> list[str]:
+    return [f'{__name__}.SlowQueriesMiddleware', *settings.MIDDLEWARE]
+
+
+def home(client: Client, label: str) -> None:
+    started = time.perf_counter()
+    response = client.get('/home/')
+    elapsed = (time.perf_counter() - started) * 1000
+    served = response.get(admission.STALE_HEADER, 'fresh')
+    print(f'  {label:<34} {response.status_code} {served:<6} {elapsed:8.1f} ms  (db latency estimate {admission.latency.average_ms:6.1f} ms)')
+
+
+def vote_burst(user, movies) -> list[int]:
+    statuses = []
+
+    def vote(movie):
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        statuses.append(client.post(f'/vote/movie/{movie.id}/').status_code)
+        connections.close_all()
+
+    threads = [threading.Thread(target=vote, args=(movie,)) for movie in movies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(statuses)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay-ms', type=float, default=100)
+    parser.add_argument('--threshold-ms', type=float, default=50)
+    parser.add_argument('--votes', type=int, default=8)
+    args = parser.parse_args()
+
+    country = Country.objects.first()
+    user = User.objects.create_user(f'shed-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+    movies = Movie.objects.bulk_create([Movie(title=f'Shedding {index}', country=country) for index in range(args.votes)])
+    overrides = override_settings(
+        MIDDLEWARE=middleware(),
+        LOAD_SHED_DB_LATENCY_MS=args.threshold_ms,
+        LOAD_SHED_RECOVERY_SECONDS=0.5,
+        LOAD_SHED_VOTE_CONCURRENCY=2,
+        LOAD_SHED_VOTE_QUEUE=2,
+    )
+    try:
+        with overrides:
+            admission.latency.reset()
+            client = Client(HTTP_HOST='127.0.0.1')
+            client.force_login(user)
+
+            print('healthy:')
+            home(client, 'home')
+
+            FAULT['delay'] = args.delay_ms / 1000
+            print(f'every query {args.delay_ms:g} ms slower:')
+            for attempt in range(1, 4):
+                home(client, f'home #{attempt}')
+            upload = client.post('/home/', {'add_movie': '1', 'movie-title': 'Upload while slow'})
+            print(f"  {'upload (multipart POST)':<34} {upload.status_code} Retry-After={upload.get('Retry-After')}")
+            statuses = vote_burst(user, movies)
+            admitted = sum(1 for status in statuses if status != 503)
+            print(f'  {len(movies)} concurrent votes{"":<17} {admitted} admitted, {len(statuses) - admitted} rejected with 503')
+
+            FAULT['delay'] = 0.0
+            time.sleep(3)
+            print('delay removed, 3 s later:')
+            home(client, 'home')
+    finally:
+        FAULT['delay'] = 0.0
+        User.objects.filter(pk=user.pk).delete()
+        Movie.objects.filter(id__in=[movie.id for movie in movies]).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Outbound mail queue against a local SMTP stand-in.
+
+Starts a minimal threaded SMTP server on 127.0.0.1 that records every message
+and connection and refuses recipients containing ``reject`` with ``550``. Then
+enqueues N messages through ``send_mail`` (the queued backend) and reports the
+time per enqueue. It adds one message with a refused recipient and one with a
+newline in a header value, and delivers the queue in batches through the real
+SMTP backend. Checks that every good message arrived exactly once and over one
+connection per batch plus one reconnect per SMTP error, that the refused and
+the malformed message failed permanently after a single attempt without
+holding back the rest of their batch, and that nothing is left queued.
+
+Usage: python benchmarks/mail_queue.py [--messages 100] [--batch-size 25]
+"""
+import argparse
+import socketserver
+import threading
+import time
+from collections import Counter
+
+from _django import setup
+
+setup()
+
+from django.core.mail import EmailMessage, send_mail  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from core import mail  # noqa: E402
+from core.models import OutboundEmail  # noqa: E402
+
+
+class StandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 stand-in ready')
+        recipients = []
+        while line := self.rfile.readline():
+            command = line.decode('latin-1').strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                if 'reject' in command.lower():
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(command.split(':', 1)[1].strip())
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while (chunk := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append((tuple(recipients), b''.join(data)))
+                self.reply('250 Queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=25)
+    args = parser.parse_args()
+
+    if OutboundEmail.objects.filter(status=OutboundEmail.QUEUED).exists():
+        raise SystemExit('The mail queue is not empty; its messages would be delivered to the stand-in.')
+    first_id = (OutboundEmail.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with override_settings(
+            EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+            EMAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+        ):
+            started = time.perf_counter()
+            for index in range(args.messages):
+                send_mail(f'Reset {index}', 'Body', 'site@example.com', [f'user{index}@example.com'])
+            enqueue = time.perf_counter() - started
+            print(f'{args.messages} messages enqueued in {enqueue:.2f}s ({enqueue / args.messages * 1000:.2f} ms each)')
+            send_mail('Refused', 'Body', 'site@example.com', ['reject@example.com'])
+            EmailMessage('Malformed', 'Body', 'site@example.com', ['user@example.com'], headers={'X-Note': 'a\nb'}).send()
+
+            started = time.perf_counter()
+            totals = Counter()
+            batches = 0
+            while batch := mail.claim_batch(args.batch_size):
+                batches += 1
+                totals.update(mail.deliver(batch))
+            elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    print(f'delivered in {elapsed:.2f}s: {dict(totals)} over {server.connections} connections in {batches} batches')
+    delivered = Counter(recipients for recipients, _ in server.messages)
+    assert len(delivered) == args.messages and set(delivered.values()) == {1}, 'a message was lost or sent twice'
+    assert totals == {'sent': args.messages, 'failed': 2, 'retrying': 0}, totals
+    # One connection per batch, plus a reconnect after the 550; the malformed message needs none.
+    assert server.connections == batches + 1, server.connections
+    failed = OutboundEmail.objects.filter(id__gte=first_id, status=OutboundEmail.FAILED).order_by('subject')
+    assert [(row.subject, row.attempts) for row in failed] == [('Malformed', 1), ('Refused', 1)], list(failed)
+    for row in failed:
+        print(f'  failed permanently: {row.subject!r}: {row.last_error}')
+    assert not OutboundEmail.objects.filter(status=OutboundEmail.QUEUED).exists()
+    OutboundEmail.objects.filter(id__gte=first_id).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Concurrent vs. sequential poster mirroring against a local stand-in server.
+
+Starts a threaded HTTP server on 127.0.0.1 that answers every path with a small
+PNG after a fixed delay (standing in for a slow image host), then mirrors the
+same set of URLs with ``mirror_urls`` at concurrency 1 and at the configured
+concurrency, and reports the wall time and fetches per second of each. Then
+checks the private-host guard against a mock transport and a fake resolver:
+a public host redirecting to 127.0.0.1 is refused, a redirect to another public
+host is followed, and every hop connects to the address that was vetted.
+
+Usage: python benchmarks/poster_mirror.py [--urls 200] [--latency-ms 50] [--concurrency 16]
+"""
+import argparse
+import asyncio
+import socket
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from _django import setup
+
+setup()
+
+import httpx  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from core.poster_mirror import mirror_urls  # noqa: E402
+from core.uploads import PNG_MAGIC  # noqa: E402
+
+
+def png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b''.join(b'\x00' + b'\x80' * width * 3 for _ in range(height)))
+    return PNG_MAGIC + chunk(b'IHDR', header) + chunk(b'IDAT', pixels) + chunk(b'IEND', b'')
+
+
+def start_server(latency: float) -> ThreadingHTTPServer:
+    body = png(200, 300)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(urls: list[str], concurrency: int) -> tuple[float, int]:
+    media_root = tempfile.mkdtemp(prefix='poster-mirror-')
+    try:
+        with override_settings(MEDIA_ROOT=media_root, POSTER_MIRROR_ALLOW_PRIVATE_HOSTS=True):
+            started = time.perf_counter()
+            results = asyncio.run(mirror_urls(urls, concurrency))
+            elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(media_root)
+    failed = [result for result in results if not result.name]
+    if failed:
+        raise SystemExit(f'{len(failed)} fetches failed, first: {failed[0].error}')
+    return elapsed, len(results)
+
+
+PUBLIC_HOSTS = {'posters.example': '93.184.216.34', 'cdn.example': '93.184.216.35'}
+
+
+def check_redirect_guard() -> None:
+    body = png(20, 30)
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.url.host, request.headers['Host']))
+        if request.headers['Host'] == 'posters.example':
+            target = {'/internal.png': 'http://127.0.0.1/admin.png', '/moved.png': 'http://cdn.example/poster.png'}
+            return httpx.Response(302, headers={'Location': target[request.url.path]})
+        return httpx.Response(200, content=body, headers={'Content-Type': 'image/png'})
+
+    async def fetch(urls):
+        loop = asyncio.get_running_loop()
+        resolve = loop.getaddrinfo
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            if host in PUBLIC_HOSTS:
+                return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (PUBLIC_HOSTS[host], port or 80))]
+            return await resolve(host, port, **kwargs)
+
+        loop.getaddrinfo = fake_getaddrinfo
+        return await mirror_urls(urls, 2, transport=httpx.MockTransport(handler))
+
+    media_root = tempfile.mkdtemp(prefix='poster-mirror-')
+    try:
+        with override_settings(MEDIA_ROOT=media_root, POSTER_MIRROR_ALLOW_PRIVATE_HOSTS=False):
+            blocked, moved = asyncio.run(fetch(['http://posters.example/internal.png', 'http://posters.example/moved.png']))
+    finally:
+        shutil.rmtree(media_root)
+    assert blocked.name is None and 'non-public' in blocked.error, blocked
+    assert moved.name, moved
+    assert all(host == PUBLIC_HOSTS[header] for host, header in seen), seen
+    assert '127.0.0.1' not in {host for host, _ in seen}, seen
+    print('redirect guard: redirect to 127.0.0.1 refused, public redirect followed, every hop pinned to its vetted address')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--concurrency', type=int, default=settings.POSTER_MIRROR_CONCURRENCY)
+    args = parser.parse_args()
+
+    server = start_server(args.latency_ms / 1000)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    urls = [f'{base}/poster/{index}.png' for index in range(args.urls)]
+    print(f'{args.urls} posters from a stand-in host with {args.latency_ms:g} ms latency')
+    for concurrency in (1, args.concurrency):
+        elapsed, fetched = run(urls, concurrency)
+        print(f'  concurrency {concurrency:>3}: {elapsed:7.2f}s  {fetched / elapsed:8.1f} posters/s')
+    server.shutdown()
+    check_redirect_guard()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Cost of a load balancer probe: ``/`` vs ``/healthz`` vs ``/readyz``.
+
+Sends N anonymous requests to each path through the test client, without
+keeping cookies between them as a probe would, and reports the mean time and
+the queries per request. Then checks that a probe from any host only learns
+``ok`` or ``failed`` per check, and that the detail needs ``HEALTH_DETAIL_TOKEN``.
+
+Usage: python benchmarks/probes.py [--requests 500]
+"""
+import argparse
+import time
+
+from _django import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+
+def probe(path: str, requests: int) -> None:
+    queries = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = Client(HTTP_HOST='127.0.0.1').get(path)
+        elapsed = time.perf_counter() - started
+    print(f'  {path:<10} {response.status_code}  {elapsed / requests * 1e6:9.1f} us  {queries / requests:5.2f} queries')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+    print(f'mean of {args.requests} probes:')
+    for path in ('/', '/healthz', '/readyz'):
+        probe(path, args.requests)
+
+    with override_settings(HEALTH_DETAIL_TOKEN='probe-secret'):
+        stranger = Client(HTTP_HOST='attacker.example')
+        assert stranger.get('/healthz').json() == {'status': 'alive'}
+        public = stranger.get('/readyz', HTTP_X_HEALTH_TOKEN='guess').json()
+        assert set(public) == {'status', 'checks'} and set(public['checks'].values()) <= {'ok', 'failed'}, public
+        detail = stranger.get('/readyz', HTTP_X_HEALTH_TOKEN='probe-secret').json()
+        assert 'load' in detail and 'ms' in detail['checks']['database'], detail
+    print('public probes answer ok/failed only; pid, timings, errors and load need the token')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Primary/replica routing against two local SQLite databases.
+
+Points ``default`` at a temporary primary file and ``replica_1`` at a second
+file that only changes when the script "replicates" by copying the primary over
+it, so replication lag is whatever the script decides. It then drives the site
+through the test client and checks that:
+
+* a plain page view reads from the replica;
+* after adding a movie the client is pinned and sees it on the next page, while
+  an unpinned session of the same user still gets the stale replica copy;
+* a replica reported as lagging is skipped and everything reads from the primary.
+
+Usage: python benchmarks/replica_routing.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix='replica-routing-')
+PRIMARY = os.path.join(WORKDIR, 'primary.sqlite3')
+REPLICA = os.path.join(WORKDIR, 'replica.sqlite3')
+os.environ.pop('DATABASE_URL', None)
+os.environ.update(USE_SQLITE='true', SQLITE_PATH=PRIMARY, DATABASE_REPLICA_URLS=f'sqlite:///{REPLICA}')
+
+from _django import setup  # noqa: E402
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from core.db_router import PIN_COOKIE, record_lag  # noqa: E402
+from core.models import Country  # noqa: E402
+
+
+def replicate() -> None:
+    connections['replica_1'].close()
+    shutil.copyfile(PRIMARY, REPLICA)
+
+
+def get_home(client: Client):
+    with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica_1']) as replica:
+        response = client.get('/home/')
+    assert response.status_code == 200, response.status_code
+    return response.content.decode(), data_reads(primary), data_reads(replica)
+
+
+def data_reads(queries: CaptureQueriesContext) -> int:
+    # Sessions and schema introspection always use the primary; count reads of app tables only.
+    return sum(
+        1 for query in queries.captured_queries
+        if query['sql'].startswith('SELECT') and 'FROM "' in query['sql'] and 'FROM "django_session"' not in query['sql']
+    )
+
+
+def check(label: str, ok: bool, detail: str) -> bool:
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}: {detail}")
+    return ok
+
+
+def main() -> int:
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user('replica-check', password='unused-password')
+    replicate()
+
+    pinned = Client(HTTP_HOST='127.0.0.1')
+    pinned.force_login(user)
+    unpinned = Client(HTTP_HOST='127.0.0.1')
+    unpinned.force_login(user)
+    results = []
+
+    _, primary, replica = get_home(pinned)
+    results.append(check('page view before any write', replica > 0 and primary == 0, f'{primary} primary / {replica} replica queries'))
+
+    response = pinned.post('/home/', {
+        'add_movie': '1',
+        'movie-title': 'Replica Check',
+        'movie-production_year': 2001,
+        'movie-score': 80,
+        'movie-country': Country.objects.first().pk,
+    })
+    results.append(check('write sets the pin cookie', PIN_COOKIE in response.cookies, f'status {response.status_code}'))
+
+    body, primary, replica = get_home(pinned)
+    results.append(check('pinned client sees its write', 'Replica Check' in body and replica == 0, f'{primary} primary / {replica} replica queries'))
+    body, primary, replica = get_home(unpinned)
+    results.append(check('unpinned session reads the lagging replica', 'Replica Check' not in body and replica > 0, f'{primary} primary / {replica} replica queries'))
+
+    replicate()
+    body, _, _ = get_home(unpinned)
+    results.append(check('unpinned session after replication', 'Replica Check' in body, 'sees the new movie'))
+
+    record_lag('replica_1', 60.0)
+    _, primary, replica = get_home(unpinned)
+    results.append(check('lagging replica is skipped', replica == 0, f'{primary} primary / {replica} replica queries'))
+
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    try:
+        status = main()
+    finally:
+        for alias in connections:
+            connections[alias].close()
+        shutil.rmtree(WORKDIR)
+    sys.exit(status)
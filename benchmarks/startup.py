@@ -0,0 +1,85 @@
+"""Time-to-first-response for a fresh worker process, with and without the warm-up hook.
+
+Each run starts a new interpreter, loads the WSGI application, optionally runs
+``core.warmup.warm_up`` (as the gunicorn ``post_worker_init`` hook does) and then
+serves two requests directly through the WSGI callable.
+
+Usage: python benchmarks/startup.py [--runs 5] [--path /login/]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from _django import ROOT
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+from cinema_rate.wsgi import application
+loaded = time.perf_counter()
+warmup = {}
+if sys.argv[1] == 'warm':
+    from core.warmup import warm_up
+    warmup = warm_up(database=False)
+ready = time.perf_counter()
+
+def request(path):
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}
+    setup_testing_defaults(environ)
+    begin = time.perf_counter()
+    body = b''.join(application(environ, lambda status, headers: None))
+    return (time.perf_counter() - begin) * 1000, len(body)
+
+first, size = request(sys.argv[2])
+second, _ = request(sys.argv[2])
+print(json.dumps({
+    'load_ms': (loaded - started) * 1000,
+    'warmup_ms': (ready - loaded) * 1000,
+    'first_ms': first,
+    'second_ms': second,
+    'ready_to_first_byte_ms': (ready - started) * 1000 + first,
+    'bytes': size,
+    'steps': warmup,
+}))
+'''
+
+
+def run(mode: str, path: str) -> dict:
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'cinema_rate.settings'}
+    env.setdefault('DJANGO_SECRET_KEY', 'benchmark-only-secret-key')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, mode, path],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/login/')
+    args = parser.parse_args()
+
+    print(f'{"mode":<6} {"load":>8} {"warm-up":>8} {"1st req":>8} {"2nd req":>8} {"start->1st":>11}  (median ms over {args.runs} runs)')
+    for mode in ('cold', 'warm'):
+        runs = [run(mode, args.path) for _ in range(args.runs)]
+        median = {key: statistics.median(run_[key] for run_ in runs) for key in ('load_ms', 'warmup_ms', 'first_ms', 'second_ms', 'ready_to_first_byte_ms')}
+        print(
+            f'{mode:<6} {median["load_ms"]:>8.1f} {median["warmup_ms"]:>8.1f} {median["first_ms"]:>8.1f} '
+            f'{median["second_ms"]:>8.1f} {median["ready_to_first_byte_ms"]:>11.1f}'
+        )
+        if mode == 'warm':
+            steps = runs[-1]['steps']
+            print('       warm-up steps: ' + ', '.join(f'{name}={elapsed:.1f}' for name, elapsed in steps.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Throughput and precision of the PersonalMovie -> Movie title matcher on synthetic data.
+
+Usage: python benchmarks/title_matching.py [--catalog 50000] [--entries 200000] [--seed 7]
+"""
+import argparse
+import random
+import string
+import time
+
+from _django import setup
+
+setup()
+
+from core.title_matching import DEFAULT_THRESHOLD, TitleIndex  # noqa: E402
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ten', 'dor', 'vel', 'sun', 'ar', 'is', 'on', 'bri', 'gal', 'mo', 'ne', 'tra']
+
+
+def make_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+
+def make_catalog(rng: random.Random, size: int) -> list[tuple[int, str, int]]:
+    catalog, seen = [], set()
+    while len(catalog) < size:
+        words = [make_word(rng).capitalize() for _ in range(rng.randint(1, 4))]
+        title = ' '.join(words)
+        if rng.random() < 0.2:
+            title = f'The {title}'
+        if title.lower() in seen:
+            continue
+        seen.add(title.lower())
+        catalog.append((len(catalog) + 1, title, rng.randint(1950, 2025)))
+    return catalog
+
+
+def add_typo(rng: random.Random, title: str) -> str:
+    if len(title) < 6:
+        return title
+    position = rng.randrange(1, len(title) - 1)
+    kind = rng.choice(['drop', 'swap', 'replace'])
+    if kind == 'drop':
+        return title[:position] + title[position + 1:]
+    if kind == 'swap':
+        return title[:position - 1] + title[position] + title[position - 1] + title[position + 1:]
+    return title[:position] + rng.choice(string.ascii_lowercase) + title[position + 1:]
+
+
+def make_entries(rng: random.Random, catalog, size: int, unmatched_ratio: float):
+    entries = []
+    for _ in range(size):
+        if rng.random() < unmatched_ratio:
+            title = ' '.join(make_word(rng) for _ in range(rng.randint(2, 5))) + ' zz'
+            entries.append((title, rng.randint(1950, 2025), None))
+            continue
+        movie_id, title, year = rng.choice(catalog)
+        if title.startswith('The ') and rng.random() < 0.5:
+            title = title[4:]
+        if rng.random() < 0.5:
+            title = title.lower()
+        if rng.random() < 0.2:
+            title = title.replace(' ', ': ', 1)
+        if rng.random() < 0.3:
+            title = add_typo(rng, title)
+        if rng.random() < 0.2:
+            title = f'{title} ({year})'
+        entries.append((title, year, movie_id))
+    return entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--catalog', type=int, default=50000)
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--unmatched', type=float, default=0.2)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    catalog = make_catalog(rng, args.catalog)
+    entries = make_entries(rng, catalog, args.entries, args.unmatched)
+
+    started = time.perf_counter()
+    index = TitleIndex.from_rows((movie_id, f'{title} ({year})') for movie_id, title, year in catalog)
+    index_seconds = time.perf_counter() - started
+
+    linked = correct = matchable = 0
+    started = time.perf_counter()
+    for title, year, expected in entries:
+        match = index.match(title, year, args.threshold)
+        matchable += expected is not None
+        if match:
+            linked += 1
+            correct += match.movie_id == expected
+    match_seconds = time.perf_counter() - started
+
+    print(f'catalog titles:   {len(index):>10,}  (indexed in {index_seconds:.2f}s)')
+    print(f'personal entries: {len(entries):>10,}  ({matchable:,} have a catalog match)')
+    print(f'throughput:       {len(entries) / match_seconds:>10,.0f} entries/s')
+    print(f'precision:        {correct / linked if linked else 0:>10.3f}')
+    print(f'recall:           {correct / matchable if matchable else 0:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
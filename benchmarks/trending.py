@@ -0,0 +1,81 @@
+"""Incremental log-space trending scores vs. recomputing decay over every vote.
+
+Replays a synthetic vote stream (Zipf popularity that drifts over time) and
+compares the per-vote update cost and the top-N read cost of both approaches,
+checking that they produce the same ranking.
+
+Usage: python benchmarks/trending.py [--items 10000] [--votes 500000] [--days 14]
+"""
+import argparse
+import heapq
+import math
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from _django import setup
+
+setup()
+
+from core.trending import EPOCH, decay_rate, log_add_exp, vote_weight  # noqa: E402
+
+
+def vote_stream(rng: random.Random, items: int, votes: int, days: int):
+    start = EPOCH + timedelta(days=400)
+    span = days * 86400
+    ranks = list(range(items))
+    cum_weights = list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(items)))
+    per_day = votes // days
+    stream = []
+    for day in range(days):
+        # Popularity drifts: each simulated day a few items jump into the head of the distribution.
+        for _ in range(max(1, items // 500)):
+            a, b = rng.randrange(items), rng.randrange(min(items, 50))
+            ranks[a], ranks[b] = ranks[b], ranks[a]
+        for offset, rank in enumerate(rng.choices(range(items), cum_weights=cum_weights, k=per_day)):
+            seconds = span * (day * per_day + offset) / (days * per_day)
+            stream.append((ranks[rank], start + timedelta(seconds=seconds)))
+    return stream
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=10000)
+    parser.add_argument('--votes', type=int, default=500000)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stream = vote_stream(rng, args.items, args.votes, args.days)
+    now = stream[-1][1]
+
+    scores = [0.0] * args.items
+    started = time.perf_counter()
+    for item, voted_at in stream:
+        scores[item] = log_add_exp(scores[item], vote_weight(voted_at))
+    update_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    incremental_top = heapq.nlargest(args.top, range(args.items), key=scores.__getitem__)
+    incremental_read = time.perf_counter() - started
+
+    rate = decay_rate()
+    started = time.perf_counter()
+    heat = [0.0] * args.items
+    for item, voted_at in stream:
+        heat[item] += math.exp(-rate * (now - voted_at).total_seconds())
+    recompute_top = heapq.nlargest(args.top, range(args.items), key=heat.__getitem__)
+    recompute_read = time.perf_counter() - started
+
+    print(f'votes replayed:          {len(stream):>12,}')
+    print(f'incremental update:      {update_seconds / len(stream) * 1e6:>12.2f} us/vote')
+    print(f'incremental top-{args.top} read: {incremental_read * 1e3:>12.2f} ms (one indexed read in the database)')
+    print(f'recompute top-{args.top} read:   {recompute_read * 1e3:>12.2f} ms (scales with every vote ever cast)')
+    print(f'same ranking:            {incremental_top == recompute_top!s:>12}')
+
+
+if __name__ == '__main__':
+    main()
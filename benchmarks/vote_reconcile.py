@@ -0,0 +1,124 @@
+"""Vote counter drift, chunked reconciliation and rebuilding counters from the vote log.
+
+Creates N movies and casts votes through the vote paths (single votes and a
+batch), then:
+
+* corrupts a tenth of the counters the way a half-applied vote used to and
+  times a reconciliation pass against the vote table, first as a dry run;
+* repairs the drift again while a second thread keeps casting votes, and checks
+  that no concurrent vote was lost;
+* simulates an incident that wipes vote rows and counters of some movies and
+  rebuilds the counters from the append-only event log.
+
+Usage: python benchmarks/vote_reconcile.py [--movies 2000] [--voters 50] [--chunk-size 1000]
+"""
+import argparse
+import random
+import threading
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import close_old_connections  # noqa: E402
+from django.db.models import Count, F  # noqa: E402
+
+from core import vote_log  # noqa: E402
+from core.batch import apply_batch  # noqa: E402
+from core.models import Country, Movie, MovieVote, VoteEvent  # noqa: E402
+from core.voting import cast_movie_vote  # noqa: E402
+
+
+def mismatches(movie_ids) -> int:
+    counted = dict(
+        MovieVote.objects.filter(movie_id__in=movie_ids).values('movie_id').annotate(total=Count('id')).values_list('movie_id', 'total')
+    )
+    stored = Movie.objects.filter(id__in=movie_ids).values_list('id', 'vote_count')
+    return sum(1 for movie_id, vote_count in stored if counted.get(movie_id, 0) != vote_count)
+
+
+def timed(label: str, **options) -> dict:
+    started = time.perf_counter()
+    stats = vote_log.reconcile('movie', **options)
+    print(f'  {label:<34} {(time.perf_counter() - started) * 1000:8.1f} ms  '
+          f"{stats['scanned']} scanned, {stats['drifted']} drifted, net {stats['correction']:+d}")
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=2000)
+    parser.add_argument('--voters', type=int, default=50)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    prefix = f'reconcile-{uuid.uuid4().hex[:12]}'
+    country = Country.objects.first() or Country.objects.create(name='Benchmarkland')
+    movies = Movie.objects.bulk_create([Movie(title=f'{prefix} {index}', country=country) for index in range(args.movies)])
+    movie_ids = [movie.id for movie in movies]
+    voters = User.objects.bulk_create([User(username=f'{prefix}-{index}') for index in range(args.voters + 1)])
+    late_voter = voters.pop()
+    try:
+        started = time.perf_counter()
+        for voter in voters[:10]:
+            for movie in rng.sample(movies, 20):
+                cast_movie_vote(voter, movie)
+        for voter in voters[10:]:
+            apply_batch(voter, [{'op': 'vote_movie', 'id': movie_id} for movie_id in rng.sample(movie_ids, 100)], 1000)
+        votes = MovieVote.objects.filter(movie_id__in=movie_ids).count()
+        events = VoteEvent.objects.filter(kind='movie', target_id__in=movie_ids).count()
+        print(f'{votes} votes ({events} log events) cast in {time.perf_counter() - started:.2f}s over {args.movies} movies')
+        assert votes == events and mismatches(movie_ids) == 0
+
+        drifted = rng.sample(movie_ids, args.movies // 10)
+        Movie.objects.filter(id__in=drifted[::2]).update(vote_count=F('vote_count') + 1)
+        Movie.objects.filter(id__in=drifted[1::2], vote_count__gt=0).update(vote_count=F('vote_count') - 1)
+        print(f'corrupted {mismatches(movie_ids)} counters; reconciling {Movie.objects.count()} movies '
+              f'in chunks of {args.chunk_size}:')
+        timed('dry run against the vote table', chunk_size=args.chunk_size, fix=False)
+        assert mismatches(movie_ids) > 0
+
+        stop = threading.Event()
+        late_votes = []
+
+        def vote_meanwhile():
+            try:
+                for movie in movies:
+                    if stop.is_set():
+                        break
+                    if cast_movie_vote(late_voter, movie):
+                        late_votes.append(movie.id)
+            finally:
+                close_old_connections()
+
+        thread = threading.Thread(target=vote_meanwhile)
+        thread.start()
+        timed('repair with votes arriving', chunk_size=args.chunk_size)
+        stop.set()
+        thread.join()
+        print(f'  {len(late_votes)} votes cast during the repair; {mismatches(movie_ids)} counters still wrong')
+        assert mismatches(movie_ids) == 0
+        timed('second pass', chunk_size=args.chunk_size)
+
+        wiped = rng.sample(movie_ids, args.movies // 20)
+        MovieVote.objects.filter(movie_id__in=wiped).delete()
+        Movie.objects.filter(id__in=wiped).update(vote_count=0)
+        expected = dict(
+            VoteEvent.objects.filter(kind='movie', target_id__in=wiped).values('target_id').annotate(total=Count('id')).values_list('target_id', 'total')
+        )
+        print(f'incident: votes and counters of {len(wiped)} movies wiped ({sum(expected.values())} votes)')
+        timed('rebuild from the event log', source='log', chunk_size=args.chunk_size)
+        restored = dict(Movie.objects.filter(id__in=wiped).values_list('id', 'vote_count'))
+        assert all(restored[movie_id] == expected.get(movie_id, 0) for movie_id in wiped), 'log rebuild missed votes'
+        print('  counters of the wiped movies match the log')
+    finally:
+        User.objects.filter(username__startswith=prefix).delete()
+        Movie.objects.filter(id__in=movie_ids).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Cost of one vote with the redirect flow and with the fetch (JSON / 204) modes.
+
+Signs in a throwaway user with N movies and actors on their home page and votes
+for fresh movies three ways: a form post followed by the redirect to
+``/home/`` (what a browser without JavaScript does), a ``fetch`` post asking
+for JSON, and one sending ``Prefer: return=minimal`` (``204``). Reports
+requests, time, query count and bytes per vote, and checks the JSON count.
+
+Usage: python benchmarks/vote_roundtrip.py [--entries 50] [--votes 50]
+"""
+import argparse
+import time
+import uuid
+
+from _django import setup
+
+setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from core.models import Country, Movie, PersonalActor, PersonalMovie  # noqa: E402
+
+
+def measure(client: Client, movies, **options) -> tuple:
+    queries = 0
+    size = 0
+    requests = 0
+
+    def count(execute, *args):
+        nonlocal queries
+        queries += 1
+        return execute(*args)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for movie in movies:
+            response = client.post(f'/vote/movie/{movie.id}/', **options)
+            requests += 1 + len(getattr(response, 'redirect_chain', []))
+            size += len(response.content)
+        elapsed = time.perf_counter() - started
+    votes = len(movies)
+    return response, requests / votes, elapsed * 1000 / votes, queries / votes, size / votes
+
+
+def report(label: str, response, requests: float, elapsed: float, queries: float, size: float) -> None:
+    print(f'  {label:<22} {response.status_code}  {requests:3.0f} requests  {elapsed:8.2f} ms  '
+          f'{queries:5.1f} queries  {size:8.0f} bytes')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=50)
+    parser.add_argument('--votes', type=int, default=50)
+    args = parser.parse_args()
+
+    country = Country.objects.first() or Country.objects.create(name='Benchmarkland')
+    user = User.objects.create_user(f'vote-{uuid.uuid4().hex[:12]}', password=uuid.uuid4().hex)
+    movies = Movie.objects.bulk_create([
+        Movie(title=f'{user.username} {index}', country=country) for index in range(args.votes * 3)
+    ])
+    try:
+        PersonalMovie.objects.bulk_create([
+            PersonalMovie(user=user, title=f'Movie {index}', production_year=2000, score=index % 100, country=country)
+            for index in range(args.entries)
+        ])
+        PersonalActor.objects.bulk_create([
+            PersonalActor(user=user, full_name=f'Actor {index}', production_year=1970, score=index % 100, country=country)
+            for index in range(args.entries)
+        ])
+        client = Client(HTTP_HOST='127.0.0.1')
+        client.force_login(user)
+        client.get('/home/')
+
+        batches = [movies[index::3] for index in range(3)]
+        print(f'{args.votes} votes each, home page with {args.entries} movies and {args.entries} actors, per vote:')
+        report('form post + redirect', *measure(client, batches[0], follow=True))
+        response, *stats = measure(client, batches[1], HTTP_ACCEPT='application/json')
+        report('fetch, JSON', response, *stats)
+        report('fetch, 204', *measure(client, batches[2], HTTP_ACCEPT='application/json', HTTP_PREFER='return=minimal'))
+
+        result = response.json()
+        stored = Movie.objects.get(id=result['id']).vote_count
+        assert result['created'] and result['vote_count'] == stored == 1, (result, stored)
+        again = client.post(f'/vote/movie/{result["id"]}/', HTTP_ACCEPT='application/json').json()
+        assert not again['created'] and again['vote_count'] == 1, again
+        print('JSON counts match the stored counts; a repeated vote reports created=false.')
+    finally:
+        User.objects.filter(pk=user.pk).delete()
+        Movie.objects.filter(id__in=[movie.id for movie in movies]).delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinema_rate.settings')
-application = get_asgi_application()
\ No newline at end of file
+django_application = get_asgi_application()
+
+from core.live import with_live_votes  # noqa: E402
+from core.warmup import with_lifespan_warmup  # noqa: E402
+
+application = with_lifespan_warmup(with_live_votes(django_application))
@@ -40,14 +40,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Probes are answered here, before host checks, sessions and auth.
+    'core.health.HealthCheckMiddleware',
+    'core.admission.QueryLatencyMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.db_router.ReadYourWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'core.middleware.SessionTimeoutMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Last, so expired sessions are logged out before a stale copy is served, and its stale
+    # and 503 answers still pass through the message and framing middleware. The latency it
+    # acts on is measured by QueryLatencyMiddleware near the top.
+    'core.admission.AdmissionControlMiddleware',
 ]
 
 ROOT_URLCONF = 'cinema_rate.urls'
@@ -72,26 +82,44 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'cinema_rate.wsgi.application'
 
-database_url = os.getenv('DATABASE_URL', '').strip()
-if database_url:
+# Persistent connections are opt-in: 0 closes the connection at the end of each request. Under
+# gunicorn a value such as 60 keeps one connection per worker thread and lets the warm-up open it
+# before traffic arrives; leave it at 0 under ASGI, where requests do not reuse them.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+
+
+# Write transactions take SQLite's lock at BEGIN (waiting for it), instead of failing with
+# "database is locked" when a read inside them has to upgrade to a write under concurrency.
+SQLITE_OPTIONS = {'transaction_mode': 'IMMEDIATE'}
+
+
+def _database_from_url(url: str) -> dict:
     from urllib.parse import urlparse
 
-    parsed = urlparse(database_url)
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': parsed.path.lstrip('/'),
-            'USER': parsed.username,
-            'PASSWORD': parsed.password,
-            'HOST': parsed.hostname,
-            'PORT': parsed.port or 5432,
-        }
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        return {'ENGINE': 'django.db.backends.sqlite3', 'NAME': parsed.path, 'OPTIONS': SQLITE_OPTIONS}
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': parsed.path.lstrip('/'),
+        'USER': parsed.username,
+        'PASSWORD': parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
+
+
+database_url = os.getenv('DATABASE_URL', '').strip()
+if database_url:
+    DATABASES = {'default': _database_from_url(database_url)}
 elif os.getenv('USE_SQLITE', 'False').lower() == 'true':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': SQLITE_OPTIONS,
         }
     }
 else:
@@ -103,9 +131,21 @@ else:
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('POSTGRES_HOST'),
             'PORT': os.getenv('POSTGRES_PORT'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
+# Read replicas, comma separated (postgres:// or sqlite:///path URLs); see core/db_router.py.
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(filter(None, map(str.strip, os.getenv('DATABASE_REPLICA_URLS', '').split(','))), 1):
+    DATABASES[f'replica_{index}'] = {**_database_from_url(replica_url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{index}')
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DATABASE_REPLICA_MAX_LAG_SECONDS', '5'))
+# Keep this above the tolerated lag so a pinned client only returns to the replicas once they caught up.
+DATABASE_PIN_SECONDS = int(os.getenv('DATABASE_PIN_SECONDS', '15'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -132,9 +172,78 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_SAVE_EVERY_REQUEST = True
 
 AUTHENTICATION_BACKENDS = ['core.backends.UsernameOrEmailBackend']
-EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+# The site only enqueues mail; `manage.py send_queued_mail` delivers it through EMAIL_DELIVERY_BACKEND.
+EMAIL_DELIVERY_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_QUEUE_ENABLED = os.getenv('EMAIL_QUEUE_ENABLED', 'True').lower() == 'true'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend' if EMAIL_QUEUE_ENABLED else EMAIL_DELIVERY_BACKEND
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False').lower() == 'true'
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '10'))
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+EMAIL_QUEUE_BATCH_SIZE = int(os.getenv('EMAIL_QUEUE_BATCH_SIZE', '50'))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', '6'))
+EMAIL_QUEUE_RETRY_BASE_SECONDS = float(os.getenv('EMAIL_QUEUE_RETRY_BASE_SECONDS', '30'))
+EMAIL_QUEUE_RETENTION_DAYS = int(os.getenv('EMAIL_QUEUE_RETENTION_DAYS', '7'))
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Uploads stream through core.uploads to a temporary file; nothing is held in memory.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.PosterUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POSTER_UPLOAD_MAX_BYTES = int(os.getenv('POSTER_UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+POSTER_UPLOAD_USER_QUOTA_BYTES = int(os.getenv('POSTER_UPLOAD_USER_QUOTA_BYTES', str(200 * 1024 * 1024)))
+POSTER_MAX_DIMENSION = int(os.getenv('POSTER_MAX_DIMENSION', '6000'))
+POSTER_MIRROR_DIR = 'posters/mirror/'
+POSTER_MIRROR_CACHE_BYTES = int(os.getenv('POSTER_MIRROR_CACHE_BYTES', str(1024 * 1024 * 1024)))
+POSTER_MIRROR_CONCURRENCY = int(os.getenv('POSTER_MIRROR_CONCURRENCY', '16'))
+POSTER_MIRROR_TIMEOUT = float(os.getenv('POSTER_MIRROR_TIMEOUT', '10'))
+# Only for tests against a local stand-in server; mirroring fetches user-supplied URLs.
+POSTER_MIRROR_ALLOW_PRIVATE_HOSTS = os.getenv('POSTER_MIRROR_ALLOW_PRIVATE_HOSTS', 'False').lower() == 'true'
+BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', '500'))
+
+# Sent as X-Health-Token to get timings, errors and load from /healthz and /readyz (core/health.py);
+# without it, or while empty, probes only say ok or failed.
+HEALTH_DETAIL_TOKEN = os.getenv('HEALTH_DETAIL_TOKEN', '')
+
+# Load shedding (core/admission.py): per-worker thresholds and what to do past them.
+# LOAD_SHED_MAX_IN_FLIGHT and the vote limits count concurrent requests in one process: they
+# need GUNICORN_THREADS > 1 or ASGI, as a sync gunicorn worker never has more than one.
+LOAD_SHED_ENABLED = _env_bool('LOAD_SHED_ENABLED', True)
+LOAD_SHED_DB_LATENCY_MS = float(os.getenv('LOAD_SHED_DB_LATENCY_MS', '250'))
+LOAD_SHED_LATENCY_ALPHA = float(os.getenv('LOAD_SHED_LATENCY_ALPHA', '0.2'))
+LOAD_SHED_RECOVERY_SECONDS = float(os.getenv('LOAD_SHED_RECOVERY_SECONDS', '5'))
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHED_MAX_IN_FLIGHT', '32'))
+LOAD_SHED_STALE_SECONDS = int(os.getenv('LOAD_SHED_STALE_SECONDS', '600'))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', '10'))
+LOAD_SHED_VOTE_CONCURRENCY = int(os.getenv('LOAD_SHED_VOTE_CONCURRENCY', '4'))
+LOAD_SHED_VOTE_QUEUE = int(os.getenv('LOAD_SHED_VOTE_QUEUE', '16'))
+# Conditional GETs of the signed-in pages (core/content_version.py); a deploy changes every ETag.
+CONTENT_ETAG_SALT = os.getenv('RENDER_GIT_COMMIT', '')
+# Used when the optional brotli package is installed (core/compression.py).
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+# Live vote events over SSE (core/live.py); NOTIFY fans votes out across processes on PostgreSQL.
+LIVE_VOTES_NOTIFY = _env_bool('LIVE_VOTES_NOTIFY', True)
+LIVE_VOTES_FLUSH_MS = int(os.getenv('LIVE_VOTES_FLUSH_MS', '250'))
+LIVE_VOTES_CLIENT_BUFFER = int(os.getenv('LIVE_VOTES_CLIENT_BUFFER', '32'))
+LIVE_VOTES_HEARTBEAT_SECONDS = float(os.getenv('LIVE_VOTES_HEARTBEAT_SECONDS', '15'))
+# Request profiling (core/profiling.py): staff opt in per request, or 1-in-N sampling (0 = off).
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', BASE_DIR / 'var' / 'profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+PROFILE_USER_BUCKETS = int(os.getenv('PROFILE_USER_BUCKETS', '64'))
+RECOMMENDATION_MODEL_DIR = Path(os.getenv('RECOMMENDATION_MODEL_DIR', BASE_DIR / 'var' / 'recommendations'))
+RATING_PRIOR_WEIGHT = float(os.getenv('RATING_PRIOR_WEIGHT', '10'))
+RATING_PRIOR_MEAN = float(os.getenv('RATING_PRIOR_MEAN', '50'))
+VOTE_ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv('VOTE_ROLLUP_HOURLY_RETENTION_DAYS', '7'))
+VOTE_ROLLUP_DAILY_RETENTION_DAYS = int(os.getenv('VOTE_ROLLUP_DAILY_RETENTION_DAYS', '0'))
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+TRENDING_MIN_HEAT = float(os.getenv('TRENDING_MIN_HEAT', '0.05'))
+# Admin changelists count exactly only when the planner estimates fewer rows than this.
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
 
 # --- Render / HTTPS fix ---
 if ON_RENDER:
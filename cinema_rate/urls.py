@@ -5,6 +5,8 @@ from django.contrib import admin
 from django.urls import include, path, re_path
 from django.views.static import serve
 
+from core.views import poster_blob_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('core.urls')),
@@ -13,5 +15,6 @@ urlpatterns = [
 if os.getenv('RENDER', '').lower() == 'true' or os.getenv('SERVE_STATIC_FILES', '').lower() in {'1', 'true', 'yes', 'on'}:
     urlpatterns += [
         re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATICFILES_DIRS[0]}),
+        re_path(r'^media/(?P<path>posters/blobs/.*)$', poster_blob_view),
         re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
     ]
\ No newline at end of file
@@ -1,6 +1,113 @@
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import Actor, ActorVote, Country, Movie, MovieVote, OutboundEmail, VoteEvent
+
+KEYSET_VAR = 'after'
+
+
+def estimate_count(queryset) -> int | None:
+    """Planner row estimate for ``queryset`` on PostgreSQL, or None where none is available."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been vacuumed or analyzed.
+        return row[0] if row and row[0] >= 0 else None
+    return plan_rows(queryset.order_by().explain(format='json'))
+
+
+def plan_rows(explain_output: str) -> int | None:
+    """Top-level row estimate from ``EXPLAIN (FORMAT JSON)`` output, or None if it can't be read."""
+    try:
+        plan = json.loads(explain_output)
+        # Depending on the driver the JSON is the plan list or its single plan object.
+        plan = plan[0] if isinstance(plan, list) else plan
+        return int(plan['Plan']['Plan Rows'])
+    except (ValueError, TypeError, KeyError, IndexError):
+        return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use planner statistics instead of COUNT(*) once a changelist is too large to count exactly."""
+
+    is_estimate = False
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        self.is_estimate = True
+        return estimate
+
+
+class KeysetChangeList(ChangeList):
+    """Page through ``-pk`` ordered results with ``?after=<pk>`` instead of OFFSET."""
+
+    def __init__(self, request, *args, **kwargs):
+        self.keyset_after = None
+        if KEYSET_VAR in request.GET:
+            params = request.GET.copy()
+            self.keyset_after = params.pop(KEYSET_VAR)[-1]
+            # Keep the cursor out of the filter lookups and out of every link the changelist builds.
+            request.GET = params
+        self.keyset_enabled = ORDER_VAR not in request.GET
+        self.keyset_next_url = None
+        self.keyset_first_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_results(self, request):
+        super().get_results(request)
+        if not self.keyset_enabled or (self.show_all and self.can_show_all):
+            return
+        queryset = self.queryset
+        if self.keyset_after is not None:
+            try:
+                after = self.lookup_opts.pk.to_python(self.keyset_after)
+            except ValidationError as exc:
+                raise IncorrectLookupParameters(exc)
+            queryset = queryset.filter(pk__lt=after)
+            self.keyset_first_url = self.get_query_string(remove=[PAGE_VAR])
+        self.result_list = queryset[:self.list_per_page]
+        if len(self.result_list) == self.list_per_page:
+            last = self.result_list[self.list_per_page - 1]
+            self.keyset_next_url = self.get_query_string({KEYSET_VAR: last.pk}, [PAGE_VAR])
 
-from .models import Actor, ActorVote, Country, Movie, MovieVote
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that are too large to count or page through with OFFSET."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    ordering = ('-pk',)
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Match the whole term as one prefix rather than word by word, so every search stays on the prefix index.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        query = Q()
+        for field in self.get_search_fields(request):
+            query |= Q(**{f'{field.lstrip("^")}__istartswith': search_term})
+        return queryset.filter(query), False
 
 
 @admin.register(Country)
@@ -9,18 +116,59 @@ class CountryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Movie)
-class MovieAdmin(admin.ModelAdmin):
+class MovieAdmin(LargeTableAdmin):
     list_display = ('title', 'country', 'vote_count')
     list_filter = ('country',)
-    search_fields = ('title',)
+    list_select_related = ('country',)
+    autocomplete_fields = ('country',)
+    # Prefix search is served by the UPPER(title) pattern index from migration 0015.
+    search_fields = ('^title',)
 
 
 @admin.register(Actor)
-class ActorAdmin(admin.ModelAdmin):
+class ActorAdmin(LargeTableAdmin):
     list_display = ('name', 'country', 'vote_count')
     list_filter = ('country',)
-    search_fields = ('name',)
+    list_select_related = ('country',)
+    autocomplete_fields = ('country',)
+    search_fields = ('^name',)
+
+
+class ReadOnlyAdmin(LargeTableAdmin):
+    # Votes and their log change only through core.voting and core.batch, which keep the
+    # counters and the append-only VoteEvent log in step; an admin edit would bypass both.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MovieVote)
+class MovieVoteAdmin(ReadOnlyAdmin):
+    list_display = ('user', 'movie', 'created_at')
+    list_select_related = ('user', 'movie')
+    raw_id_fields = ('user', 'movie')
+
+
+@admin.register(ActorVote)
+class ActorVoteAdmin(ReadOnlyAdmin):
+    list_display = ('user', 'actor', 'created_at')
+    list_select_related = ('user', 'actor')
+    raw_id_fields = ('user', 'actor')
+
+
+@admin.register(VoteEvent)
+class VoteEventAdmin(ReadOnlyAdmin):
+    list_display = ('kind', 'target_id', 'user_id', 'created_at')
+    list_filter = ('kind',)
 
 
-admin.site.register(MovieVote)
-admin.site.register(ActorVote)
\ No newline at end of file
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(LargeTableAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('sent_at', 'last_error')
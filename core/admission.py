@@ -0,0 +1,215 @@
+"""Adaptive load shedding for when the database slows down.
+
+``QueryLatencyMiddleware`` runs every request with an execute wrapper on each
+database alias, replicas included, that feeds query durations into a
+per-process exponentially weighted moving average, and counts the requests in
+flight in this worker; it sits before the session and auth middleware so their
+lookups count too. When either passes its threshold the worker is overloaded
+and ``AdmissionControlMiddleware``, last in the stack so expired sessions are
+already logged out, sheds work by priority:
+
+* ``GET /home/`` is answered from the last good render for that user (cached
+  after every healthy render, dropped after the user writes), marked with
+  ``X-Load-Shed: stale``; without a cached copy it renders normally;
+* uploads (multipart POSTs) and batch edits get ``503`` with ``Retry-After``;
+* votes are admitted ``LOAD_SHED_VOTE_CONCURRENCY`` at a time, with at most
+  ``LOAD_SHED_VOTE_QUEUE`` more waiting; beyond that they get ``503`` too;
+* everything else runs normally and keeps the latency estimate fresh.
+
+The estimate decays towards zero while no queries are observed, so a worker that
+sheds all its database work still notices when it may recover.
+
+The in-flight count and the vote limits are per process, so they only matter
+where a process serves requests concurrently: threaded gunicorn workers
+(``GUNICORN_THREADS``) or ASGI. A sync worker has one request in flight and
+sheds on query latency alone.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+STALE_HEADER = 'X-Load-Shed'
+HOME_URL_NAME = 'home'
+VOTE_URL_NAMES = {'vote_movie', 'vote_actor'}
+LOW_PRIORITY_URL_NAMES = {'batch'}
+
+
+class LatencyTracker:
+    """Exponentially weighted moving average of query latency, decaying while idle."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._average_ms = 0.0
+        self._updated_at = time.monotonic()
+
+    def _decayed(self, now: float) -> float:
+        half_life = settings.LOAD_SHED_RECOVERY_SECONDS
+        return self._average_ms * math.pow(0.5, (now - self._updated_at) / half_life)
+
+    def observe(self, elapsed_ms: float) -> None:
+        alpha = settings.LOAD_SHED_LATENCY_ALPHA
+        with self._lock:
+            now = time.monotonic()
+            self._average_ms = alpha * elapsed_ms + (1 - alpha) * self._decayed(now)
+            self._updated_at = now
+
+    @property
+    def average_ms(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._average_ms = 0.0
+            self._updated_at = time.monotonic()
+
+
+class BoundedAdmission:
+    """At most ``limit`` holders at once and at most ``queue`` callers waiting for a slot."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+    def acquire(self, limit: int, queue: int, timeout: float) -> bool:
+        with self._condition:
+            if self._active >= limit and self._waiting >= queue:
+                return False
+            self._waiting += 1
+            try:
+                admitted = self._condition.wait_for(lambda: self._active < limit, timeout)
+            finally:
+                self._waiting -= 1
+            if admitted:
+                self._active += 1
+            return admitted
+
+    def release(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+
+latency = LatencyTracker()
+votes = BoundedAdmission()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def in_flight() -> int:
+    return _in_flight
+
+
+def overloaded() -> bool:
+    return (
+        latency.average_ms > settings.LOAD_SHED_DB_LATENCY_MS
+        or _in_flight > settings.LOAD_SHED_MAX_IN_FLIGHT
+    )
+
+
+def _observe_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        latency.observe((time.perf_counter() - started) * 1000)
+
+
+def _stale_key(user_id: int) -> str:
+    return f'load-shed:home:{user_id}'
+
+
+def _unavailable() -> HttpResponse:
+    response = HttpResponse('The site is busy. Please try again shortly.', status=503, content_type='text/plain')
+    response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+    return response
+
+
+class QueryLatencyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        global _in_flight
+        if not settings.LOAD_SHED_ENABLED:
+            return self.get_response(request)
+        with _in_flight_lock:
+            _in_flight += 1
+        # Every alias, as the router may send the request's reads to a replica. Outermost wrapper,
+        # so time spent in any other execute wrapper counts as query latency too.
+        observed = connections.all(initialized_only=False)
+        for alias_connection in observed:
+            alias_connection.execute_wrappers.insert(0, _observe_query)
+        try:
+            return self.get_response(request)
+        finally:
+            for alias_connection in observed:
+                alias_connection.execute_wrappers.remove(_observe_query)
+            with _in_flight_lock:
+                _in_flight -= 1
+
+
+class AdmissionControlMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.LOAD_SHED_ENABLED:
+            return self.get_response(request)
+        return self._admit(request)
+
+    def _admit(self, request):
+        try:
+            url_name = resolve(request.path_info).url_name
+        except Resolver404:
+            return self.get_response(request)
+        user_id = request.user.pk if request.user.is_authenticated else None
+
+        if url_name == HOME_URL_NAME and request.method == 'GET' and user_id and not request.GET:
+            return self._home(request, user_id)
+        if request.method == 'POST' and user_id:
+            # The stale copy must not hide the user's own change once the database recovers.
+            cache.delete(_stale_key(user_id))
+        if not overloaded():
+            return self.get_response(request)
+        if url_name in VOTE_URL_NAMES:
+            if not votes.acquire(settings.LOAD_SHED_VOTE_CONCURRENCY, settings.LOAD_SHED_VOTE_QUEUE, settings.LOAD_SHED_RETRY_AFTER):
+                return _unavailable()
+            try:
+                return self.get_response(request)
+            finally:
+                votes.release()
+        if url_name in LOW_PRIORITY_URL_NAMES or request.content_type == 'multipart/form-data':
+            return _unavailable()
+        return self.get_response(request)
+
+    def _home(self, request, user_id: int):
+        if overloaded():
+            stale = cache.get(_stale_key(user_id))
+            if stale is not None:
+                content, content_type, rendered_at = stale
+                response = HttpResponse(content, content_type=content_type)
+                response[STALE_HEADER] = 'stale'
+                response['Age'] = str(max(0, int(time.time() - rendered_at)))
+                response['Cache-Control'] = 'private, no-cache'
+                return response
+        response = self.get_response(request)
+        messages = getattr(request, '_messages', None)
+        # A render that displayed flash messages would replay them, so it is not kept.
+        if response.status_code == 200 and not response.streaming and not (messages is not None and messages.used):
+            cache.set(
+                _stale_key(user_id),
+                (response.content, response['Content-Type'], time.time()),
+                settings.LOAD_SHED_STALE_SECONDS,
+            )
+        return response
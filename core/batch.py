@@ -0,0 +1,245 @@
+"""Batched personal list edits and votes.
+
+``apply_batch`` runs a list of operations for one user inside a single
+transaction, grouped by kind so each group costs a fixed number of statements:
+new entries go in with one ``bulk_create`` per list, deletes are one DELETE per
+list with poster files released after commit, and votes are one multi-row
+insert per kind with ``ignore_conflicts``. The plain DELETE is only used while
+the list summary is the sole table referencing the entries; should another
+foreign key appear, deletes go through ``QuerySet.delete()`` so it cascades.
+Because these paths skip the model signals, the same bookkeeping is applied
+explicitly and set-based: rating deltas, stale recommendations, the list
+summary, the content version, vote counters, trending scores, hourly rollups
+and live vote events.
+
+Operations are dicts with an ``op`` key:
+
+* ``add_movie`` / ``add_actor`` with the fields of the home page forms;
+* ``delete_movie`` / ``delete_actor`` / ``vote_movie`` / ``vote_actor`` with an ``id``.
+
+Every operation gets a result with its ``status`` (``created``, ``deleted``,
+``voted``, ``already_voted``, ``not_found`` or ``invalid``).
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .content_version import bump_content_version
+from .live import publish_votes
+from .forms import PersonalActorForm, PersonalMovieForm
+from .models import Actor, ActorVote, Country, Movie, MovieRecommendation, MovieVote, PersonalActor, PersonalMovie, UserListSummary
+from .ratings import apply_rating_deltas, collect_rating_deltas
+from .rollups import hour_start, record_votes
+from .summaries import refresh_summaries
+from .title_matching import link_personal_movie
+from .trending import score_after_votes
+from .vote_log import log_votes
+
+ADD_FORMS = {'add_movie': PersonalMovieForm, 'add_actor': PersonalActorForm}
+DELETE_MODELS = {'delete_movie': PersonalMovie, 'delete_actor': PersonalActor}
+# op -> (vote model, target model, target field, rollup kind)
+VOTES = {
+    'vote_movie': (MovieVote, Movie, 'movie_id', 'movie'),
+    'vote_actor': (ActorVote, Actor, 'actor_id', 'actor'),
+}
+OPERATIONS = {*ADD_FORMS, *DELETE_MODELS, *VOTES}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _invalid(field: str, message: str) -> dict:
+    # Same shape as form.errors.get_json_data() for the add operations.
+    return {'status': 'invalid', 'errors': {field: [{'message': message, 'code': 'invalid'}]}}
+
+
+def _target_id(operation: dict) -> int | None:
+    try:
+        return int(operation['id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _known_countries(operations) -> dict[str, Country]:
+    names = {
+        str(operation.get('country') or 'Unknown').strip().lower() or 'unknown'
+        for operation in operations
+        if isinstance(operation, dict) and operation.get('op') in ADD_FORMS
+    }
+    if not names:
+        return {}
+    return {country.lower_name: country for country in Country.objects.annotate(lower_name=Lower('name')).filter(lower_name__in=names)}
+
+
+def _add_entries(user, items, countries, results) -> tuple[bool, bool]:
+    """Validate and bulk insert new entries; returns whether any entry and any movie was added."""
+    pending = defaultdict(list)
+    for index, operation in items:
+        form_class = ADD_FORMS[operation['op']]
+        data = {key: value for key, value in operation.items() if key != 'op' and value is not None}
+        form = form_class(data, countries=countries)
+        if not form.is_valid():
+            results[index] = {'status': 'invalid', 'errors': form.errors.get_json_data()}
+            continue
+        entry = form.save(commit=False)
+        entry.user = user
+        if isinstance(entry, PersonalMovie):
+            link_personal_movie(entry)
+        pending[type(entry)].append((index, entry))
+
+    for model, entries in pending.items():
+        created = model.objects.bulk_create([entry for _, entry in entries])
+        for (index, _), entry in zip(entries, created):
+            results[index] = {'status': 'created', 'id': entry.pk}
+        if model is PersonalMovie:
+            apply_rating_deltas(collect_rating_deltas((None, None, entry.movie_id, entry.score) for entry in created))
+    return bool(pending), PersonalMovie in pending
+
+
+def _unhandled_relations(model) -> list:
+    """Foreign keys pointing at ``model`` other than the summary's top entries, which the plain DELETE clears itself."""
+    return [
+        relation for relation in model._meta.related_objects
+        if not (relation.related_model is UserListSummary and relation.field.name in ('top_movie', 'top_actor'))
+    ]
+
+
+def _plain_delete(model, ids) -> None:
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(ids))})', list(ids))
+
+
+def _delete_entries(user, items, results) -> tuple[bool, bool]:
+    by_model = defaultdict(dict)
+    for index, operation in items:
+        target_id = _target_id(operation)
+        if target_id is None:
+            results[index] = _invalid('id', 'A numeric id is required.')
+            continue
+        by_model[DELETE_MODELS[operation['op']]].setdefault(target_id, []).append(index)
+
+    changed = movies_changed = False
+    for model, indexes_by_id in by_model.items():
+        fields = ['id', 'poster_image', 'score'] + (['movie_id'] if model is PersonalMovie else [])
+        rows = {row['id']: row for row in model.objects.filter(user=user, id__in=indexes_by_id).values(*fields)}
+        for target_id, indexes in indexes_by_id.items():
+            for index in indexes:
+                results[index] = {'status': 'deleted' if target_id in rows else 'not_found', 'id': target_id}
+        if not rows:
+            continue
+        if _unhandled_relations(model):
+            # Something else now points at these rows: let the collector cascade, at the cost of
+            # the per-row signals, which then apply the rating deltas and release the posters.
+            model.objects.filter(id__in=rows).delete()
+        else:
+            # The summary points at its top entries; drop those references before the rows go.
+            top_field = 'top_movie_id' if model is PersonalMovie else 'top_actor_id'
+            UserListSummary.objects.filter(user=user, **{f'{top_field}__in': rows}).update(**{top_field: None})
+            # A plain DELETE: the delete signals would redo the bookkeeping below one row at a time.
+            _plain_delete(model, rows)
+            if model is PersonalMovie:
+                apply_rating_deltas(collect_rating_deltas((row['movie_id'], row['score'], None, None) for row in rows.values()))
+            storage = model._meta.get_field('poster_image').storage
+            names = [row['poster_image'] for row in rows.values() if row['poster_image']]
+            if names:
+                transaction.on_commit(lambda storage=storage, names=names: [storage.release(name) for name in names])
+        changed = True
+        movies_changed = movies_changed or model is PersonalMovie
+    return changed, movies_changed
+
+
+def _cast_votes(user, items, results) -> None:
+    by_op = defaultdict(dict)
+    for index, operation in items:
+        target_id = _target_id(operation)
+        if target_id is None:
+            results[index] = _invalid('id', 'A numeric id is required.')
+            continue
+        by_op[operation['op']].setdefault(target_id, []).append(index)
+
+    now = timezone.now()
+    for op, indexes_by_id in by_op.items():
+        vote_model, target_model, field, kind = VOTES[op]
+        existing_targets = set(target_model.objects.filter(id__in=indexes_by_id).values_list('id', flat=True))
+        already = set(
+            vote_model.objects.filter(user=user, **{f'{field}__in': existing_targets}).values_list(field, flat=True)
+        )
+        votes = [vote_model(user=user, **{field: target_id}) for target_id in existing_targets - already]
+        vote_model.objects.bulk_create(votes, ignore_conflicts=True)
+        # ignore_conflicts drops the rows a concurrent request inserted first without saying which, so
+        # read back the rows carrying this insert's created_at and apply the bookkeeping to those only.
+        stamped = {getattr(vote, field): vote.created_at for vote in votes}
+        created = {
+            target_id
+            for target_id, created_at in vote_model.objects.filter(user=user, **{f'{field}__in': stamped}).values_list(field, 'created_at')
+            if stamped[target_id] == created_at
+        } if stamped else set()
+        for target_id, indexes in indexes_by_id.items():
+            status = 'voted' if target_id in created else 'already_voted' if target_id in existing_targets else 'not_found'
+            # Repeats of the same target within the batch count once.
+            for position, index in enumerate(indexes):
+                results[index] = {'status': status if position == 0 else 'already_voted', 'id': target_id}
+        if created:
+            target_model.objects.filter(id__in=created).update(
+                vote_count=F('vote_count') + 1,
+                trending_score=score_after_votes(now),
+            )
+            # Log and bucket each vote at the created_at stored on its row.
+            log_votes(kind, {target_id: stamped[target_id] for target_id in created}, user.pk)
+            by_hour = defaultdict(list)
+            for target_id in created:
+                by_hour[hour_start(stamped[target_id])].append(target_id)
+            for bucket_start, target_ids in by_hour.items():
+                record_votes(kind, target_ids, bucket_start)
+            publish_votes(kind, created)
+
+
+def apply_batch(user, operations: list, max_operations: int) -> list[dict]:
+    if not isinstance(operations, list):
+        raise BatchError('"operations" must be a list.')
+    if len(operations) > max_operations:
+        raise BatchError(f'At most {max_operations} operations are accepted per batch.')
+
+    results: list[dict | None] = [None] * len(operations)
+    groups = defaultdict(list)
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in OPERATIONS:
+            results[index] = _invalid('op', f'Unknown operation {op!r}.')
+            continue
+        group = 'add' if op in ADD_FORMS else 'delete' if op in DELETE_MODELS else 'vote'
+        groups[group].append((index, operation))
+
+    with transaction.atomic():
+        added, movies_added = _add_entries(user, groups['add'], _known_countries(operations), results) if groups['add'] else (False, False)
+        deleted, movies_deleted = _delete_entries(user, groups['delete'], results) if groups['delete'] else (False, False)
+        if groups['vote']:
+            _cast_votes(user, groups['vote'], results)
+        if movies_added or movies_deleted:
+            MovieRecommendation.objects.bulk_create(
+                [MovieRecommendation(user=user, is_stale=True, marked_stale_at=timezone.now())],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['is_stale', 'marked_stale_at'],
+            )
+        if added or deleted:
+            refresh_summaries([user.pk])
+        if any(result and result['status'] in ('created', 'deleted', 'voted') for result in results):
+            bump_content_version([user.pk])
+
+    for index, operation in enumerate(operations):
+        results[index] = {'index': index, 'op': operation.get('op') if isinstance(operation, dict) else None, **results[index]}
+    return results
+
+
+def summarize_results(results: list[dict]) -> dict[str, int]:
+    return dict(Counter(result['status'] for result in results))
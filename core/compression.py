@@ -0,0 +1,58 @@
+"""Response compression with brotli when the client and the server support it.
+
+Extends Django's ``GZipMiddleware``: text responses (HTML, JSON, CSS, JS,
+plain text) go out brotli-compressed to clients that accept ``br`` when the
+optional ``brotli`` package is installed, and gzip-compressed otherwise.
+Images, other already compressed types and event streams are left alone. Like
+gzip, a strong ETag is weakened, since the bytes on the wire depend on the
+encoding.
+
+BREACH: pages reflecting secrets are compressed too. The CSRF token is masked
+with a fresh random value on every response, the gzip output carries Django's
+random padding, and session keys never appear in response bodies.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def _compressible(response) -> bool:
+    content_type = response.get('Content-Type', '')
+    # Compressing an event stream would hold events back until a compressor block fills.
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith('text/event-stream')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if not _compressible(response):
+            return response
+        if brotli is None or response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,68 @@
+"""Per-user content versions for conditional GETs of the signed-in pages.
+
+``ContentVersion.version`` is bumped by everything that changes what a user's
+home or profile page shows: personal entries, votes, profile edits, mirrored or
+moved posters and repaired summaries. ``page_etag`` hashes it with the other
+inputs of those pages (newest recommendations, the country list, the request
+path, the session and CSRF cookies and the deployed commit) in a single query,
+so ``django.views.decorators.http.condition`` can answer ``If-None-Match`` with
+``304`` before the view runs any of its own queries.
+
+Rows are created lazily by the first ``page_etag`` call, which then returns no
+ETag; from then on bumps only need an UPDATE, which is safe while the user row
+itself is being deleted.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, OuterRef, Subquery
+
+from .models import ContentVersion, Country, MovieRecommendation
+
+
+def bump_content_version(user_ids) -> None:
+    """``user_ids`` may be a list or a ``values('user_id')`` queryset."""
+    ContentVersion.objects.filter(user_id__in=user_ids).update(version=F('version') + 1)
+
+
+def page_etag(request, *args, **kwargs) -> str | None:
+    if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+        return None
+    # Flash messages are shown once; a 304 would keep them from ever being displayed.
+    if len(messages.get_messages(request)):
+        return None
+    row = (
+        get_user_model().objects.filter(pk=request.user.pk)
+        .annotate(
+            content=Subquery(ContentVersion.objects.filter(user=OuterRef('pk')).values('version')[:1]),
+            recommended=Subquery(MovieRecommendation.objects.filter(user=OuterRef('pk')).values('computed_at')[:1]),
+            countries=Subquery(Country.objects.order_by('-pk').values('pk')[:1]),
+        )
+        .values_list('content', 'recommended', 'countries')
+        .first()
+    )
+    if row is None:
+        return None
+    content, recommended, countries = row
+    if content is None:
+        # Straight to the primary rather than through the router: the row is bookkeeping, and a routed
+        # write would pin the rest of this page view's reads to the primary (core/db_router.py).
+        ContentVersion.objects.using(DEFAULT_DB_ALIAS).bulk_create([ContentVersion(user_id=request.user.pk)], ignore_conflicts=True)
+        return None
+    parts = [
+        settings.CONTENT_ETAG_SALT,
+        request.get_full_path(),
+        str(request.user.pk),
+        str(content),
+        recommended.isoformat() if recommended else '',
+        str(countries),
+        # The page embeds a CSRF token and reflects the session, so a new login must not match an old copy.
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.session.session_key or '',
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()[:32]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from django.db.models import Q
+
 COUNTRY_DATA = [
     ('AF', 'Afghanistan'), ('AL', 'Albania'), ('DZ', 'Algeria'), ('AD', 'Andorra'), ('AO', 'Angola'),
     ('AG', 'Antigua and Barbuda'), ('AR', 'Argentina'), ('AM', 'Armenia'), ('AU', 'Australia'), ('AT', 'Austria'),
@@ -49,4 +51,51 @@ def iso_to_flag(iso_code: str) -> str:
     code = (iso_code or '').upper()
     if len(code) != 2 or not code.isalpha():
         return '🏳️'
-    return ''.join(chr(127397 + ord(char)) for char in code)
\ No newline at end of file
+    return ''.join(chr(127397 + ord(char)) for char in code)
+
+
+def seed_country_names(country_model, names) -> None:
+    """Insert any missing names in one statement; for schemas that predate ``iso_code``."""
+    country_model.objects.bulk_create(
+        [country_model(name=name) for name in names],
+        ignore_conflicts=True,
+    )
+
+
+def sync_countries(country_model, data=COUNTRY_DATA) -> dict[str, int]:
+    """Bring the country table in line with ``(iso_code, name)`` pairs using set-based writes.
+
+    Existing rows are matched by name first, then by ISO code, and corrected in a
+    single bulk UPDATE; the rest are upserted on ``iso_code`` in a single INSERT.
+    Safe to run repeatedly, from migrations (pass the historical model) or from
+    ``manage.py sync_countries``.
+    """
+    names = [name for _, name in data]
+    iso_codes = [iso_code for iso_code, _ in data]
+    existing = list(country_model.objects.filter(Q(name__in=names) | Q(iso_code__in=iso_codes)).only('id', 'name', 'iso_code'))
+    by_name = {country.name: country for country in existing}
+    by_iso = {country.iso_code: country for country in existing if country.iso_code}
+
+    to_update, to_create = [], []
+    for iso_code, name in data:
+        country = by_name.get(name) or by_iso.get(iso_code)
+        if country is None:
+            to_create.append(country_model(name=name, iso_code=iso_code))
+        elif (country.name, country.iso_code) != (name, iso_code):
+            country.name, country.iso_code = name, iso_code
+            to_update.append(country)
+
+    if to_update:
+        country_model.objects.bulk_update(to_update, ['name', 'iso_code'])
+    if to_create:
+        country_model.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=['iso_code'],
+            update_fields=['name'],
+        )
+    return {
+        'created': len(to_create),
+        'updated': len(to_update),
+        'unchanged': len(data) - len(to_create) - len(to_update),
+    }
@@ -0,0 +1,329 @@
+"""Deterministic synthetic data for load tests.
+
+``generate`` writes users, a movie and actor catalog spread over every
+``Country``, personal lists with a skewed (log-normal) size per user and votes
+whose targets follow a Zipf popularity curve, each with its ``VoteEvent``. Work
+is split into batches that each draw from their own generator seeded with
+``(seed, table, batch)``, so the output is the same whatever the number of
+worker processes. Rows go in with ``COPY`` on PostgreSQL and multi-row
+``executemany`` INSERTs elsewhere (not ``bulk_create``, which would overwrite
+the ``auto_now_add`` timestamps); every user gets the same precomputed password
+hash.
+
+Raw inserts skip signals, so ``rebuild_derived`` recomputes what they would have
+maintained from the full vote and list tables: vote buckets and counters,
+trending scores, movie ratings and list summaries.
+"""
+from __future__ import annotations
+
+import math
+import multiprocessing
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import (
+    Actor,
+    ActorVote,
+    ActorVoteBucket,
+    Country,
+    Movie,
+    MovieVote,
+    MovieVoteBucket,
+    PersonalActor,
+    PersonalMovie,
+    VoteBucket,
+    VoteEvent,
+)
+from .rollups import day_start
+
+# Stable numbers for seeding, so adding a table never changes another table's data.
+TABLES = {'users': 1, 'movies': 2, 'actors': 3, 'lists': 4}
+ZIPF_EXPONENT = 1.1
+
+_worker_state: dict = {}
+
+
+@dataclass
+class DatasetSpec:
+    users: int = 10000
+    movies: int = 5000
+    actors: int = 3000
+    movies_per_user: float = 20
+    actors_per_user: float = 10
+    movie_votes_per_user: float = 30
+    actor_votes_per_user: float = 10
+    days: int = 365
+    seed: int = 1
+    prefix: str = 'load'
+    password: str = 'load-test-password'
+    batch_size: int = 2000
+    now: object = field(default_factory=timezone.now)
+
+
+def _rng(spec: DatasetSpec, table: str, batch: int) -> np.random.Generator:
+    return np.random.default_rng([spec.seed, TABLES[table], batch])
+
+
+def _columns(model, generated: list[str]) -> tuple[list[str], tuple]:
+    """Columns to insert: the generated ones, then every other non-pk column at its model default."""
+    names = list(generated)
+    defaults = []
+    for model_field in model._meta.concrete_fields:
+        if model_field.primary_key or model_field.attname in generated:
+            continue
+        names.append(model_field.column)
+        default = timezone.now() if getattr(model_field, 'auto_now', False) else model_field.get_default()
+        defaults.append(model_field.get_db_prep_save(default, connection))
+    return names, tuple(defaults)
+
+
+def write_rows(model, generated: list[str], rows) -> int:
+    """Insert ``rows`` (tuples in ``generated`` column order) into ``model``'s table."""
+    columns, defaults = _columns(model, generated)
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_list = ', '.join(connection.ops.quote_name(column) for column in columns)
+    count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            with cursor.copy(f'COPY {table} ({column_list}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row + defaults)
+                    count += 1
+        else:
+            batch = [row + defaults for row in rows]
+            placeholders = ', '.join(['%s'] * len(columns))
+            cursor.executemany(f'INSERT INTO {table} ({column_list}) VALUES ({placeholders})', batch)
+            count = len(batch)
+    return count
+
+
+def _timestamps(rng: np.random.Generator, spec: DatasetSpec, size: int) -> list:
+    # Squaring a uniform draw puts more activity in the recent past than long ago.
+    ages = (rng.random(size) ** 2) * spec.days * 86400
+    return [connection.ops.adapt_datetimefield_value(spec.now - timedelta(seconds=age)) for age in ages.tolist()]
+
+
+def _scores(rng: np.random.Generator, size: int) -> list[str]:
+    return [f'{score:.2f}' for score in np.clip(rng.normal(65, 18, size), 0, 100).tolist()]
+
+
+def _skewed_counts(rng: np.random.Generator, mean: float, size: int, cap: int) -> np.ndarray:
+    if mean <= 0 or cap <= 0:
+        return np.zeros(size, dtype=np.int64)
+    sigma = 1.0
+    counts = rng.lognormal(math.log(mean) - sigma ** 2 / 2, sigma, size)
+    return np.minimum(np.rint(counts).astype(np.int64), cap)
+
+
+def _zipf_cdf(size: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** ZIPF_EXPONENT
+    return np.cumsum(weights) / weights.sum()
+
+
+def _pick(rng: np.random.Generator, cdf: np.ndarray, owners: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Draw ``counts[i]`` popular targets for each owner; repeats of a pair are dropped."""
+    owner_per_draw = np.repeat(owners, counts)
+    targets = np.minimum(np.searchsorted(cdf, rng.random(owner_per_draw.size)), cdf.size - 1)
+    pairs = np.unique(owner_per_draw * cdf.size + targets)
+    return pairs // cdf.size, pairs % cdf.size
+
+
+def _write_users(spec: DatasetSpec, batch: int, start: int, stop: int) -> int:
+    rng = _rng(spec, 'users', batch)
+    joined = _timestamps(rng, spec, stop - start)
+    rows = (
+        (f'{spec.prefix}{index:09d}', _worker_state['password_hash'], joined[offset], True)
+        for offset, index in enumerate(range(start, stop))
+    )
+    return write_rows(get_user_model(), ['username', 'password', 'date_joined', 'is_active'], rows)
+
+
+def _write_catalog(spec: DatasetSpec, table: str, batch: int, start: int, stop: int) -> int:
+    rng = _rng(spec, table, batch)
+    country_ids = _worker_state['country_ids']
+    countries = country_ids[rng.integers(0, country_ids.size, stop - start)].tolist()
+    model, name_field, label = (Movie, 'title', 'Movie') if table == 'movies' else (Actor, 'name', 'Actor')
+    rows = ((f'{spec.prefix} {label} {index:08d}', countries[offset]) for offset, index in enumerate(range(start, stop)))
+    return write_rows(model, [name_field, 'country_id'], rows)
+
+
+def _write_lists(spec: DatasetSpec, batch: int, start: int, stop: int) -> int:
+    """Personal movies and actors plus votes for users ``start``..``stop``."""
+    rng = _rng(spec, 'lists', batch)
+    state = _worker_state
+    owners = np.arange(start, stop)
+    user_ids = state['user_ids']
+    written = 0
+
+    for model, catalog, per_user in (
+        (PersonalMovie, 'movie', spec.movies_per_user),
+        (PersonalActor, 'actor', spec.actors_per_user),
+    ):
+        ids, cdf, names, countries = state[f'{catalog}_ids'], state[f'{catalog}_cdf'], state[f'{catalog}_names'], state[f'{catalog}_countries']
+        users, targets = _pick(rng, cdf, owners, _skewed_counts(rng, per_user, owners.size, ids.size))
+        created = _timestamps(rng, spec, users.size)
+        scores = _scores(rng, users.size)
+        years = rng.integers(1940, spec.now.year + 1, users.size).tolist()
+        users, targets = user_ids[users].tolist(), targets.tolist()
+        if model is PersonalMovie:
+            generated = ['user_id', 'title', 'country_id', 'production_year', 'score', 'created_at', 'movie_id']
+            rows = (
+                (users[i], names[targets[i]], int(countries[targets[i]]), years[i], scores[i], created[i], int(ids[targets[i]]))
+                for i in range(len(users))
+            )
+        else:
+            generated = ['user_id', 'full_name', 'country_id', 'production_year', 'score', 'created_at']
+            rows = (
+                (users[i], names[targets[i]], int(countries[targets[i]]), years[i], scores[i], created[i])
+                for i in range(len(users))
+            )
+        written += write_rows(model, generated, rows)
+
+    for model, catalog, target_field, per_user in (
+        (MovieVote, 'movie', 'movie_id', spec.movie_votes_per_user),
+        (ActorVote, 'actor', 'actor_id', spec.actor_votes_per_user),
+    ):
+        ids, cdf = state[f'{catalog}_ids'], state[f'{catalog}_cdf']
+        users, targets = _pick(rng, cdf, owners, _skewed_counts(rng, per_user, owners.size, ids.size))
+        created = _timestamps(rng, spec, users.size)
+        rows = list(zip(user_ids[users].tolist(), ids[targets].tolist(), created))
+        written += write_rows(model, ['user_id', target_field, 'created_at'], rows)
+        written += write_rows(VoteEvent, ['kind', 'user_id', 'target_id', 'created_at'], ((catalog, *row) for row in rows))
+    return written
+
+
+def _run_task(task: tuple) -> int:
+    kind, args = task
+    spec = _worker_state['spec']
+    if kind == 'users':
+        return _write_users(spec, *args)
+    if kind == 'lists':
+        return _write_lists(spec, *args)
+    return _write_catalog(spec, kind, *args)
+
+
+def _init_worker(state: dict) -> None:
+    _worker_state.clear()
+    _worker_state.update(state)
+
+
+def _batches(kind: str, total: int, batch_size: int) -> list[tuple]:
+    return [(kind, (batch, start, min(start + batch_size, total))) for batch, start in enumerate(range(0, total, batch_size))]
+
+
+def _run_phase(tasks: list[tuple], state: dict, workers: int) -> int:
+    if workers > 1 and len(tasks) > 1:
+        # Each worker opens its own connection; none may inherit the parent's.
+        connections.close_all()
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        with multiprocessing.get_context(method).Pool(workers, initializer=_init_worker, initargs=(state,)) as pool:
+            return sum(pool.imap_unordered(_run_task, tasks))
+    _init_worker(state)
+    try:
+        return sum(_run_task(task) for task in tasks)
+    finally:
+        _worker_state.clear()
+
+
+def _ordered_ids(queryset, name_field: str) -> np.ndarray:
+    # Names are zero-padded indexes, so name order is generation order whatever the insert order was.
+    return np.fromiter(queryset.order_by(name_field).values_list('id', flat=True).iterator(chunk_size=20000), dtype=np.int64)
+
+
+def _catalog_state(model, name_field: str, prefix: str) -> dict:
+    rows = model.objects.filter(**{f'{name_field}__startswith': f'{prefix} '}).order_by(name_field).values_list('id', name_field, 'country_id')
+    ids, names, countries = [], [], []
+    for row_id, name, country_id in rows.iterator(chunk_size=20000):
+        ids.append(row_id)
+        names.append(name)
+        countries.append(country_id)
+    return {
+        'ids': np.array(ids, dtype=np.int64),
+        'names': names,
+        'countries': np.array(countries, dtype=np.int64),
+        'cdf': _zipf_cdf(len(ids)),
+    }
+
+
+def generate(spec: DatasetSpec, workers: int = 1, report=None) -> dict[str, tuple[int, float]]:
+    """Write the dataset; returns ``{phase: (rows, seconds)}``."""
+    report = report or (lambda phase, rows, seconds: None)
+    country_ids = np.array(list(Country.objects.order_by('id').values_list('id', flat=True)), dtype=np.int64)
+    if not country_ids.size:
+        raise ValueError('No countries found; run "manage.py sync_countries" first.')
+    if get_user_model().objects.filter(username__startswith=spec.prefix).exists():
+        raise ValueError(f'Users named "{spec.prefix}..." already exist; pick another prefix.')
+    if connection.vendor == 'sqlite':
+        # SQLite takes one writer at a time; extra processes would only wait on the lock.
+        workers = 1
+
+    state = {'spec': spec, 'password_hash': make_password(spec.password), 'country_ids': country_ids}
+    stats = {}
+
+    def phase(name: str, tasks: list[tuple]) -> None:
+        started = time.perf_counter()
+        rows = _run_phase(tasks, state, workers)
+        stats[name] = (rows, time.perf_counter() - started)
+        report(name, *stats[name])
+
+    phase('users and catalog', [
+        *_batches('users', spec.users, spec.batch_size),
+        *_batches('movies', spec.movies, spec.batch_size),
+        *_batches('actors', spec.actors, spec.batch_size),
+    ])
+    state['user_ids'] = _ordered_ids(get_user_model().objects.filter(username__startswith=spec.prefix), 'username')
+    for catalog, model, name_field in (('movie', Movie, 'title'), ('actor', Actor, 'name')):
+        state.update({f'{catalog}_{key}': value for key, value in _catalog_state(model, name_field, spec.prefix).items()})
+    # Users per list batch, so a batch holds about ``batch_size`` rows of each kind.
+    per_user = max(spec.movies_per_user, spec.actors_per_user, spec.movie_votes_per_user, spec.actor_votes_per_user, 1)
+    phase('lists and votes', _batches('lists', spec.users, max(1, int(spec.batch_size / per_user))))
+    return stats
+
+
+def rebuild_derived(report=None) -> None:
+    """Recompute what signals and vote handlers would have maintained for raw-inserted rows."""
+    report = report or (lambda phase, rows, seconds: None)
+    for vote_model, target_model, bucket_model, field_name in (
+        (MovieVote, Movie, MovieVoteBucket, 'movie_id'),
+        (ActorVote, Actor, ActorVoteBucket, 'actor_id'),
+    ):
+        started = time.perf_counter()
+        bucket_model.objects.all().delete()
+        # Hourly buckets for the retention window and daily ones before it: the layout compaction leaves behind.
+        cutoff = day_start(timezone.now() - timedelta(days=settings.VOTE_ROLLUP_HOURLY_RETENTION_DAYS))
+        buckets = 0
+        for granularity, trunc, lookup in (
+            (VoteBucket.HOURLY, TruncHour, {'created_at__gte': cutoff}),
+            (VoteBucket.DAILY, TruncDay, {'created_at__lt': cutoff}),
+        ):
+            grouped = (
+                vote_model.objects.filter(**lookup)
+                .annotate(bucket_start=trunc('created_at'))
+                .values(field_name, 'bucket_start')
+                .annotate(votes=Count('id'))
+                .order_by()
+                .values_list(field_name, 'bucket_start', 'votes')
+            )
+            rows = (
+                (target_id, granularity, connection.ops.adapt_datetimefield_value(bucket_start), votes)
+                for target_id, bucket_start, votes in grouped.iterator(chunk_size=20000)
+            )
+            buckets += write_rows(bucket_model, [field_name, 'granularity', 'bucket_start', 'vote_count'], rows)
+        counts = vote_model.objects.filter(**{field_name: OuterRef('pk')}).order_by().values(field_name).annotate(total=Count('id')).values('total')
+        target_model.objects.update(vote_count=Coalesce(Subquery(counts), Value(0)))
+        report(f'{bucket_model._meta.verbose_name} rows', buckets, time.perf_counter() - started)
+    call_command('compact_vote_rollups')
+    call_command('rebuild_trending_scores')
+    call_command('reconcile_movie_ratings')
+    call_command('rebuild_list_summaries')
@@ -1,13 +1,51 @@
+"""Schema checks for pages that must keep working while migrations are pending.
+
+A table or column only ever appears once its migration ran, so positive answers
+are remembered for the life of the process and only missing ones are checked
+against the database again.
+"""
+from __future__ import annotations
+
 from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError, ProgrammingError
 
+_existing_tables: set[str] = set()
+_existing_columns: set[tuple[str, str]] = set()
+_migrations_applied = False
+
+
+def table_exists(table_name: str) -> bool:
+    if table_name in _existing_tables:
+        return True
+    try:
+        tables = connection.introspection.table_names()
+    except (ProgrammingError, OperationalError):
+        return False
+    _existing_tables.update(tables)
+    return table_name in _existing_tables
+
 
 def table_has_column(table_name: str, column_name: str) -> bool:
+    if (table_name, column_name) in _existing_columns:
+        return True
     try:
         with connection.cursor() as cursor:
             description = connection.introspection.get_table_description(cursor, table_name)
     except (ProgrammingError, OperationalError):
         return False
 
-    existing_columns = {col.name for col in description}
-    return column_name in existing_columns
\ No newline at end of file
+    _existing_columns.update((table_name, col.name) for col in description)
+    return (table_name, column_name) in _existing_columns
+
+
+def unapplied_migrations() -> list[str]:
+    """Names of migrations on disk that the database has not applied yet."""
+    global _migrations_applied
+    if _migrations_applied:
+        return []
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    pending = [f'{migration.app_label}.{migration.name}' for migration, _ in plan]
+    _migrations_applied = not pending
+    return pending
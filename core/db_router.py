@@ -0,0 +1,166 @@
+"""Primary/replica routing with read-your-writes pinning.
+
+Writes always go to ``default``. Reads made while serving a request go to a
+randomly chosen replica (``DATABASES`` aliases listed in ``DATABASE_REPLICAS``)
+unless the request is pinned to the primary:
+
+* unsafe methods (POST and friends) read from the primary for the whole request;
+* a request that wrote anything pins the client for ``DATABASE_PIN_SECONDS`` via
+  a cookie, so the redirect after a vote or a new entry sees it;
+* reads inside a transaction on the primary stay on the primary.
+
+Sessions live on the primary only, and session saves (every request here) do
+not count as writes for pinning. Replicas whose measured lag exceeds
+``DATABASE_REPLICA_MAX_LAG_SECONDS`` or that fail the lag probe are skipped
+until the next probe. Outside a request (management commands, workers) every
+read goes to the primary.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.utils import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_pin'
+PRIMARY_ONLY_APPS = {'sessions'}
+# Seconds between lag probes of one replica, per process.
+LAG_PROBE_INTERVAL = 5.0
+
+
+@dataclass
+class RoutingState:
+    pinned: bool = False
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar('db_routing_state', default=None)
+# alias -> (monotonic time of the probe, lag in seconds or None when the probe failed)
+_lag_cache: dict[str, tuple[float, float | None]] = {}
+
+
+def replica_aliases() -> list[str]:
+    return [alias for alias in settings.DATABASE_REPLICAS if alias in settings.DATABASES]
+
+
+def probe_lag(alias: str) -> float:
+    """Seconds the replica is behind the primary; 0 when the backend cannot tell."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        # Replay timestamp is NULL on a primary; an idle primary makes this overestimate, which only costs replica reads.
+        cursor.execute(
+            'SELECT CASE WHEN pg_is_in_recovery() '
+            'THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END'
+        )
+        return float(cursor.fetchone()[0])
+
+
+def record_lag(alias: str, lag: float | None) -> None:
+    _lag_cache[alias] = (time.monotonic(), lag)
+
+
+def replica_lag(alias: str) -> float | None:
+    probed_at, lag = _lag_cache.get(alias, (None, None))
+    if probed_at is None or time.monotonic() - probed_at > LAG_PROBE_INTERVAL:
+        try:
+            lag = probe_lag(alias)
+        except DatabaseError as exc:
+            logger.warning('Replica %s failed its lag probe: %s', alias, exc)
+            lag = None
+        record_lag(alias, lag)
+    return lag
+
+
+def healthy_replicas() -> list[str]:
+    limit = settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+    healthy = []
+    for alias in replica_aliases():
+        lag = replica_lag(alias)
+        if lag is not None and lag <= limit:
+            healthy.append(alias)
+    return healthy
+
+
+@contextmanager
+def routing_state(pinned: bool = False):
+    state = RoutingState(pinned=pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def pin_to_primary():
+    """Read from the primary inside the block, e.g. right before a read-modify-write."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    previous = state.pinned
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = previous
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state.wrote = True
+            state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary, so objects may relate across aliases.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadYourWritesMiddleware:
+    """Route this request's reads and pin the client to the primary after it writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS') or PIN_COOKIE in request.COOKIES
+        with routing_state(pinned=pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.DATABASE_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
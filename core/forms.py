@@ -21,17 +21,20 @@ def _next_available_iso_code() -> str:
     return 'ZZ'
 
 
-def _resolve_or_create_country(raw_value: str) -> Country:
+def _resolve_or_create_country(raw_value: str, known: dict[str, Country] | None = None) -> Country:
     value = raw_value.strip()
     if not value:
         value = 'Unknown'
 
+    if known is not None and value.lower() in known:
+        return known[value.lower()]
     existing = Country.objects.filter(name__iexact=value).first()
-    if existing:
-        return existing
-
-    iso_code = _next_available_iso_code()
-    return Country.objects.create(name=value, iso_code=iso_code)
+    if not existing:
+        iso_code = _next_available_iso_code()
+        existing = Country.objects.create(name=value, iso_code=iso_code)
+    if known is not None:
+        known[value.lower()] = existing
+    return existing
 
 class RegisterForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -103,8 +106,10 @@ class PersonalMovieForm(forms.ModelForm):
             'score': forms.TextInput(attrs={'inputmode': 'decimal', 'placeholder': '0 - 100'}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, countries: dict[str, Country] | None = None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Lower-cased name -> Country, shared across the forms of one batch to skip repeated lookups.
+        self.countries = countries
         for field_name in ['title', 'production_year', 'poster_image', 'score']:
             self.fields[field_name].required = False
 
@@ -119,7 +124,7 @@ class PersonalMovieForm(forms.ModelForm):
 
     def clean_country(self):
         value = self.data.get(self.add_prefix('country'), '')
-        return _resolve_or_create_country(value)
+        return _resolve_or_create_country(value, self.countries)
 
 
 class PersonalActorForm(forms.ModelForm):
@@ -135,8 +140,9 @@ class PersonalActorForm(forms.ModelForm):
             'score': forms.TextInput(attrs={'inputmode': 'decimal', 'placeholder': '0 - 100'}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, countries: dict[str, Country] | None = None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.countries = countries
         for field_name in ['poster_image', 'score']:
             self.fields[field_name].required = False
 
@@ -151,7 +157,7 @@ class PersonalActorForm(forms.ModelForm):
 
     def clean_country(self):
         value = self.data.get(self.add_prefix('country'), '')
-        return _resolve_or_create_country(value)
+        return _resolve_or_create_country(value, self.countries)
 
     def save(self, commit=True):
         actor = super().save(commit=False)
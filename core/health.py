@@ -0,0 +1,119 @@
+"""Liveness and readiness probes answered before any other middleware.
+
+``HealthCheckMiddleware`` sits first in ``MIDDLEWARE``, so probes skip host
+validation, HTTPS redirects, sessions, authentication and load shedding:
+
+* ``/healthz`` does no I/O; a response means the worker is alive.
+* ``/readyz`` checks that the default database answers, that every migration
+  has been applied (remembered once true, see ``core.db_guards``) and that the
+  cache round-trips a value. It answers ``200`` when all pass and ``503``
+  otherwise, with ``ok`` or ``failed`` per check.
+  Load shedding is reported but does not fail readiness: a slow database slows
+  every worker alike, and taking them all out of rotation would turn a slowdown
+  into an outage.
+
+As probes skip the host check, anyone reaching the worker can call them, so the
+public answers carry no detail. Requests sending ``HEALTH_DETAIL_TOKEN`` in the
+``X-Health-Token`` header also get the pid and uptime, per-check timings and
+errors, and the load-shedding state.
+"""
+from __future__ import annotations
+
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from . import admission
+from .db_guards import unapplied_migrations
+
+LIVENESS_PATHS = {'/healthz', '/healthz/'}
+READINESS_PATHS = {'/readyz', '/readyz/'}
+STARTED_AT = time.monotonic()
+
+
+def _timed(check) -> dict:
+    started = time.perf_counter()
+    try:
+        result = check()
+    except Exception as exc:
+        # Whatever the backend raises, the worker is not ready.
+        result = {'ok': False, 'error': f'{type(exc).__name__}: {exc}'}
+    result['ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _check_database() -> dict:
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return {'ok': True}
+
+
+def _check_migrations() -> dict:
+    pending = unapplied_migrations()
+    return {'ok': not pending, 'unapplied': pending}
+
+
+def _check_cache() -> dict:
+    key = f'readyz:{os.getpid()}'
+    value = uuid.uuid4().hex
+    cache.set(key, value, 30)
+    return {'ok': cache.get(key) == value}
+
+
+def _response(payload: dict, status: int = 200) -> JsonResponse:
+    response = JsonResponse(payload, status=status)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _wants_detail(request) -> bool:
+    token = settings.HEALTH_DETAIL_TOKEN
+    return bool(token) and constant_time_compare(request.headers.get('X-Health-Token', ''), token)
+
+
+def _public(payload: dict) -> dict:
+    return {
+        'status': payload['status'],
+        'checks': {name: 'ok' if check['ok'] else 'failed' for name, check in payload['checks'].items()},
+    }
+
+
+def readiness() -> tuple[bool, dict]:
+    checks = {
+        'database': _timed(_check_database),
+        'migrations': _timed(_check_migrations),
+        'cache': _timed(_check_cache),
+    }
+    ready = all(check['ok'] for check in checks.values())
+    return ready, {
+        'status': 'ready' if ready else 'unavailable',
+        'checks': checks,
+        'load': {
+            'overloaded': admission.overloaded(),
+            'db_latency_ms': round(admission.latency.average_ms, 2),
+            'in_flight': admission.in_flight(),
+        },
+    }
+
+
+class HealthCheckMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info
+        if path in LIVENESS_PATHS:
+            if not _wants_detail(request):
+                return _response({'status': 'alive'})
+            return _response({'status': 'alive', 'pid': os.getpid(), 'uptime_seconds': round(time.monotonic() - STARTED_AT, 1)})
+        if path in READINESS_PATHS:
+            ready, payload = readiness()
+            return _response(payload if _wants_detail(request) else _public(payload), 200 if ready else 503)
+        return self.get_response(request)
@@ -0,0 +1,79 @@
+"""Slim read model for rendering the personal lists on the home page.
+
+The lists only show a handful of columns, so instead of full ``PersonalMovie``
+and ``PersonalActor`` instances (every column, a ``FieldFile`` per row and the
+``from_db`` bookkeeping the save signals rely on) ``movie_rows`` and
+``actor_rows`` read just those columns with ``values_list`` and build
+``__slots__`` rows. The poster URL, the country flag and the actor's age are
+worked out once per row while building them; flags once per country. Rows are
+read-only: anything that edits or deletes an entry still loads the model.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from django.conf import settings
+
+from .countries import iso_to_flag
+
+COLUMNS = ('production_year', 'score', 'poster_image', 'poster_mirror', 'poster_url', 'country__name', 'country__iso_code')
+
+
+class ListRow:
+    __slots__ = ('id', 'name', 'production_year', 'score', 'poster_source', 'country_name', 'flag')
+
+    def __init__(self, id, name, production_year, score, poster_source, country_name, flag):
+        self.id = id
+        self.name = name
+        self.production_year = production_year
+        self.score = score
+        self.poster_source = poster_source
+        self.country_name = country_name
+        self.flag = flag
+
+
+class MovieRow(ListRow):
+    __slots__ = ()
+
+    @property
+    def title(self) -> str:
+        return self.name
+
+
+class ActorRow(ListRow):
+    __slots__ = ('age',)
+
+    @property
+    def full_name(self) -> str:
+        return self.name
+
+
+def _rows(row_class, queryset, name_field: str):
+    storage = queryset.model._meta.get_field('poster_image').storage
+    media_url = settings.MEDIA_URL
+    flags: dict[str, str] = {}
+    rows = []
+    for entry_id, name, year, score, image, mirror, url, country_name, iso_code in queryset.values_list('id', name_field, *COLUMNS):
+        if image:
+            url = storage.url(image)
+        elif mirror:
+            url = media_url + mirror
+        flag = flags.get(iso_code)
+        if flag is None:
+            flag = flags[iso_code] = iso_to_flag(iso_code)
+        rows.append(row_class(entry_id, name, year, score, url, country_name, flag))
+    return rows
+
+
+def movie_rows(queryset) -> list[MovieRow]:
+    """Rows for a ``PersonalMovie`` queryset, in its order."""
+    return _rows(MovieRow, queryset, 'title')
+
+
+def actor_rows(queryset) -> list[ActorRow]:
+    """Rows for a ``PersonalActor`` queryset, in its order, with each actor's age."""
+    rows = _rows(ActorRow, queryset, 'full_name')
+    this_year = date.today().year
+    for row in rows:
+        row.age = max(0, this_year - row.production_year)
+    return rows
@@ -0,0 +1,260 @@
+"""Live vote-count deltas pushed to browsers over Server-Sent Events.
+
+Vote paths call ``publish_votes`` once their votes are stored. Deltas reach the
+per-process ``VoteFeed`` either directly after the transaction commits or, with
+``LIVE_VOTES_NOTIFY`` on PostgreSQL, through ``NOTIFY live_votes`` and a
+``LISTEN`` connection in every ASGI process, so votes cast by any worker reach
+every stream. The feed sums deltas per movie and actor and, every
+``LIVE_VOTES_FLUSH_MS``, sends one encoded event to all subscribers.
+
+``with_live_votes`` serves ``LIVE_VOTES_PATH`` in front of Django's ASGI
+handler, which would keep a thread per request for as long as the stream stays
+open. The session cookie is checked once in the shared sync thread; after that
+an idle connection costs two small tasks and a queue on the event loop. A client
+too slow to drain ``LIVE_VOTES_CLIENT_BUFFER`` events is disconnected and
+reconnects through ``EventSource``. Under WSGI the path reaches a Django view
+that answers ``204``, which tells ``EventSource`` to stop, and a process without
+streams drops locally published deltas at once.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user
+from django.db import close_old_connections, connection, transaction
+from django.http.cookie import parse_cookie
+from django.utils.module_loading import import_string
+
+from .middleware import session_expired
+
+logger = logging.getLogger(__name__)
+
+LIVE_VOTES_PATH = '/live/votes/'
+NOTIFY_CHANNEL = 'live_votes'
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+NOTIFY_PAYLOAD_LIMIT = 7900
+KINDS = ('movie', 'actor')
+
+
+def _encode(event: str, data: str) -> bytes:
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+class VoteFeed:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict[int, int]] = {kind: defaultdict(int) for kind in KINDS}
+        self._subscribers: set[asyncio.Queue] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def add(self, kind: str, target_ids, delta: int = 1) -> None:
+        """Queue deltas for the next flush; safe to call from any thread."""
+        if not self._subscribers:
+            return
+        with self._lock:
+            pending = self._pending[kind]
+            for target_id in target_ids:
+                pending[target_id] += delta
+
+    def _take(self) -> dict[str, dict[int, int]]:
+        with self._lock:
+            taken = {kind: dict(deltas) for kind, deltas in self._pending.items() if deltas}
+            for deltas in self._pending.values():
+                deltas.clear()
+        return taken
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.LIVE_VOTES_CLIENT_BUFFER)
+        self._subscribers.add(queue)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._flush_loop()))
+            if notify_enabled():
+                self._tasks.append(asyncio.create_task(self._listen_loop()))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+            self._take()
+
+    def flush(self) -> int:
+        """Send the coalesced deltas to every subscriber; returns the number of targets sent."""
+        deltas = self._take()
+        if not deltas or not self._subscribers:
+            return 0
+        message = _encode('votes', json.dumps(deltas, separators=(',', ':')))
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Missing deltas would leave its counts wrong; drop it so the browser reconnects.
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+        return sum(len(targets) for targets in deltas.values())
+
+    async def _flush_loop(self) -> None:
+        interval = settings.LIVE_VOTES_FLUSH_MS / 1000
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    async def _listen_loop(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(**_conninfo(), autocommit=True) as listener:
+                    await listener.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    async for notify in listener.notifies():
+                        self._add_payload(notify.payload)
+            except (OSError, psycopg.Error):
+                logger.warning('Live vote listener lost its connection; retrying.', exc_info=True)
+                await asyncio.sleep(settings.LIVE_VOTES_FLUSH_MS / 1000 * 10)
+
+    def _add_payload(self, payload: str) -> None:
+        # "<kind>:<id>,<id>;<kind>:<id>"
+        for part in filter(None, payload.split(';')):
+            kind, _, ids = part.partition(':')
+            if kind in self._pending:
+                self.add(kind, [int(target_id) for target_id in ids.split(',') if target_id])
+
+
+feed = VoteFeed()
+
+
+def notify_enabled() -> bool:
+    return settings.LIVE_VOTES_NOTIFY and connection.vendor == 'postgresql'
+
+
+def _conninfo() -> dict:
+    database = settings.DATABASES['default']
+    options = {
+        'dbname': database.get('NAME'),
+        'user': database.get('USER'),
+        'password': database.get('PASSWORD'),
+        'host': database.get('HOST'),
+        'port': database.get('PORT'),
+    }
+    return {key: value for key, value in options.items() if value}
+
+
+def _notify_payloads(kind: str, target_ids: list[int]):
+    chunk = []
+    size = len(kind) + 1
+    for target_id in target_ids:
+        text = str(target_id)
+        if chunk and size + len(text) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            yield f'{kind}:{",".join(chunk)}'
+            chunk, size = [], len(kind) + 1
+        chunk.append(text)
+        size += len(text) + 1
+    if chunk:
+        yield f'{kind}:{",".join(chunk)}'
+
+
+def publish_votes(kind: str, target_ids) -> None:
+    """Announce one new vote for each of ``target_ids`` once the current transaction commits."""
+    target_ids = list(target_ids)
+    if not target_ids:
+        return
+    if notify_enabled():
+        # NOTIFY is transactional: listeners hear it on commit and never after a rollback.
+        with connection.cursor() as cursor:
+            for payload in _notify_payloads(kind, target_ids):
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+        return
+    transaction.on_commit(lambda: feed.add(kind, target_ids))
+
+
+async def vote_events(queue: asyncio.Queue):
+    """SSE body of one connection: a retry hint, vote events and heartbeat comments."""
+    heartbeat = settings.LIVE_VOTES_HEARTBEAT_SECONDS
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b': ping\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        feed.unsubscribe(queue)
+
+
+def _signed_in(session_key: str | None) -> bool:
+    if not session_key:
+        return False
+    # Runs outside Django's request cycle, so reuse or replace the thread's connection the way it would.
+    close_old_connections()
+    session = import_string(f'{settings.SESSION_ENGINE}.SessionStore')(session_key)
+    if SESSION_KEY not in session or session_expired(session):
+        return False
+    return get_user(SimpleNamespace(session=session)).is_authenticated
+
+
+async def _relay(send, queue: asyncio.Queue) -> None:
+    async for chunk in vote_events(queue):
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def _disconnected(receive) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def vote_stream(scope, receive, send) -> None:
+    headers = dict(scope['headers'])
+    session_key = parse_cookie(headers.get(b'cookie', b'').decode('latin-1')).get(settings.SESSION_COOKIE_NAME)
+    if scope['method'] != 'GET' or not await sync_to_async(_signed_in)(session_key):
+        status = 405 if scope['method'] != 'GET' else 401
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-length', b'0')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    queue = feed.subscribe()
+    tasks = [asyncio.create_task(_relay(send, queue)), asyncio.create_task(_disconnected(receive))]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        feed.unsubscribe(queue)
+
+
+def with_live_votes(application):
+    """Wrap an ASGI application so ``LIVE_VOTES_PATH`` streams vote events without going through Django."""
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == LIVE_VOTES_PATH:
+            return await vote_stream(scope, receive, send)
+        return await application(scope, receive, send)
+
+    return app
@@ -0,0 +1,176 @@
+"""Outbound mail queue.
+
+``QueuedEmailBackend`` is the ``EMAIL_BACKEND`` the site sends through: it only
+stores ``OutboundEmail`` rows, so a request never waits on the mail server. The
+``send_queued_mail`` worker claims due rows in batches, delivers them over one
+reused connection of ``EMAIL_DELIVERY_BACKEND`` and reschedules transient
+failures with exponential backoff.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Claimed rows are pushed this far into the future so a crashed worker's batch is retried, not lost.
+CLAIM_LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages) -> int:
+        rows = []
+        for message in email_messages:
+            if message.attachments:
+                # Attachments are not persisted; hand these straight to the delivery backend.
+                get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=self.fail_silently).send_messages([message])
+                continue
+            if not message.recipients():
+                continue
+            rows.append(_to_row(message))
+        if rows:
+            OutboundEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def _to_row(message) -> OutboundEmail:
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype == 'text/html':
+            html_body = content
+    return OutboundEmail(
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        cc=list(message.cc),
+        bcc=list(message.bcc),
+        reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers),
+        subject=message.subject,
+        body=message.body,
+        html_body=html_body,
+    )
+
+
+def to_message(row: OutboundEmail, connection=None) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        row.subject,
+        row.body,
+        row.from_email,
+        row.to,
+        cc=row.cc,
+        bcc=row.bcc,
+        reply_to=row.reply_to,
+        headers=row.headers,
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter after the ``attempts``-th failed delivery."""
+    base = settings.EMAIL_QUEUE_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return min(timedelta(seconds=base * random.uniform(0.5, 1.0)), MAX_BACKOFF)
+
+
+def is_transient(exc: Exception) -> bool:
+    """Mail server and network errors may clear up; anything else would fail the same way again."""
+    return isinstance(exc, (smtplib.SMTPException, OSError))
+
+
+def is_permanent(exc: Exception) -> bool:
+    if not is_transient(exc) or isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(exc, 'smtp_code', None)
+    return code is not None and 500 <= code < 600
+
+
+def claim_batch(size: int) -> list[OutboundEmail]:
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.QUEUED, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:size]
+        )
+        if rows:
+            OutboundEmail.objects.filter(id__in=[row.id for row in rows]).update(next_attempt_at=now + CLAIM_LEASE)
+    return rows
+
+
+def _record_failure(row: OutboundEmail, exc: Exception, now) -> None:
+    row.attempts += 1
+    row.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+    if is_permanent(exc) or row.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        row.status = OutboundEmail.FAILED
+        logger.warning('Giving up on outbound email %s after %s attempts: %s', row.id, row.attempts, row.last_error)
+    else:
+        row.next_attempt_at = now + retry_delay(row.attempts)
+
+
+def deliver(rows: list[OutboundEmail], backend: str | None = None) -> dict[str, int]:
+    """Send ``rows`` over one connection and persist the outcome of each."""
+    connection = get_connection(backend or settings.EMAIL_DELIVERY_BACKEND)
+    now = timezone.now()
+    sent, failed = [], []
+    pending = list(rows)
+    try:
+        connection.open()
+        while pending:
+            row = pending.pop(0)
+            try:
+                if not connection.send_messages([to_message(row, connection)]):
+                    raise smtplib.SMTPRecipientsRefused({})
+            except Exception as exc:
+                # A bad header or address fails only its own row; it must not hold back the rest of the batch.
+                _record_failure(row, exc, now)
+                failed.append(row)
+                if is_transient(exc):
+                    # The session may be unusable after an error; start the rest of the batch on a fresh one.
+                    connection.close()
+                    connection.open()
+            else:
+                sent.append(row)
+    except (smtplib.SMTPException, OSError) as exc:
+        # Could not (re)connect: everything not yet attempted is retried later.
+        for row in pending:
+            _record_failure(row, exc, now)
+        failed.extend(pending)
+    finally:
+        connection.close()
+        # Saved even if something unexpected escapes, so delivered messages are never sent twice.
+        if sent:
+            OutboundEmail.objects.filter(id__in=[row.id for row in sent]).update(
+                status=OutboundEmail.SENT,
+                attempts=F('attempts') + 1,
+                sent_at=timezone.now(),
+                last_error='',
+            )
+        if failed:
+            OutboundEmail.objects.bulk_update(failed, ['status', 'attempts', 'next_attempt_at', 'last_error'])
+    return {
+        'sent': len(sent),
+        'retrying': sum(row.status == OutboundEmail.QUEUED for row in failed),
+        'failed': sum(row.status == OutboundEmail.FAILED for row in failed),
+    }
+
+
+def purge_sent(older_than: timedelta) -> int:
+    deleted, _ = OutboundEmail.objects.filter(
+        status=OutboundEmail.SENT,
+        created_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Build "users like you also rated highly" movie recommendations from personal scores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true', help='Only refresh users whose lists changed, using the last saved model.')
+        parser.add_argument('--neighbours', type=int, default=50, help='Similar titles kept per title.')
+        parser.add_argument('--top-n', type=int, default=10, help='Recommendations stored per user.')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes for the similarity pass (default: CPU count).')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Users scored and written per batch.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['incremental']:
+            try:
+                stats = recommendations.refresh_stale(top_n=options['top_n'], chunk_size=options['chunk_size'])
+            except FileNotFoundError as exc:
+                raise CommandError('No saved recommendation model; run a full build first.') from exc
+            summary = f"Refreshed {stats['users']} users against {stats['titles']} titles"
+        else:
+            stats = recommendations.build_all(
+                neighbours=options['neighbours'],
+                top_n=options['top_n'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+            )
+            summary = (
+                f"Built recommendations for {stats['users']} users from {stats['ratings']} ratings "
+                f"over {stats['titles']} titles ({stats['similarities']} similarities, {stats['removed']} rows removed)"
+            )
+        self.stdout.write(self.style.SUCCESS(f'{summary} in {time.perf_counter() - started:.2f}s.'))
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold old hourly vote buckets into daily buckets and expire daily buckets past retention.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hourly-retention-days',
+            type=int,
+            default=settings.VOTE_ROLLUP_HOURLY_RETENTION_DAYS,
+            help='Keep hourly buckets for this many days before folding them into daily ones.',
+        )
+        parser.add_argument(
+            '--daily-retention-days',
+            type=int,
+            default=settings.VOTE_ROLLUP_DAILY_RETENTION_DAYS,
+            help='Delete daily buckets older than this many days (0 keeps them forever).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Buckets folded per transaction.')
+
+    def handle(self, *args, **options):
+        daily_days = options['daily_retention_days']
+        for kind in rollups.ROLLUPS:
+            stats = rollups.compact(
+                kind,
+                hourly_retention=timedelta(days=options['hourly_retention_days']),
+                daily_retention=timedelta(days=daily_days) if daily_days else None,
+                chunk_size=options['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{kind}: folded {stats['folded']} hourly buckets, expired {stats['expired']} daily buckets."
+            ))
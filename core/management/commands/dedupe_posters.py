@@ -0,0 +1,100 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum
+from django.template.defaultfilters import filesizeformat
+
+from core.content_version import bump_content_version
+from core.models import PersonalActor, PersonalMovie, PosterBlob
+from core.storage import BLOB_PREFIX, poster_storage
+
+POSTER_MODELS = (PersonalMovie, PersonalActor)
+
+
+class Command(BaseCommand):
+    help = 'Move legacy poster files into content-addressed blobs and report the deduplication ratio.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many legacy files would be moved.')
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Recompute blob reference counts from the poster rows and delete unreferenced blobs.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            moved, missing = self._migrate_legacy_files()
+            self.stdout.write(f'Moved {moved} legacy poster files into blobs ({missing} missing files skipped).')
+            if options['recount']:
+                fixed, removed = self._recount()
+                self.stdout.write(f'Corrected {fixed} reference counts and removed {removed} unreferenced blobs.')
+        else:
+            legacy = sum(
+                model.objects.exclude(poster_image='').exclude(poster_image__isnull=True)
+                .exclude(poster_image__startswith=BLOB_PREFIX).count()
+                for model in POSTER_MODELS
+            )
+            self.stdout.write(f'{legacy} legacy poster files would be moved.')
+        self._report()
+
+    def _migrate_legacy_files(self) -> tuple[int, int]:
+        moved = missing = 0
+        for model in POSTER_MODELS:
+            rows = (
+                model.objects.exclude(poster_image='').exclude(poster_image__isnull=True)
+                .exclude(poster_image__startswith=BLOB_PREFIX)
+                .values_list('pk', 'user_id', 'poster_image')
+                .iterator(chunk_size=500)
+            )
+            for pk, user_id, legacy_name in rows:
+                if not poster_storage.exists(legacy_name):
+                    missing += 1
+                    continue
+                with poster_storage.open(legacy_name) as legacy_file:
+                    name = poster_storage.save(legacy_name, legacy_file)
+                model.objects.filter(pk=pk).update(poster_image=name)
+                bump_content_version([user_id])
+                poster_storage.delete(legacy_name)
+                moved += 1
+        return moved, missing
+
+    def _recount(self) -> tuple[int, int]:
+        references = Counter()
+        for model in POSTER_MODELS:
+            rows = model.objects.filter(poster_image__startswith=BLOB_PREFIX).values('poster_image').annotate(total=Count('pk'))
+            for row in rows.order_by():
+                references[row['poster_image']] += row['total']
+        fixed = removed = 0
+        for blob in PosterBlob.objects.iterator(chunk_size=1000):
+            expected = references.get(blob.name, 0)
+            if expected == blob.ref_count:
+                continue
+            fixed += 1
+            if expected:
+                PosterBlob.objects.filter(pk=blob.pk).update(ref_count=expected)
+                continue
+            blob.delete()
+            if poster_storage.exists(blob.name):
+                poster_storage.delete(blob.name)
+            removed += 1
+        return fixed, removed
+
+    def _report(self) -> None:
+        totals = PosterBlob.objects.filter(ref_count__gt=0).aggregate(
+            blobs=Count('pk'),
+            references=Sum('ref_count'),
+            stored=Sum('size'),
+            logical=Sum(F('size') * F('ref_count')),
+        )
+        blobs = totals['blobs'] or 0
+        references = totals['references'] or 0
+        stored = totals['stored'] or 0
+        logical = totals['logical'] or 0
+        ratio = references / blobs if blobs else 1.0
+        saved = logical - stored
+        share = saved / logical * 100 if logical else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'{references} poster references share {blobs} blobs (dedup ratio {ratio:.2f}); '
+            f'{filesizeformat(stored)} stored for {filesizeformat(logical)} of posters, {filesizeformat(saved)} ({share:.1f}%) saved.'
+        ))
@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import dataset
+
+
+class Command(BaseCommand):
+    help = 'Write a deterministic synthetic dataset (users, catalog, personal lists, votes) for load tests.'
+
+    def add_arguments(self, parser):
+        defaults = dataset.DatasetSpec()
+        parser.add_argument('--users', type=int, default=defaults.users, help='Users to create.')
+        parser.add_argument('--movies', type=int, default=defaults.movies, help='Catalog movies to create.')
+        parser.add_argument('--actors', type=int, default=defaults.actors, help='Catalog actors to create.')
+        parser.add_argument('--movies-per-user', type=float, default=defaults.movies_per_user, help='Mean personal movies per user (log-normal).')
+        parser.add_argument('--actors-per-user', type=float, default=defaults.actors_per_user, help='Mean personal actors per user (log-normal).')
+        parser.add_argument('--movie-votes-per-user', type=float, default=defaults.movie_votes_per_user, help='Mean movie votes per user.')
+        parser.add_argument('--actor-votes-per-user', type=float, default=defaults.actor_votes_per_user, help='Mean actor votes per user.')
+        parser.add_argument('--days', type=int, default=defaults.days, help='Spread timestamps over this many past days.')
+        parser.add_argument('--seed', type=int, default=defaults.seed, help='Same seed and batch size, same data.')
+        parser.add_argument('--prefix', default=defaults.prefix, help='Username and catalog name prefix; must not be in use yet.')
+        parser.add_argument('--password', default=defaults.password, help='Password of every generated user (hashed once).')
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size, help='Rows per insert batch.')
+        parser.add_argument('--workers', type=int, default=None, help='Writer processes (default: CPU count; always 1 on SQLite).')
+        parser.add_argument('--skip-derived', action='store_true', help='Do not rebuild vote rollups, counters, ratings and summaries afterwards.')
+
+    def handle(self, *args, **options):
+        spec = dataset.DatasetSpec(
+            users=options['users'],
+            movies=options['movies'],
+            actors=options['actors'],
+            movies_per_user=options['movies_per_user'],
+            actors_per_user=options['actors_per_user'],
+            movie_votes_per_user=options['movie_votes_per_user'],
+            actor_votes_per_user=options['actor_votes_per_user'],
+            days=options['days'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+        )
+        started = time.perf_counter()
+        try:
+            stats = dataset.generate(spec, workers=options['workers'] or os.cpu_count() or 1, report=self._report)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        rows = sum(count for count, _ in stats.values())
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s).'))
+        if not options['skip_derived']:
+            derived_started = time.perf_counter()
+            dataset.rebuild_derived(report=self._report)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt derived data in {time.perf_counter() - derived_started:.2f}s.'))
+
+    def _report(self, phase: str, rows: int, seconds: float) -> None:
+        self.stdout.write(f'  {phase}: {rows} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:,.0f} rows/s)')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core import title_matching
+
+
+class Command(BaseCommand):
+    help = 'Link free-text personal movie titles to canonical catalog movies.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Matching processes; chunks are read and written by the parent.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Personal entries matched per chunk.')
+        parser.add_argument('--threshold', type=float, default=title_matching.DEFAULT_THRESHOLD, help='Minimum trigram similarity for a link.')
+        parser.add_argument('--relink', action='store_true', help='Re-evaluate entries that are already linked.')
+
+    def handle(self, *args, **options):
+        stats = title_matching.link_all(
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            threshold=options['threshold'],
+            relink=options['relink'],
+        )
+        rate = stats['processed'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {stats['linked']} of {stats['processed']} personal movies against {stats['catalog']} catalog titles "
+            f"in {stats['seconds']:.2f}s ({rate:,.0f} entries/s)."
+        ))
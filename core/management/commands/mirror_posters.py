@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.poster_mirror import mirror_pending
+
+
+class Command(BaseCommand):
+    help = 'Copy external poster_url images into the local mirror cache and trim it to POSTER_MIRROR_CACHE_BYTES.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Mirror at most this many URLs in this run.')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.POSTER_MIRROR_CONCURRENCY,
+            help='Downloads in flight at once (also the connection pool size).',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        totals = mirror_pending(limit=options['limit'], concurrency=options['concurrency'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Mirrored {totals['mirrored']} posters, {totals['failed']} failed, "
+            f"{totals['evicted']} evicted from the cache in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core.models import Actor, ActorVoteBucket, Movie, MovieVoteBucket
+from core.trending import score_from_buckets
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores from vote rollups, e.g. after changing TRENDING_HALF_LIFE_HOURS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Movies or actors rebuilt per batch.')
+
+    def handle(self, *args, **options):
+        for model, bucket_model, field in (
+            (Movie, MovieVoteBucket, 'movie_id'),
+            (Actor, ActorVoteBucket, 'actor_id'),
+        ):
+            rebuilt = self._rebuild(model, bucket_model, field, options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt trending scores for {rebuilt} {model._meta.verbose_name_plural}.'))
+
+    def _rebuild(self, model, bucket_model, field, chunk_size):
+        rebuilt = 0
+        last_id = 0
+        while True:
+            ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return rebuilt
+            last_id = ids[-1]
+
+            buckets = defaultdict(list)
+            rows = bucket_model.objects.filter(**{f'{field}__in': ids}).values_list(field, 'bucket_start', 'granularity', 'vote_count')
+            for target_id, bucket_start, granularity, vote_count in rows:
+                buckets[target_id].append((bucket_start, granularity, vote_count))
+
+            model.objects.bulk_update(
+                [model(id=target_id, trending_score=score_from_buckets(buckets[target_id])) for target_id in ids],
+                ['trending_score'],
+            )
+            rebuilt += len(ids)
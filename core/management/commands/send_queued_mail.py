@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound email in batches, reusing one mail server connection per batch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_QUEUE_BATCH_SIZE, help='Messages claimed and sent per connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new mail instead of exiting when the queue is drained.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep between polls of an empty queue with --loop.')
+        parser.add_argument(
+            '--purge-sent-days',
+            type=int,
+            default=settings.EMAIL_QUEUE_RETENTION_DAYS,
+            help='Delete sent messages older than this many days after each drain (0 keeps them).',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                totals = self._drain(options['batch_size'])
+                if totals['sent'] or totals['retrying'] or totals['failed']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Sent {totals['sent']}, retrying {totals['retrying']}, failed {totals['failed']}."
+                    ))
+                if options['purge_sent_days']:
+                    mail.purge_sent(timedelta(days=options['purge_sent_days']))
+                if not options['loop']:
+                    return
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def _drain(self, batch_size: int) -> dict[str, int]:
+        totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+        while batch := mail.claim_batch(batch_size):
+            for key, value in mail.deliver(batch).items():
+                totals[key] += value
+        return totals
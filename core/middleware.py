@@ -6,6 +6,13 @@ from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 
+def session_expired(session) -> bool:
+    login_timestamp = session.get('auth_login_timestamp')
+    login_time = parse_datetime(login_timestamp) if login_timestamp else None
+    max_session_age = getattr(settings, 'SESSION_COOKIE_AGE', 3600)
+    return bool(login_time and timezone.now() - login_time > timedelta(seconds=max_session_age))
+
+
 class SessionTimeoutMiddleware:
     """Force re-login after a fixed authenticated session window."""
 
@@ -14,14 +21,9 @@ class SessionTimeoutMiddleware:
 
     def __call__(self, request):
         if request.user.is_authenticated:
-            login_timestamp = request.session.get('auth_login_timestamp')
-            max_session_age = getattr(settings, 'SESSION_COOKIE_AGE', 3600)
-
-            if not login_timestamp:
+            if not request.session.get('auth_login_timestamp'):
                 request.session['auth_login_timestamp'] = timezone.now().isoformat()
-            else:
-                login_time = parse_datetime(login_timestamp)
-                if login_time and timezone.now() - login_time > timedelta(seconds=max_session_age):
-                    logout(request)
+            elif session_expired(request.session):
+                logout(request)
 
         return self.get_response(request)
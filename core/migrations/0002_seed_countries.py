@@ -1,5 +1,7 @@
 from django.db import migrations
 
+from core.countries import seed_country_names
+
 
 COUNTRIES = [
     'United States',
@@ -16,9 +18,7 @@ COUNTRIES = [
 
 
 def seed_countries(apps, schema_editor):
-    Country = apps.get_model('core', 'Country')
-    for name in COUNTRIES:
-        Country.objects.get_or_create(name=name)
+    seed_country_names(apps.get_model('core', 'Country'), COUNTRIES)
 
 
 def remove_countries(apps, schema_editor):
@@ -1,5 +1,7 @@
 from django.db import migrations
 
+from core.countries import seed_country_names
+
 
 COUNTRIES = [
     'Argentina', 'Australia', 'Austria', 'Belgium', 'Brazil', 'Canada', 'Chile', 'China', 'Colombia',
@@ -13,9 +15,7 @@ COUNTRIES = [
 
 
 def seed_countries(apps, schema_editor):
-    Country = apps.get_model('core', 'Country')
-    for name in COUNTRIES:
-        Country.objects.get_or_create(name=name)
+    seed_country_names(apps.get_model('core', 'Country'), COUNTRIES)
 
 
 class Migration(migrations.Migration):
@@ -1,24 +1,10 @@
 from django.db import migrations, models
 
-from core.countries import COUNTRY_DATA
+from core.countries import COUNTRY_DATA, sync_countries
 
 
 def seed_world_countries(apps, schema_editor):
-    Country = apps.get_model('core', 'Country')
-    for iso_code, name in COUNTRY_DATA:
-        by_name = Country.objects.filter(name=name).first()
-        if by_name:
-            by_name.iso_code = iso_code
-            by_name.save(update_fields=['iso_code'])
-            continue
-
-        by_iso = Country.objects.filter(iso_code=iso_code).first()
-        if by_iso:
-            by_iso.name = name
-            by_iso.save(update_fields=['name'])
-            continue
-
-        Country.objects.create(name=name, iso_code=iso_code)
+    sync_countries(apps.get_model('core', 'Country'), COUNTRY_DATA)
 
 
 def unseed_world_countries(apps, schema_editor):
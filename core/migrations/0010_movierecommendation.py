@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0009_delete_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieRecommendation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='movie_recommendations', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('items', models.JSONField(blank=True, default=list)),
+                ('is_stale', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_stale', True)), fields=['user'], name='movie_rec_stale_idx')],
+            },
+        ),
+    ]
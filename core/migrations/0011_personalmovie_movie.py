@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_movierecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalmovie',
+            name='movie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='personal_entries', to='core.movie'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_personalmovie_movie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieRating',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='core.movie')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('weighted_score', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-weighted_score', 'movie'],
+                'indexes': [models.Index(fields=['-weighted_score', 'movie'], name='movie_rating_weighted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:21
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_vote_buckets(apps, schema_editor):
+    for vote_name, bucket_name, field in (
+        ('MovieVote', 'MovieVoteBucket', 'movie'),
+        ('ActorVote', 'ActorVoteBucket', 'actor'),
+    ):
+        Vote = apps.get_model('core', vote_name)
+        Bucket = apps.get_model('core', bucket_name)
+        rows = (
+            Vote.objects.annotate(hour=TruncHour('created_at'))
+            .values(field, 'hour')
+            .annotate(total=Count('id'))
+            .order_by()
+            .iterator(chunk_size=5000)
+        )
+        while True:
+            batch = [
+                Bucket(**{f'{field}_id': row[field]}, granularity='h', bucket_start=row['hour'], vote_count=row['total'])
+                for row in islice(rows, 5000)
+            ]
+            if not batch:
+                break
+            Bucket.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_movierating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActorVoteBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('h', 'Hourly'), ('d', 'Daily')], default='h', max_length=1)),
+                ('bucket_start', models.DateTimeField()),
+                ('vote_count', models.PositiveIntegerField(default=0)),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_buckets', to='core.actor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='actor_vote_bucket_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('actor', 'granularity', 'bucket_start'), name='unique_actor_vote_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieVoteBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('h', 'Hourly'), ('d', 'Daily')], default='h', max_length=1)),
+                ('bucket_start', models.DateTimeField()),
+                ('vote_count', models.PositiveIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_buckets', to='core.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='movie_vote_bucket_time_idx')],
+                'constraints': [models.UniqueConstraint(fields=('movie', 'granularity', 'bucket_start'), name='unique_movie_vote_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_vote_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_vote_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actor',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='actor',
+            index=models.Index(fields=['-trending_score'], name='actor_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-trending_score'], name='movie_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# Admin search uses istartswith, which PostgreSQL compiles to UPPER(col::text) LIKE UPPER('prefix%').
+# A btree with text_pattern_ops on that expression serves it under any collation.
+PREFIX_INDEXES = [
+    ('movie_title_prefix_idx', 'core_movie', 'title'),
+    ('actor_name_prefix_idx', 'core_actor', 'name'),
+]
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in PREFIX_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} (UPPER({column}::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_trending_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:34
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def backfill_poster_sizes(apps, schema_editor):
+    for model_name in ('PersonalMovie', 'PersonalActor'):
+        Model = apps.get_model('core', model_name)
+        rows = []
+        for row in Model.objects.exclude(poster_image='').exclude(poster_image__isnull=True).only('id', 'poster_image').iterator(chunk_size=1000):
+            try:
+                row.poster_size = default_storage.size(row.poster_image.name)
+            except OSError:
+                continue
+            rows.append(row)
+        Model.objects.bulk_update(rows, ['poster_size'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalactor',
+            name='poster_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='personalmovie',
+            name='poster_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_poster_sizes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import core.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_poster_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PosterBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='personalactor',
+            name='poster_image',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_poster_storage, upload_to='posters/actors/', validators=[django.core.validators.FileExtensionValidator(['png', 'jpg', 'jpeg'])]),
+        ),
+        migrations.AlterField(
+            model_name='personalmovie',
+            name='poster_image',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_poster_storage, upload_to='posters/movies/', validators=[django.core.validators.FileExtensionValidator(['png', 'jpg', 'jpeg'])]),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_poster_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalactor',
+            name='poster_mirror',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='personalmovie',
+            name='poster_mirror',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0019_poster_mirror'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserListSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('movie_count', models.PositiveIntegerField(default=0)),
+                ('movie_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actor_count', models.PositiveIntegerField(default=0)),
+                ('actor_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='personalactor',
+            index=models.Index(fields=['user', '-score', '-created_at'], name='personal_actor_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='personalmovie',
+            index=models.Index(fields=['user', '-score', '-created_at'], name='personal_movie_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='userlistsummary',
+            name='top_actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.personalactor'),
+        ),
+        migrations.AddField(
+            model_name='userlistsummary',
+            name='top_movie',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.personalmovie'),
+        ),
+    ]
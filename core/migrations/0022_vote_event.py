@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_vote_events(apps, schema_editor):
+    # One INSERT ... SELECT per kind: existing votes become the first events of the log, oldest first.
+    quote = schema_editor.quote_name
+    events = quote(apps.get_model('core', 'VoteEvent')._meta.db_table)
+    for vote_name, kind in (('MovieVote', 'movie'), ('ActorVote', 'actor')):
+        votes = quote(apps.get_model('core', vote_name)._meta.db_table)
+        schema_editor.execute(
+            f'INSERT INTO {events} (kind, target_id, user_id, created_at) '
+            f'SELECT %s, {quote(kind + "_id")}, {quote("user_id")}, {quote("created_at")} FROM {votes} ORDER BY {quote("id")}',
+            [kind],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('movie', 'Movie'), ('actor', 'Actor')], max_length=5)),
+                ('target_id', models.PositiveIntegerField()),
+                ('user_id', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'target_id'], name='vote_event_target_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_vote_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_vote_event'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='voteevent',
+            name='target_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='voteevent',
+            name='user_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_movie_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movierecommendation',
+            name='marked_stale_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
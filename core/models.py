@@ -1,16 +1,10 @@
 from django.conf import settings
 from django.core.validators import FileExtensionValidator, MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from datetime import date
 from .countries import iso_to_flag
-
-def _delete_file_from_storage(file_field) -> None:
-    if not file_field:
-        return
-    storage = file_field.storage
-    file_name = file_field.name
-    if file_name and storage.exists(file_name):
-        storage.delete(file_name)
+from .storage import get_poster_storage
 
 class Country(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -19,6 +13,10 @@ class Country(models.Model):
     class Meta:
         ordering = ['name']
 
+    @property
+    def flag_emoji(self) -> str:
+        return iso_to_flag(self.iso_code)
+
     def __str__(self) -> str:
         return self.name
 
@@ -27,13 +25,11 @@ class Actor(models.Model):
     name = models.CharField(max_length=120)
     country = models.ForeignKey(Country, on_delete=models.PROTECT, related_name='actors')
     vote_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0)
 
     class Meta:
         ordering = ['-vote_count', 'name']
-
-    @property
-    def flag_emoji(self) -> str:
-        return iso_to_flag(self.iso_code)
+        indexes = [models.Index(fields=['-trending_score'], name='actor_trending_idx')]
 
     def __str__(self) -> str:
         return self.name
@@ -43,9 +39,13 @@ class Movie(models.Model):
     title = models.CharField(max_length=200)
     country = models.ForeignKey(Country, on_delete=models.PROTECT, related_name='movies')
     vote_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(default=0)
+    # Set by save() only, so counter updates leave it alone; part of the title index version.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['-vote_count', 'title']
+        indexes = [models.Index(fields=['-trending_score'], name='movie_trending_idx')]
 
     def __str__(self) -> str:
         return self.title
@@ -57,25 +57,41 @@ class PersonalMovie(models.Model):
     country = models.ForeignKey(Country, on_delete=models.PROTECT, related_name='personal_movies')
     production_year = models.PositiveIntegerField()
     poster_url = models.URLField(max_length=500, blank=True, default='')
-    poster_image = models.FileField(upload_to='posters/movies/', blank=True, null=True, validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])])
+    poster_mirror = models.CharField(max_length=255, blank=True, default='', editable=False)
+    poster_image = models.FileField(upload_to='posters/movies/', storage=get_poster_storage, blank=True, null=True, validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])])
+    poster_size = models.PositiveIntegerField(default=0, editable=False)
     score = models.DecimalField(
         max_digits=5,
         decimal_places=2,
         validators=[MinValueValidator(0), MaxValueValidator(100)],
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    movie = models.ForeignKey(Movie, on_delete=models.SET_NULL, null=True, blank=True, related_name='personal_entries')
 
     class Meta:
         ordering = ['-score', '-created_at', 'title']
+        indexes = [models.Index(fields=['user', '-score', '-created_at'], name='personal_movie_rank_idx')]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored link and score so rating aggregates can be adjusted by delta.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     @property
     def poster_source(self) -> str:
         if self.poster_image:
             return self.poster_image.url
+        if self.poster_mirror:
+            return settings.MEDIA_URL + self.poster_mirror
         return self.poster_url
-    def delete(self, using=None, keep_parents=False):
-        _delete_file_from_storage(self.poster_image)
-        return super().delete(using=using, keep_parents=keep_parents)
+
+    def save(self, *args, **kwargs):
+        # Signal handlers keep ratings and the list summary in step; commit them together with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f'{self.title} ({self.user})'
 
@@ -86,7 +102,9 @@ class PersonalActor(models.Model):
     country = models.ForeignKey(Country, on_delete=models.PROTECT, related_name='personal_actors')
     production_year = models.PositiveIntegerField()
     poster_url = models.URLField(max_length=500, blank=True, default='')
-    poster_image = models.FileField(upload_to='posters/actors/', blank=True, null=True, validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])])
+    poster_mirror = models.CharField(max_length=255, blank=True, default='', editable=False)
+    poster_image = models.FileField(upload_to='posters/actors/', storage=get_poster_storage, blank=True, null=True, validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])])
+    poster_size = models.PositiveIntegerField(default=0, editable=False)
     score = models.DecimalField(
         max_digits=5,
         decimal_places=2,
@@ -96,23 +114,84 @@ class PersonalActor(models.Model):
 
     class Meta:
         ordering = ['-score', '-created_at', 'full_name']
+        indexes = [models.Index(fields=['user', '-score', '-created_at'], name='personal_actor_rank_idx')]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored score so the list summary can be adjusted by delta.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     @property
     def poster_source(self) -> str:
         if self.poster_image:
             return self.poster_image.url
+        if self.poster_mirror:
+            return settings.MEDIA_URL + self.poster_mirror
         return self.poster_url
 
     @property
     def age(self) -> int:
         return max(0, date.today().year - self.production_year)
-    def delete(self, using=None, keep_parents=False):
-        _delete_file_from_storage(self.poster_image)
-        return super().delete(using=using, keep_parents=keep_parents)
+
+    def save(self, *args, **kwargs):
+        # Signal handlers keep the list summary in step; commit it together with the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f'{self.full_name} ({self.user})'
 
 
+class UserListSummary(models.Model):
+    """Denormalized counts, score sums and top entries of one user's personal lists (see core/summaries.py)."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='list_summary',
+    )
+    movie_count = models.PositiveIntegerField(default=0)
+    movie_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    top_movie = models.ForeignKey(PersonalMovie, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    actor_count = models.PositiveIntegerField(default=0)
+    actor_score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    top_actor = models.ForeignKey(PersonalActor, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def movie_average(self) -> float | None:
+        if not self.movie_count:
+            return None
+        return float(self.movie_score_sum) / self.movie_count
+
+    @property
+    def actor_average(self) -> float | None:
+        if not self.actor_count:
+            return None
+        return float(self.actor_score_sum) / self.actor_count
+
+    def __str__(self) -> str:
+        return f'List summary for {self.user}'
+
+
+class ContentVersion(models.Model):
+    """Bumped whenever something on the user's own pages changes; part of their ETags (see core/content_version.py)."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='content_version',
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.user} v{self.version}'
+
+
 class MovieVote(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
@@ -129,3 +208,142 @@ class ActorVote(models.Model):
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=['user', 'actor'], name='unique_actor_vote')]
+
+
+class VoteEvent(models.Model):
+    """Append-only record of every vote, written in the vote's transaction (see core/vote_log.py)."""
+
+    MOVIE = 'movie'
+    ACTOR = 'actor'
+    KIND_CHOICES = [(MOVIE, 'Movie'), (ACTOR, 'Actor')]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    # Plain ids rather than foreign keys: events outlive the users and titles they mention.
+    target_id = models.PositiveBigIntegerField()
+    user_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'target_id'], name='vote_event_target_idx')]
+
+    def __str__(self) -> str:
+        return f'{self.kind} {self.target_id} by user {self.user_id}'
+
+
+class MovieRecommendation(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='movie_recommendations',
+    )
+    items = models.JSONField(default=list, blank=True)
+    is_stale = models.BooleanField(default=True)
+    # When an edit last flagged the row; a job only clears is_stale if no edit came after it started.
+    marked_stale_at = models.DateTimeField(null=True, blank=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user'], condition=models.Q(is_stale=True), name='movie_rec_stale_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'Recommendations for {self.user}'
+
+
+class MovieRating(models.Model):
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    weighted_score = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-weighted_score', 'movie']
+        indexes = [models.Index(fields=['-weighted_score', 'movie'], name='movie_rating_weighted_idx')]
+
+    @property
+    def average(self) -> float | None:
+        if not self.rating_count:
+            return None
+        return float(self.rating_sum) / self.rating_count
+
+    def __str__(self) -> str:
+        return f'{self.movie} ({self.weighted_score:.2f})'
+
+
+class VoteBucket(models.Model):
+    HOURLY = 'h'
+    DAILY = 'd'
+    GRANULARITY_CHOICES = [(HOURLY, 'Hourly'), (DAILY, 'Daily')]
+
+    granularity = models.CharField(max_length=1, choices=GRANULARITY_CHOICES, default=HOURLY)
+    bucket_start = models.DateTimeField()
+    vote_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class MovieVoteBucket(VoteBucket):
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='vote_buckets')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'granularity', 'bucket_start'], name='unique_movie_vote_bucket'),
+        ]
+        indexes = [models.Index(fields=['granularity', 'bucket_start'], name='movie_vote_bucket_time_idx')]
+
+
+class ActorVoteBucket(VoteBucket):
+    actor = models.ForeignKey(Actor, on_delete=models.CASCADE, related_name='vote_buckets')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['actor', 'granularity', 'bucket_start'], name='unique_actor_vote_bucket'),
+        ]
+        indexes = [models.Index(fields=['granularity', 'bucket_start'], name='actor_vote_bucket_time_idx')]
+
+
+class OutboundEmail(models.Model):
+    QUEUED = 'queued'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    subject = models.CharField(max_length=998)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=6, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='queued'), name='outbound_email_due_idx'),
+            models.Index(fields=['status', 'created_at'], name='outbound_email_status_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.subject} -> {", ".join(self.to)}'
+
+
+class PosterBlob(models.Model):
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'{self.digest[:12]} ({self.ref_count} refs)'
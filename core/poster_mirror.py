@@ -0,0 +1,246 @@
+"""Local mirror of external ``poster_url`` images.
+
+``mirror_pending`` collects the remote poster URLs that have no local copy yet,
+fetches them concurrently with one ``httpx.AsyncClient`` (bounded connection
+pool plus a semaphore), and streams each response to disk through the same
+checks as uploads: PNG/JPEG magic bytes, header dimensions and the per-file byte
+cap. Redirects are followed by hand so every hop goes through the private-host
+check, and each request connects to the address that was checked. Stored files
+live under ``MEDIA_ROOT/POSTER_MIRROR_DIR`` named by the hash of their URL, and
+entries point at them through ``poster_mirror``.
+
+The cache is bounded by ``POSTER_MIRROR_CACHE_BYTES`` and evicted least recently
+used first. Each run touches the files that are still referenced, so evictions
+hit abandoned URLs before live ones; entries whose file was evicted fall back
+to the remote URL until the next run mirrors them again.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import os
+import socket
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+from django.db.models import Q
+
+from .uploads import PNG_MAGIC, ImageHeaderSniffer, UploadRejected
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 3
+
+
+def mirror_name(url: str) -> str:
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    return f'{settings.POSTER_MIRROR_DIR}{digest[:2]}/{digest}'
+
+
+def mirror_root() -> str:
+    return os.path.join(settings.MEDIA_ROOT, settings.POSTER_MIRROR_DIR)
+
+
+class MirrorCache:
+    """Files under ``MEDIA_ROOT`` keyed by URL, trimmed to ``max_bytes`` by modification time."""
+
+    def __init__(self, max_bytes: int | None = None):
+        self.max_bytes = settings.POSTER_MIRROR_CACHE_BYTES if max_bytes is None else max_bytes
+
+    def path(self, name: str) -> str:
+        return os.path.join(settings.MEDIA_ROOT, name)
+
+    def lookup(self, url: str) -> str | None:
+        """Stored name for ``url`` (with extension), or None."""
+        base = mirror_name(url)
+        for extension in ('.jpg', '.png'):
+            if os.path.exists(self.path(base + extension)):
+                return base + extension
+        return None
+
+    def touch(self, names) -> None:
+        for name in names:
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> list[str]:
+        """Delete least recently used files until the cache fits; return the evicted names."""
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(mirror_root()):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                if file_name.endswith('.part'):
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        evicted = []
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted.append(os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/'))
+        return evicted
+
+
+@dataclass
+class MirrorResult:
+    url: str
+    name: str | None = None
+    error: str = ''
+
+
+async def _check_host(url: str) -> str | None:
+    """Vet ``url``'s host and return the address to connect to (None when private hosts are allowed)."""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UploadRejected('Only http and https poster URLs can be mirrored.')
+    if settings.POSTER_MIRROR_ALLOW_PRIVATE_HOSTS:
+        return None
+    # Entries are user input: refuse to fetch from the server's own network.
+    infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, parts.port, type=socket.SOCK_STREAM)
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0])
+        if not address.is_global:
+            raise UploadRejected(f'{parts.hostname} resolves to a non-public address.')
+    return infos[0][4][0]
+
+
+async def _pinned_request(client: httpx.AsyncClient, url: str) -> httpx.Request:
+    address = await _check_host(url)
+    if address is None:
+        return client.build_request('GET', url)
+    # Connect to the address just vetted, so a second DNS answer cannot point the fetch elsewhere;
+    # the Host header and TLS server name (and certificate check) still use the original host.
+    target = httpx.URL(url)
+    return client.build_request(
+        'GET',
+        target.copy_with(host=address),
+        headers={'Host': target.netloc.decode('ascii')},
+        extensions={'sni_hostname': target.host},
+    )
+
+
+@asynccontextmanager
+async def _open(client: httpx.AsyncClient, url: str):
+    """Stream ``url``, following up to ``MAX_REDIRECTS`` redirects with every hop vetted and pinned."""
+    for _ in range(MAX_REDIRECTS + 1):
+        response = await client.send(await _pinned_request(client, url), stream=True)
+        if not response.is_redirect:
+            try:
+                yield response
+            finally:
+                await response.aclose()
+            return
+        await response.aclose()
+        url = str(httpx.URL(url).join(response.headers['Location']))
+    raise UploadRejected('Remote poster redirected too many times.')
+
+
+async def fetch_poster(client: httpx.AsyncClient, url: str, semaphore: asyncio.Semaphore) -> MirrorResult:
+    async with semaphore:
+        directory = os.path.dirname(os.path.join(settings.MEDIA_ROOT, mirror_name(url)))
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            sniffer = ImageHeaderSniffer()
+            received = 0
+            head = b''
+            with os.fdopen(handle, 'wb') as temp_file:
+                async with _open(client, url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        if received > settings.POSTER_UPLOAD_MAX_BYTES:
+                            raise UploadRejected('Remote poster is larger than the upload limit.')
+                        if not head:
+                            head = chunk[:len(PNG_MAGIC)]
+                        if not sniffer.done:
+                            sniffer.feed(chunk)
+                        temp_file.write(chunk)
+            if not sniffer.done:
+                raise UploadRejected('Remote poster is not a PNG or JPEG image.')
+            limit = settings.POSTER_MAX_DIMENSION
+            if sniffer.width > limit or sniffer.height > limit:
+                raise UploadRejected(f'Remote poster is {sniffer.width}x{sniffer.height} pixels.')
+            name = mirror_name(url) + ('.png' if head == PNG_MAGIC else '.jpg')
+            os.replace(temp_path, os.path.join(settings.MEDIA_ROOT, name))
+            return MirrorResult(url, name)
+        except (httpx.HTTPError, OSError, UploadRejected) as exc:
+            return MirrorResult(url, error=f'{type(exc).__name__}: {exc}')
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+async def mirror_urls(urls, concurrency: int | None = None, transport: httpx.AsyncBaseTransport | None = None) -> list[MirrorResult]:
+    concurrency = concurrency or settings.POSTER_MIRROR_CONCURRENCY
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(settings.POSTER_MIRROR_TIMEOUT)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Redirects are followed by _open, which vets every hop; httpx would only vet the first.
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=False, transport=transport) as client:
+        return await asyncio.gather(*(fetch_poster(client, url, semaphore) for url in urls))
+
+
+def _poster_models():
+    from .models import PersonalActor, PersonalMovie
+
+    return (PersonalMovie, PersonalActor)
+
+
+def mirror_pending(limit: int | None = None, concurrency: int | None = None) -> dict[str, int]:
+    """Mirror unmirrored remote posters, point their entries at the copies and trim the cache."""
+    from .content_version import bump_content_version
+
+    cache = MirrorCache()
+    pending = set()
+    referenced = set()
+    for model in _poster_models():
+        remote = model.objects.filter(Q(poster_image='') | Q(poster_image__isnull=True)).exclude(poster_url='')
+        pending.update(remote.filter(poster_mirror='').values_list('poster_url', flat=True).distinct())
+        referenced.update(remote.exclude(poster_mirror='').values_list('poster_mirror', flat=True).distinct())
+    cache.touch(referenced)
+
+    pending = sorted(pending)[:limit] if limit else sorted(pending)
+    stored = {}
+    results = []
+    to_fetch = []
+    for url in pending:
+        name = cache.lookup(url)
+        if name:
+            stored[url] = name
+        else:
+            to_fetch.append(url)
+    if to_fetch:
+        results = asyncio.run(mirror_urls(to_fetch, concurrency))
+        stored.update({result.url: result.name for result in results if result.name})
+        for result in results:
+            if result.error:
+                logger.info('Could not mirror %s: %s', result.url, result.error)
+
+    for model in _poster_models():
+        for url, name in stored.items():
+            model.objects.filter(poster_url=url, poster_mirror='').update(poster_mirror=name)
+        bump_content_version(model.objects.filter(poster_mirror__in=stored.values()).values('user_id'))
+
+    evicted = cache.evict()
+    if evicted:
+        for model in _poster_models():
+            bump_content_version(model.objects.filter(poster_mirror__in=evicted).values('user_id'))
+            model.objects.filter(poster_mirror__in=evicted).update(poster_mirror='')
+    return {
+        'mirrored': len(stored),
+        'failed': sum(1 for result in results if not result.name),
+        'evicted': len(evicted),
+    }
@@ -0,0 +1,180 @@
+"""Opt-in cProfile capture of individual production requests.
+
+``ProfilingMiddleware`` profiles a request when a staff user asks for it (an
+``X-Profile: 1`` header or a ``?profile=1`` query flag) or when it is picked by
+1-in-``PROFILE_SAMPLE_RATE`` random sampling (``0`` turns sampling off). The
+profile is written in pstats format to ``PROFILE_DIR``, named after the time,
+URL name, user bucket, query count and duration, and the directory is trimmed
+to the newest ``PROFILE_MAX_FILES`` files. Staff list and download them at
+``/staff/profiles/``.
+
+Requests that are not picked cost a header lookup and, with sampling on, one
+random number. Only one request per process is profiled at a time, because
+the interpreter allows a single active profiler; others run unprofiled.
+"""
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_FLAG = 'profile'
+RESPONSE_HEADER = 'X-Profile-Id'
+# 20260101T120000-123456-home-u07-q12-85ms.prof
+PROFILE_NAME = re.compile(r'^(?P<stamp>\d{8}T\d{6}-\d{6})-(?P<url_name>[\w-]+)-u(?P<bucket>\w+)-q(?P<queries>\d+)-(?P<ms>\d+)ms\.prof$')
+
+_active = threading.Lock()
+
+
+@dataclass(frozen=True)
+class SavedProfile:
+    name: str
+    url_name: str
+    user_bucket: str
+    queries: int
+    duration_ms: int
+    size: int
+    created_at: float
+
+
+def user_bucket(user) -> str:
+    """A coarse, stable bucket instead of the user id, so file names do not identify users."""
+    if not user.is_authenticated:
+        return 'anon'
+    digest = hashlib.sha256(f'{settings.SECRET_KEY}:{user.pk}'.encode()).digest()
+    return f'{digest[0] % settings.PROFILE_USER_BUCKETS:02d}'
+
+
+def _requested(request) -> bool:
+    if request.META.get(PROFILE_HEADER) != '1':
+        # Only parse the query string when the flag can be in it.
+        if PROFILE_QUERY_FLAG not in request.META.get('QUERY_STRING', '') or request.GET.get(PROFILE_QUERY_FLAG) != '1':
+            return False
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def _sampled() -> bool:
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.randrange(rate) == 0
+
+
+def _url_name(request) -> str:
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return 'unresolved'
+    return (match.url_name or 'unnamed').replace('_', '-')
+
+
+def save_profile(profiler: cProfile.Profile, url_name: str, bucket: str, queries: int, duration_ms: int) -> str:
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S-%f')
+    name = f'{stamp}-{url_name}-u{bucket}-q{queries}-{duration_ms}ms.prof'
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(handle)
+    try:
+        profiler.dump_stats(temp_path)
+        os.replace(temp_path, directory / name)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    trim_profiles(settings.PROFILE_MAX_FILES)
+    return name
+
+
+def list_profiles() -> list[SavedProfile]:
+    """Saved profiles, newest first."""
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        match = PROFILE_NAME.match(entry.name)
+        if not match or not entry.is_file():
+            continue
+        stat = entry.stat()
+        profiles.append(SavedProfile(
+            name=entry.name,
+            url_name=match['url_name'],
+            user_bucket=match['bucket'],
+            queries=int(match['queries']),
+            duration_ms=int(match['ms']),
+            size=stat.st_size,
+            created_at=stat.st_mtime,
+        ))
+    # Names start with a sortable timestamp.
+    return sorted(profiles, key=lambda profile: profile.name, reverse=True)
+
+
+def profile_path(name: str) -> Path | None:
+    """Path of a saved profile, or None when ``name`` is not one."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = Path(settings.PROFILE_DIR) / name
+    return path if path.is_file() else None
+
+
+def trim_profiles(keep: int) -> int:
+    removed = 0
+    for profile in list_profiles()[keep:]:
+        try:
+            os.unlink(Path(settings.PROFILE_DIR) / profile.name)
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (_requested(request) or _sampled()):
+            return self.get_response(request)
+        if not _active.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self._profile(request)
+        finally:
+            _active.release()
+
+    def _profile(self, request):
+        queries = 0
+
+        def count(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            # Every alias, so reads routed to a replica are counted too.
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(count))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        name = save_profile(profiler, _url_name(request), user_bucket(request.user), queries, duration_ms)
+        response[RESPONSE_HEADER] = name
+        return response
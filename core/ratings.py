@@ -0,0 +1,116 @@
+"""Incrementally maintained Bayesian-average ratings for catalog movies.
+
+``weighted_score = (C * m + sum) / (C + count)`` where the prior weight ``C``
+and prior mean ``m`` come from settings. Every change to a linked personal
+score is applied as a (count, sum) delta in a single UPDATE, so no request
+ever has to aggregate over all ratings.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast
+
+from .models import MovieRating, PersonalMovie
+
+
+def prior() -> tuple[float, float]:
+    return float(settings.RATING_PRIOR_WEIGHT), float(settings.RATING_PRIOR_MEAN)
+
+
+def bayesian_score(count: int, total) -> float:
+    weight, mean = prior()
+    return (weight * mean + float(total)) / (weight + count)
+
+
+def apply_rating_delta(movie_id: int, count_delta: int, sum_delta: Decimal) -> None:
+    if not movie_id or (not count_delta and not sum_delta):
+        return
+    weight, mean = prior()
+    with transaction.atomic():
+        MovieRating.objects.bulk_create([MovieRating(movie_id=movie_id, weighted_score=mean)], ignore_conflicts=True)
+        # The right-hand side sees the pre-update column values, so the score matches the new totals.
+        MovieRating.objects.filter(movie_id=movie_id).update(
+            rating_count=F('rating_count') + count_delta,
+            rating_sum=F('rating_sum') + sum_delta,
+            weighted_score=(
+                (Value(weight * mean) + Cast('rating_sum', FloatField()) + Value(float(sum_delta)))
+                / (Value(weight) + Cast('rating_count', FloatField()) + Value(float(count_delta)))
+            ),
+        )
+
+
+def apply_rating_deltas(deltas: dict[int, tuple[int, Decimal]]) -> None:
+    for movie_id, (count_delta, sum_delta) in deltas.items():
+        apply_rating_delta(movie_id, count_delta, sum_delta)
+
+
+def collect_rating_deltas(changes) -> dict[int, tuple[int, Decimal]]:
+    """Fold ``(old_movie_id, old_score, new_movie_id, new_score)`` changes into per-movie deltas."""
+    deltas: dict[int, list] = defaultdict(lambda: [0, Decimal('0')])
+    for old_movie_id, old_score, new_movie_id, new_score in changes:
+        if old_movie_id:
+            deltas[old_movie_id][0] -= 1
+            deltas[old_movie_id][1] -= Decimal(str(old_score))
+        if new_movie_id:
+            deltas[new_movie_id][0] += 1
+            deltas[new_movie_id][1] += Decimal(str(new_score))
+    return {movie_id: (count, total) for movie_id, (count, total) in deltas.items() if count or total}
+
+
+def reconcile(chunk_size: int = 1000, fix: bool = True) -> dict:
+    """Recompute aggregates from personal scores in movie-id chunks and repair drift."""
+    scanned = drifted = 0
+    last_movie_id = 0
+    while True:
+        movie_ids = list(
+            PersonalMovie.objects.filter(movie_id__gt=last_movie_id)
+            .order_by('movie_id')
+            .values_list('movie_id', flat=True)
+            .distinct()[:chunk_size]
+        )
+        stored_ids = list(
+            MovieRating.objects.filter(movie_id__gt=last_movie_id)
+            .order_by('movie_id')
+            .values_list('movie_id', flat=True)[:chunk_size]
+        )
+        if not movie_ids and not stored_ids:
+            break
+        upper = min(ids[-1] for ids in (movie_ids, stored_ids) if ids)
+
+        actual = {
+            row['movie_id']: (row['count'], row['total'])
+            for row in PersonalMovie.objects.filter(movie_id__gt=last_movie_id, movie_id__lte=upper)
+            .order_by()
+            .values('movie_id')
+            .annotate(count=Count('id'), total=Sum('score'))
+        }
+        stored = {
+            rating.movie_id: rating
+            for rating in MovieRating.objects.filter(movie_id__gt=last_movie_id, movie_id__lte=upper)
+        }
+
+        repairs = []
+        for movie_id in actual.keys() | stored.keys():
+            count, total = actual.get(movie_id, (0, Decimal('0')))
+            score = bayesian_score(count, total)
+            rating = stored.get(movie_id)
+            scanned += 1
+            if rating and rating.rating_count == count and rating.rating_sum == total and abs(rating.weighted_score - score) < 1e-9:
+                continue
+            drifted += 1
+            repairs.append(MovieRating(movie_id=movie_id, rating_count=count, rating_sum=total, weighted_score=score))
+
+        if fix and repairs:
+            MovieRating.objects.bulk_create(
+                repairs,
+                update_conflicts=True,
+                unique_fields=['movie'],
+                update_fields=['rating_count', 'rating_sum', 'weighted_score'],
+            )
+        last_movie_id = upper
+    return {'scanned': scanned, 'drifted': drifted}
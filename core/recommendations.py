@@ -0,0 +1,250 @@
+"""Offline item-item recommendations built from PersonalMovie scores.
+
+Ratings are streamed into a sparse user x title matrix (titles are matched on
+their normalized form), item neighbourhoods are computed in blocks across
+worker processes, and the top-N titles per user are stored in
+``MovieRecommendation`` so the home page needs a single primary-key read.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+from array import array
+from datetime import datetime
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from scipy import sparse
+
+from .models import MovieRecommendation, PersonalMovie
+from .titles import is_placeholder_title, normalize_title
+
+SIMILARITY_FILE = 'similarity.npz'
+TITLES_FILE = 'titles.json'
+
+_worker_state: dict = {}
+
+
+@dataclass
+class RatingMatrix:
+    user_ids: list[int]
+    keys: list[str]
+    labels: list[str]
+    matrix: sparse.csr_matrix
+
+
+def model_dir() -> Path:
+    return Path(settings.RECOMMENDATION_MODEL_DIR)
+
+
+def load_rating_matrix(chunk_size: int = 10000, user_ids=None, keys: list[str] | None = None) -> RatingMatrix:
+    """Stream ratings into a CSR matrix with scores scaled to 0..1.
+
+    When ``keys`` is given the title vocabulary is frozen and unknown titles are skipped.
+    """
+    frozen = keys is not None
+    keys = list(keys or [])
+    title_index = {key: index for index, key in enumerate(keys)}
+    labels: list[str] = []
+    user_index: dict[int, int] = {}
+    rows, cols, values = array('i'), array('i'), array('f')
+
+    queryset = PersonalMovie.objects.order_by().values_list('user_id', 'title', 'score')
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+
+    for user_id, title, score in queryset.iterator(chunk_size=chunk_size):
+        key = normalize_title(title)
+        if is_placeholder_title(key):
+            continue
+        col = title_index.get(key)
+        if col is None:
+            if frozen:
+                continue
+            col = title_index[key] = len(keys)
+            keys.append(key)
+            labels.append(title.strip())
+        rows.append(user_index.setdefault(user_id, len(user_index)))
+        cols.append(col)
+        values.append(float(score) / 100)
+
+    matrix = sparse.coo_matrix(
+        (np.array(values, dtype=np.float32), (np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32))),
+        shape=(len(user_index), len(keys)),
+    ).tocsr()
+    # Duplicate titles in one list are summed by the conversion; cap them at a full score.
+    np.minimum(matrix.data, 1, out=matrix.data)
+    return RatingMatrix(user_ids=list(user_index), keys=keys, labels=labels, matrix=matrix)
+
+
+def _init_worker(items: sparse.csr_matrix, neighbours: int) -> None:
+    _worker_state['items'] = items
+    _worker_state['neighbours'] = neighbours
+
+
+def _block_neighbours(bounds: tuple[int, int]):
+    start, stop = bounds
+    items = _worker_state['items']
+    limit = _worker_state['neighbours']
+    block = (items[start:stop] @ items.T).tocsr()
+
+    rows, cols, sims = [], [], []
+    for offset in range(stop - start):
+        lo, hi = block.indptr[offset], block.indptr[offset + 1]
+        neighbour_cols = block.indices[lo:hi]
+        values = block.data[lo:hi]
+        keep = neighbour_cols != start + offset
+        neighbour_cols, values = neighbour_cols[keep], values[keep]
+        if len(values) > limit:
+            top = np.argpartition(values, -limit)[-limit:]
+            neighbour_cols, values = neighbour_cols[top], values[top]
+        rows.append(np.full(len(values), start + offset, dtype=np.int32))
+        cols.append(neighbour_cols.astype(np.int32))
+        sims.append(values.astype(np.float32))
+
+    if not rows:
+        empty = np.array([], dtype=np.int32)
+        return empty, empty, np.array([], dtype=np.float32)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(sims)
+
+
+def compute_item_neighbours(
+    matrix: sparse.csr_matrix,
+    neighbours: int = 50,
+    workers: int | None = None,
+    block_size: int = 1000,
+) -> sparse.csr_matrix:
+    """Cosine similarity between title columns, keeping the top ``neighbours`` per title."""
+    items = matrix.T.tocsr().astype(np.float32)
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    items = (sparse.diags(1 / norms) @ items).tocsr()
+
+    item_count = items.shape[0]
+    blocks = [(start, min(start + block_size, item_count)) for start in range(0, item_count, block_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(blocks) > 1:
+        # Workers never touch the database; make sure they don't inherit live connections either.
+        connections.close_all()
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=_init_worker, initargs=(items, neighbours)) as pool:
+            parts = pool.map(_block_neighbours, blocks)
+    else:
+        _init_worker(items, neighbours)
+        parts = [_block_neighbours(bounds) for bounds in blocks]
+        _worker_state.clear()
+
+    if parts:
+        rows = np.concatenate([part[0] for part in parts])
+        cols = np.concatenate([part[1] for part in parts])
+        sims = np.concatenate([part[2] for part in parts])
+    else:
+        rows = cols = np.array([], dtype=np.int32)
+        sims = np.array([], dtype=np.float32)
+    return sparse.csr_matrix((sims, (rows, cols)), shape=(item_count, item_count))
+
+
+def score_users(matrix: sparse.csr_matrix, similarity: sparse.csr_matrix, labels: list[str], top_n: int) -> list[list[dict]]:
+    scores = (matrix @ similarity).tocsr()
+    results = []
+    for row in range(matrix.shape[0]):
+        lo, hi = scores.indptr[row], scores.indptr[row + 1]
+        cols, values = scores.indices[lo:hi], scores.data[lo:hi]
+        rated = matrix.indices[matrix.indptr[row]:matrix.indptr[row + 1]]
+        keep = (values > 0) & ~np.isin(cols, rated)
+        cols, values = cols[keep], values[keep]
+        if len(values) > top_n:
+            top = np.argpartition(values, -top_n)[-top_n:]
+            cols, values = cols[top], values[top]
+        order = np.argsort(-values, kind='stable')
+        results.append([
+            {'title': labels[col], 'score': round(float(value), 4)}
+            for col, value in zip(cols[order], values[order])
+        ])
+    return results
+
+
+def store_recommendations(user_ids: list[int], items: list[list[dict]], started: datetime) -> None:
+    """Store recommendations computed from ratings read at ``started`` or later."""
+    MovieRecommendation.objects.bulk_create(
+        [MovieRecommendation(user_id=user_id, items=user_items, is_stale=False) for user_id, user_items in zip(user_ids, items)],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['items', 'is_stale', 'computed_at'],
+        batch_size=1000,
+    )
+    # A list edited after the ratings were read was flagged meanwhile; the upsert must not clear that.
+    MovieRecommendation.objects.filter(user_id__in=user_ids, marked_stale_at__gte=started).update(is_stale=True)
+
+
+def _score_and_store(
+    ratings: RatingMatrix, similarity: sparse.csr_matrix, labels: list[str], top_n: int, chunk_size: int, started: datetime
+) -> int:
+    for start in range(0, len(ratings.user_ids), chunk_size):
+        stop = start + chunk_size
+        items = score_users(ratings.matrix[start:stop], similarity, labels, top_n)
+        store_recommendations(ratings.user_ids[start:stop], items, started)
+    return len(ratings.user_ids)
+
+
+def save_model(similarity: sparse.csr_matrix, keys: list[str], labels: list[str]) -> None:
+    directory = model_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    matrix_tmp = directory / f'{SIMILARITY_FILE}.tmp.npz'
+    titles_tmp = directory / f'{TITLES_FILE}.tmp'
+    sparse.save_npz(matrix_tmp, similarity)
+    titles_tmp.write_text(json.dumps({'keys': keys, 'labels': labels}), encoding='utf-8')
+    os.replace(matrix_tmp, directory / SIMILARITY_FILE)
+    os.replace(titles_tmp, directory / TITLES_FILE)
+
+
+def load_model() -> tuple[sparse.csr_matrix, list[str], list[str]]:
+    directory = model_dir()
+    similarity = sparse.load_npz(directory / SIMILARITY_FILE).tocsr()
+    titles = json.loads((directory / TITLES_FILE).read_text(encoding='utf-8'))
+    return similarity, titles['keys'], titles['labels']
+
+
+def build_all(neighbours: int = 50, top_n: int = 10, workers: int | None = None, chunk_size: int = 5000) -> dict:
+    started = timezone.now()
+    ratings = load_rating_matrix(chunk_size=chunk_size)
+    similarity = compute_item_neighbours(ratings.matrix, neighbours=neighbours, workers=workers)
+    save_model(similarity, ratings.keys, ratings.labels)
+    users = _score_and_store(ratings, similarity, ratings.labels, top_n, chunk_size, started)
+    removed, _ = MovieRecommendation.objects.filter(computed_at__lt=started, is_stale=False).delete()
+    return {
+        'users': users,
+        'titles': len(ratings.keys),
+        'ratings': ratings.matrix.nnz,
+        'similarities': similarity.nnz,
+        'removed': removed,
+    }
+
+
+def refresh_stale(top_n: int = 10, chunk_size: int = 5000) -> dict:
+    similarity, keys, labels = load_model()
+    refreshed = 0
+    last_user_id = None
+    while True:
+        stale = MovieRecommendation.objects.filter(is_stale=True).order_by('user_id')
+        if last_user_id is not None:
+            stale = stale.filter(user_id__gt=last_user_id)
+        user_ids = list(stale.values_list('user_id', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        started = timezone.now()
+        ratings = load_rating_matrix(chunk_size=chunk_size, user_ids=user_ids, keys=keys)
+        _score_and_store(ratings, similarity, labels, top_n, chunk_size, started)
+        unrated = sorted(set(user_ids) - set(ratings.user_ids))
+        store_recommendations(unrated, [[] for _ in unrated], started)
+        refreshed += len(user_ids)
+    return {'users': refreshed, 'titles': len(keys)}
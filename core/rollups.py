@@ -0,0 +1,139 @@
+"""Hourly/daily vote rollups for trending lists and history charts.
+
+Each vote increments one hourly bucket as it is cast. ``compact`` later folds
+hourly buckets older than the retention window into daily buckets, so a range
+query touches at most one row per hour of recent history and one row per day
+beyond it, never the raw vote tables. Hourly and daily buckets never overlap.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import ActorVoteBucket, MovieVoteBucket, VoteBucket
+
+ROLLUPS = {
+    'movie': (MovieVoteBucket, 'movie_id'),
+    'actor': (ActorVoteBucket, 'actor_id'),
+}
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _increment(model, lookup: dict, amount: int) -> None:
+    if model.objects.filter(**lookup).update(vote_count=F('vote_count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(vote_count=amount, **lookup)
+    except IntegrityError:
+        # Another request created the bucket between our UPDATE and INSERT.
+        model.objects.filter(**lookup).update(vote_count=F('vote_count') + amount)
+
+
+def record_vote(kind: str, target_id: int, voted_at: datetime | None = None, amount: int = 1) -> None:
+    model, field = ROLLUPS[kind]
+    bucket_start = hour_start(voted_at or timezone.now())
+    _increment(model, {field: target_id, 'granularity': VoteBucket.HOURLY, 'bucket_start': bucket_start}, amount)
+
+
+def record_votes(kind: str, target_ids, voted_at: datetime | None = None) -> None:
+    """Add one vote to the current hourly bucket of each target with two set-based statements."""
+    target_ids = list(target_ids)
+    if not target_ids:
+        return
+    model, field = ROLLUPS[kind]
+    lookup = {'granularity': VoteBucket.HOURLY, 'bucket_start': hour_start(voted_at or timezone.now())}
+    with transaction.atomic():
+        model.objects.bulk_create(
+            [model(vote_count=0, **{field: target_id}, **lookup) for target_id in target_ids],
+            ignore_conflicts=True,
+        )
+        model.objects.filter(**{f'{field}__in': target_ids}, **lookup).update(vote_count=F('vote_count') + 1)
+
+
+def _buckets(kind: str, start: datetime, end: datetime):
+    model, _ = ROLLUPS[kind]
+    return model.objects.filter(
+        granularity__in=[VoteBucket.HOURLY, VoteBucket.DAILY],
+        bucket_start__gte=start,
+        bucket_start__lt=end,
+    )
+
+
+def vote_series(kind: str, target_id: int, start: datetime, end: datetime, granularity: str = VoteBucket.DAILY) -> list[tuple[datetime, int]]:
+    _, field = ROLLUPS[kind]
+    series: dict[datetime, int] = defaultdict(int)
+    rows = _buckets(kind, start, end).filter(**{field: target_id}).values_list('bucket_start', 'vote_count')
+    for bucket_start, vote_count in rows:
+        key = day_start(bucket_start) if granularity == VoteBucket.DAILY else bucket_start
+        series[key] += vote_count
+    return sorted(series.items())
+
+
+def top_between(kind: str, start: datetime, end: datetime, limit: int = 20) -> list[tuple[int, int]]:
+    """The ``limit`` most voted targets in ``[start, end)`` as ``(id, votes)``, most votes first."""
+    _, field = ROLLUPS[kind]
+    rows = (
+        _buckets(kind, start, end)
+        .order_by()
+        .values(field)
+        .annotate(total=Sum('vote_count'))
+        .order_by('-total', field)[:limit]
+    )
+    return [(row[field], row['total']) for row in rows]
+
+
+def compact(
+    kind: str,
+    hourly_retention: timedelta,
+    daily_retention: timedelta | None = None,
+    chunk_size: int = 5000,
+    now: datetime | None = None,
+) -> dict:
+    model, field = ROLLUPS[kind]
+    now = now or timezone.now()
+    cutoff = day_start(now - hourly_retention)
+    folded = expired = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                model.objects.select_for_update()
+                .filter(granularity=VoteBucket.HOURLY, bucket_start__lt=cutoff)
+                .order_by('id')
+                .values_list('id', field, 'bucket_start', 'vote_count')[:chunk_size]
+            )
+            if not rows:
+                break
+            totals: dict[tuple[int, datetime], int] = defaultdict(int)
+            for _, target_id, bucket_start, vote_count in rows:
+                totals[(target_id, day_start(bucket_start))] += vote_count
+            for (target_id, day), vote_count in totals.items():
+                _increment(model, {field: target_id, 'granularity': VoteBucket.DAILY, 'bucket_start': day}, vote_count)
+            model.objects.filter(id__in=[row[0] for row in rows]).delete()
+            folded += len(rows)
+
+    if daily_retention is not None:
+        expired_before = day_start(now - daily_retention)
+        while True:
+            ids = list(
+                model.objects.filter(granularity=VoteBucket.DAILY, bucket_start__lt=expired_before)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            expired += model.objects.filter(id__in=ids).delete()[0]
+
+    return {'folded': folded, 'expired': expired}
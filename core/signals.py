@@ -0,0 +1,165 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .content_version import bump_content_version
+from .models import MovieRecommendation, PersonalActor, PersonalMovie
+from .poster_mirror import mirror_name
+from .ratings import apply_rating_deltas, collect_rating_deltas
+from .summaries import apply_summary_delta, kind_of
+from .title_matching import link_personal_movie
+
+RATING_FIELDS = ('movie_id', 'score')
+
+
+@receiver(pre_save, sender=PersonalMovie)
+def link_personal_movie_to_catalog(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or update_fields is not None or instance.movie_id is not None:
+        return
+    link_personal_movie(instance)
+
+
+@receiver(pre_save, sender=PersonalMovie)
+def remember_stored_rating(sender, instance, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if raw or instance._state.adding or all(field in loaded for field in RATING_FIELDS):
+        return
+    stored = PersonalMovie.objects.filter(pk=instance.pk).values(*RATING_FIELDS).first()
+    instance._loaded_values = {**loaded, **(stored or {})}
+
+
+@receiver(post_save, sender=PersonalMovie)
+def update_movie_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    change = (loaded.get('movie_id'), loaded.get('score'), instance.movie_id, instance.score)
+    if created:
+        change = (None, None, instance.movie_id, instance.score)
+    apply_rating_deltas(collect_rating_deltas([change]))
+    instance._loaded_values = {**loaded, 'movie_id': instance.movie_id, 'score': instance.score}
+
+
+@receiver(post_delete, sender=PersonalMovie)
+def update_movie_rating_on_delete(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    movie_id = loaded.get('movie_id', instance.movie_id)
+    score = loaded.get('score', instance.score)
+    apply_rating_deltas(collect_rating_deltas([(movie_id, score, None, None)]))
+
+
+@receiver(post_save, sender=PersonalMovie)
+def mark_recommendations_stale_on_save(sender, instance, **kwargs):
+    MovieRecommendation.objects.bulk_create(
+        [MovieRecommendation(user_id=instance.user_id, is_stale=True, marked_stale_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['is_stale', 'marked_stale_at'],
+    )
+
+
+@receiver(post_delete, sender=PersonalMovie)
+def mark_recommendations_stale_on_delete(sender, instance, **kwargs):
+    # Only flag an existing row: during a user cascade the user row is about to go away.
+    MovieRecommendation.objects.filter(user_id=instance.user_id).update(is_stale=True, marked_stale_at=timezone.now())
+
+
+@receiver(pre_save, sender=PersonalMovie)
+@receiver(pre_save, sender=PersonalActor)
+def record_poster_size(sender, instance, raw=False, **kwargs):
+    # Keeps per-user poster quota checks to one SUM instead of a storage lookup per file.
+    if raw:
+        return
+    poster = instance.poster_image
+    if not poster:
+        instance.poster_size = 0
+    elif not poster._committed:
+        instance.poster_size = poster.size
+
+
+@receiver(pre_save, sender=PersonalMovie)
+@receiver(pre_save, sender=PersonalActor)
+def release_replaced_poster(sender, instance, raw=False, **kwargs):
+    poster = instance.poster_image
+    if raw or instance._state.adding or (poster and poster._committed):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('poster_image', flat=True).first()
+    if previous and previous != poster.name:
+        transaction.on_commit(lambda: poster.storage.release(previous))
+
+
+@receiver(post_delete, sender=PersonalMovie)
+@receiver(post_delete, sender=PersonalActor)
+def release_deleted_poster(sender, instance, **kwargs):
+    # Also runs for cascades (a deleted user); shared blobs go with their last reference.
+    poster = instance.poster_image
+    if poster and poster.name:
+        name = poster.name
+        transaction.on_commit(lambda: poster.storage.release(name))
+
+
+@receiver(pre_save, sender=PersonalMovie)
+@receiver(pre_save, sender=PersonalActor)
+def reset_stale_poster_mirror(sender, instance, raw=False, **kwargs):
+    if instance.poster_mirror and not instance.poster_mirror.startswith(mirror_name(instance.poster_url)):
+        instance.poster_mirror = ''
+
+
+@receiver(pre_save, sender=PersonalMovie)
+@receiver(pre_save, sender=PersonalActor)
+def remember_summary_score(sender, instance, raw=False, **kwargs):
+    instance._summary_previous = None
+    if raw or instance._state.adding:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if 'user_id' not in loaded or 'score' not in loaded:
+        loaded = {**loaded, **(sender.objects.filter(pk=instance.pk).values('user_id', 'score').first() or {})}
+        instance._loaded_values = loaded
+    if 'user_id' in loaded:
+        instance._summary_previous = (loaded['user_id'], loaded['score'])
+
+
+@receiver(post_save, sender=PersonalMovie)
+@receiver(post_save, sender=PersonalActor)
+def update_list_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    kind = kind_of(sender)
+    score = Decimal(str(instance.score))
+    previous = None if created else getattr(instance, '_summary_previous', None)
+    if previous is None:
+        apply_summary_delta(kind, instance.user_id, 1, score)
+    elif previous[0] != instance.user_id:
+        apply_summary_delta(kind, previous[0], -1, -Decimal(str(previous[1])), create=False)
+        apply_summary_delta(kind, instance.user_id, 1, score)
+    else:
+        apply_summary_delta(kind, instance.user_id, 0, score - Decimal(str(previous[1])))
+    instance._loaded_values = {**(getattr(instance, '_loaded_values', None) or {}), 'user_id': instance.user_id, 'score': instance.score}
+
+
+@receiver(post_delete, sender=PersonalMovie)
+@receiver(post_delete, sender=PersonalActor)
+def update_list_summary_on_delete(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    score = Decimal(str(loaded.get('score', instance.score)))
+    # Only adjust an existing row: during a user cascade the user row is about to go away.
+    apply_summary_delta(kind_of(sender), instance.user_id, -1, -score, create=False)
+
+
+@receiver(post_save, sender=PersonalMovie)
+@receiver(post_save, sender=PersonalActor)
+@receiver(post_delete, sender=PersonalMovie)
+@receiver(post_delete, sender=PersonalActor)
+def bump_content_version_on_entry_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_content_version([instance.user_id])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_content_version_on_profile_change(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        bump_content_version([instance.pk])
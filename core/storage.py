@@ -0,0 +1,103 @@
+"""Content-addressed poster storage.
+
+Every poster is stored once under the SHA-256 of its bytes
+(``posters/blobs/ab/cd/<digest>.jpg``), whatever name it was uploaded with. A
+``PosterBlob`` row counts the ``PersonalMovie``/``PersonalActor`` rows pointing at
+each blob; saving takes a reference and ``release`` drops one, deleting the file
+only when the last reference is gone. Both sides lock the blob row, so a release
+can never delete a file that a concurrent upload has just claimed.
+
+Blob names never change content, so their URLs can be cached forever.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+from .uploads import PNG_MAGIC
+
+BLOB_PREFIX = 'posters/blobs/'
+
+
+def blob_name(digest: str, extension: str) -> str:
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob_name(name: str) -> bool:
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save, so never rename to avoid collisions.
+        return name
+
+    def _save(self, name, content):
+        from .models import PosterBlob
+
+        directory = os.path.join(self.location, BLOB_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        head = b''
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if not head:
+                        head = chunk[:len(PNG_MAGIC)]
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            name = blob_name(digest, '.png' if head == PNG_MAGIC else '.jpg')
+            with transaction.atomic():
+                blob, created = PosterBlob.objects.select_for_update().get_or_create(
+                    digest=digest,
+                    defaults={'name': name, 'size': size, 'ref_count': 0},
+                )
+                path = self.path(blob.name)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+                blob.ref_count += 1
+                blob.save(update_fields=['ref_count'])
+            return blob.name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def release(self, name: str) -> None:
+        """Drop one reference to ``name``; delete the file once nothing refers to it."""
+        from .models import PosterBlob
+
+        if not is_blob_name(name):
+            if self.exists(name):
+                self.delete(name)
+            return
+        with transaction.atomic():
+            blob = PosterBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.ref_count > 1:
+                blob.ref_count -= 1
+                blob.save(update_fields=['ref_count'])
+                return
+            blob.delete()
+            if self.exists(name):
+                self.delete(name)
+
+
+def get_poster_storage() -> ContentAddressedStorage:
+    return poster_storage
+
+
+poster_storage = ContentAddressedStorage()
@@ -0,0 +1,141 @@
+"""Per-user list summaries for the home page hero boxes.
+
+``UserListSummary`` keeps, for every user, the number of personal movies and
+actors, the sum of their scores and the top-ranked entry of each list. Saves and
+deletes apply a (count, sum) delta and re-pick the top entry with one indexed
+query, under a lock on the summary row so concurrent writes of the same user
+serialize. Paths that skip model signals (``bulk_create``, ``QuerySet.update``)
+call ``refresh_summaries`` for the users they touched, and ``rebuild`` repairs
+any drift from the personal rows.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+
+from .content_version import bump_content_version
+from .models import PersonalActor, PersonalMovie, UserListSummary
+
+# kind -> (model, count field, sum field, top field)
+LISTS = {
+    'movie': (PersonalMovie, 'movie_count', 'movie_score_sum', 'top_movie_id'),
+    'actor': (PersonalActor, 'actor_count', 'actor_score_sum', 'top_actor_id'),
+}
+SUMMARY_FIELDS = ['movie_count', 'movie_score_sum', 'top_movie', 'actor_count', 'actor_score_sum', 'top_actor']
+
+
+def kind_of(model) -> str:
+    return 'movie' if model is PersonalMovie else 'actor'
+
+
+def top_entry_id(model, user_id: int) -> int | None:
+    return model.objects.filter(user_id=user_id).order_by(*model._meta.ordering).values_list('pk', flat=True).first()
+
+
+def apply_summary_delta(kind: str, user_id: int, count_delta: int, sum_delta: Decimal, create: bool = True) -> None:
+    """Adjust one list of ``user_id``'s summary and re-pick its top entry."""
+    model, count_field, sum_field, top_field = LISTS[kind]
+    with transaction.atomic():
+        if create and not UserListSummary.objects.filter(user_id=user_id).exists():
+            # First summary of this user: count the lists, which already include this change.
+            refresh_summaries([user_id])
+            return
+        # Lock the row so concurrent writes by the same user see each other's entries when picking the top.
+        if not UserListSummary.objects.select_for_update().filter(user_id=user_id).exists():
+            return
+        UserListSummary.objects.filter(user_id=user_id).update(**{
+            count_field: F(count_field) + count_delta,
+            sum_field: F(sum_field) + sum_delta,
+            top_field: top_entry_id(model, user_id),
+        })
+
+
+def summarize(user_ids) -> dict[int, UserListSummary]:
+    """Compute fresh summaries for ``user_ids`` with set-based aggregate queries."""
+    user_ids = list(user_ids)
+    summaries = {user_id: UserListSummary(user_id=user_id) for user_id in user_ids}
+    tops = get_user_model().objects.filter(pk__in=user_ids)
+    for kind, (model, count_field, sum_field, top_field) in LISTS.items():
+        rows = (
+            model.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values('user_id')
+            .annotate(count=Count('id'), total=Sum('score'))
+        )
+        for row in rows:
+            setattr(summaries[row['user_id']], count_field, row['count'])
+            setattr(summaries[row['user_id']], sum_field, row['total'])
+        ranked = model.objects.filter(user_id=OuterRef('pk')).order_by(*model._meta.ordering).values('pk')[:1]
+        tops = tops.annotate(**{top_field: Subquery(ranked)})
+    for row in tops.values('pk', *(top_field for *_, top_field in LISTS.values())):
+        for *_, top_field in LISTS.values():
+            setattr(summaries[row['pk']], top_field, row[top_field])
+    return summaries
+
+
+def refresh_summaries(user_ids) -> None:
+    """Recompute and store the summaries of ``user_ids``; for bulk writes that bypass signals."""
+    summaries = summarize(set(user_ids))
+    if not summaries:
+        return
+    with transaction.atomic():
+        UserListSummary.objects.bulk_create(
+            summaries.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=SUMMARY_FIELDS,
+        )
+
+
+def get_summary(user) -> UserListSummary:
+    """The user's summary with both top entries loaded in the same query, computed if missing."""
+    summary = UserListSummary.objects.select_related('top_movie__country', 'top_actor__country').filter(user=user).first()
+    if summary is None:
+        # Not stored yet (no entries saved so far, or a replica behind the primary). Compute it
+        # without saving: a write from a page view would pin the rest of the request to the primary.
+        summary = summarize([user.pk])[user.pk]
+        for model, *_, top_field in LISTS.values():
+            entry_id = getattr(summary, top_field)
+            if entry_id is not None:
+                setattr(summary, top_field.removesuffix('_id'), model.objects.select_related('country').filter(pk=entry_id).first())
+    return summary
+
+
+def _matches(stored: UserListSummary, fresh: UserListSummary) -> bool:
+    return all(
+        getattr(stored, field) == getattr(fresh, field)
+        for field in ('movie_count', 'movie_score_sum', 'top_movie_id', 'actor_count', 'actor_score_sum', 'top_actor_id')
+    )
+
+
+def rebuild(chunk_size: int = 1000, fix: bool = True) -> dict:
+    """Recompute summaries in user-id chunks and repair rows that drifted."""
+    scanned = drifted = 0
+    last_user_id = 0
+    users = get_user_model().objects.order_by('pk')
+    while True:
+        user_ids = list(users.filter(pk__gt=last_user_id).values_list('pk', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        fresh = summarize(user_ids)
+        stored = UserListSummary.objects.in_bulk(user_ids)
+        repairs = []
+        for user_id, summary in fresh.items():
+            scanned += 1
+            if user_id in stored and _matches(stored[user_id], summary):
+                continue
+            drifted += 1
+            repairs.append(summary)
+        if fix and repairs:
+            UserListSummary.objects.bulk_create(
+                repairs,
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=SUMMARY_FIELDS,
+            )
+            bump_content_version([summary.user_id for summary in repairs])
+        last_user_id = user_ids[-1]
+    return {'scanned': scanned, 'drifted': drifted}
@@ -0,0 +1,252 @@
+"""Link free-text PersonalMovie titles to canonical Movie rows.
+
+Catalog titles are normalized and indexed by character trigrams; a personal
+title is compared only against catalog entries sharing its rarest trigrams
+(blocking) and accepted when the Dice similarity clears a threshold.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import connections, transaction
+from django.db.models import Count, Max
+
+from .models import Movie, PersonalMovie
+from .ratings import apply_rating_deltas, collect_rating_deltas
+from .titles import is_placeholder_title, normalize_title, split_title_year, title_ngrams
+
+DEFAULT_THRESHOLD = 0.75
+MAX_CANDIDATES = 50
+MAX_POSTING_LENGTH = 5000
+BLOCKING_GRAMS = 4
+INDEX_TTL_SECONDS = 300
+
+logger = logging.getLogger(__name__)
+
+_catalog_cache: dict = {}
+_catalog_lock = threading.Lock()
+_worker_state: dict = {}
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    movie_id: int
+    score: float
+
+
+class TitleIndex:
+    def __init__(self) -> None:
+        self.exact: dict[str, list[int]] = defaultdict(list)
+        self.postings: dict[str, list[int]] = defaultdict(list)
+        self.grams: dict[int, frozenset[str]] = {}
+        self.years: dict[int, int | None] = {}
+
+    @classmethod
+    def from_rows(cls, rows) -> TitleIndex:
+        index = cls()
+        for movie_id, title in rows:
+            index.add(movie_id, title)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.grams)
+
+    def add(self, movie_id: int, title: str) -> None:
+        bare_title, year = split_title_year(title)
+        key = normalize_title(bare_title)
+        if is_placeholder_title(key):
+            return
+        grams = title_ngrams(key)
+        self.exact[key].append(movie_id)
+        self.grams[movie_id] = grams
+        self.years[movie_id] = year
+        for gram in grams:
+            self.postings[gram].append(movie_id)
+
+    def _year_factor(self, movie_id: int, year: int | None) -> float:
+        catalog_year = self.years.get(movie_id)
+        if year is None or catalog_year is None:
+            return 1.0
+        return 1.0 if abs(catalog_year - year) <= 1 else 0.8
+
+    def match(self, title: str, year: int | None = None, threshold: float = DEFAULT_THRESHOLD) -> TitleMatch | None:
+        bare_title, title_year = split_title_year(title)
+        year = title_year or year
+        key = normalize_title(bare_title)
+        if is_placeholder_title(key):
+            return None
+
+        exact = self.exact.get(key)
+        if exact:
+            best = max(exact, key=lambda movie_id: self._year_factor(movie_id, year))
+            return TitleMatch(best, self._year_factor(best, year))
+
+        grams = title_ngrams(key)
+        # Block on the rarest trigrams only; common ones ("the", " a ") do not narrow the search.
+        postings = sorted(
+            (posting for posting in map(self.postings.get, grams) if posting and len(posting) <= MAX_POSTING_LENGTH),
+            key=len,
+        )
+        shared: Counter = Counter()
+        for posting in postings[:BLOCKING_GRAMS]:
+            shared.update(posting)
+
+        best_match = None
+        for movie_id, _ in shared.most_common(MAX_CANDIDATES):
+            candidate_grams = self.grams[movie_id]
+            score = 2 * len(grams & candidate_grams) / (len(grams) + len(candidate_grams))
+            score *= self._year_factor(movie_id, year)
+            if score >= threshold and (best_match is None or score > best_match.score):
+                best_match = TitleMatch(movie_id, score)
+        return best_match
+
+
+def build_catalog_index() -> TitleIndex:
+    rows = Movie.objects.order_by().values_list('id', 'title').iterator(chunk_size=10000)
+    return TitleIndex.from_rows(rows)
+
+
+def _catalog_version() -> dict:
+    # Count and last id catch additions and deletions, the latest update catches renamed titles.
+    return Movie.objects.order_by().aggregate(count=Count('id'), last_id=Max('id'), updated_at=Max('updated_at'))
+
+
+def refresh_catalog_index() -> TitleIndex:
+    """Build the process-wide index now; run at worker warm-up and from the background rebuild."""
+    version = _catalog_version()
+    index = build_catalog_index()
+    with _catalog_lock:
+        _catalog_cache.update(index=index, version=version, checked_at=time.monotonic())
+    return index
+
+
+def _rebuild_in_background() -> None:
+    try:
+        refresh_catalog_index()
+    except Exception:
+        logger.exception('Rebuilding the title index failed; keeping the previous one.')
+    finally:
+        with _catalog_lock:
+            _catalog_cache['building'] = False
+        # This thread's connection would otherwise stay open until the process exits.
+        connections.close_all()
+
+
+def get_catalog_index() -> TitleIndex | None:
+    """Process-wide index for on-save linking, or None until the first build has finished.
+
+    At most every ``INDEX_TTL_SECONDS`` the catalog version is compared with the
+    one the index was built from; when titles were added, removed or edited the
+    index is rebuilt in a background thread while the current one keeps serving,
+    so no request ever waits for a build.
+    """
+    now = time.monotonic()
+    with _catalog_lock:
+        if 'checked_at' in _catalog_cache and now - _catalog_cache['checked_at'] < INDEX_TTL_SECONDS:
+            return _catalog_cache.get('index')
+        _catalog_cache['checked_at'] = now
+    version = _catalog_version()
+    with _catalog_lock:
+        if _catalog_cache.get('version') != version and not _catalog_cache.get('building'):
+            _catalog_cache['building'] = True
+            threading.Thread(target=_rebuild_in_background, name='title-index', daemon=True).start()
+        return _catalog_cache.get('index')
+
+
+def link_personal_movie(personal_movie: PersonalMovie, threshold: float = DEFAULT_THRESHOLD) -> TitleMatch | None:
+    index = get_catalog_index()
+    if index is None:
+        # Not built yet in this process; link_personal_movies picks the entry up later.
+        return None
+    match = index.match(personal_movie.title, personal_movie.production_year, threshold)
+    personal_movie.movie_id = match.movie_id if match else None
+    return match
+
+
+def _init_worker(index: TitleIndex, threshold: float) -> None:
+    _worker_state['index'] = index
+    _worker_state['threshold'] = threshold
+
+
+def _match_chunk(rows):
+    index = _worker_state['index']
+    threshold = _worker_state['threshold']
+    matches = []
+    for entry_id, title, year, *_ in rows:
+        match = index.match(title, year, threshold)
+        matches.append((entry_id, match.movie_id if match else None))
+    return matches
+
+
+def _iter_unlinked_chunks(chunk_size: int, relink: bool):
+    queryset = PersonalMovie.objects.order_by('id')
+    if not relink:
+        queryset = queryset.filter(movie__isnull=True)
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list('id', 'title', 'production_year', 'movie_id', 'score')[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def _store_matches(rows, matches, relink: bool) -> int:
+    stored = {entry_id: (movie_id, score) for entry_id, _, _, movie_id, score in rows}
+    # A relink also clears entries that no longer match anything.
+    changed = [
+        (entry_id, movie_id)
+        for entry_id, movie_id in matches
+        if (relink or movie_id) and movie_id != stored[entry_id][0]
+    ]
+    with transaction.atomic():
+        PersonalMovie.objects.bulk_update(
+            [PersonalMovie(id=entry_id, movie_id=movie_id) for entry_id, movie_id in changed],
+            ['movie'],
+            batch_size=1000,
+        )
+        # bulk_update skips the model signals, so carry the linked scores over explicitly.
+        apply_rating_deltas(collect_rating_deltas(
+            (*stored[entry_id], movie_id, stored[entry_id][1]) for entry_id, movie_id in changed
+        ))
+    return sum(1 for _, movie_id in changed if movie_id)
+
+
+def link_all(workers: int = 1, chunk_size: int = 5000, threshold: float = DEFAULT_THRESHOLD, relink: bool = False) -> dict:
+    started = time.perf_counter()
+    index = build_catalog_index()
+    processed = linked = 0
+
+    if workers > 1:
+        connections.close_all()
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+        with context.Pool(workers, initializer=_init_worker, initargs=(index, threshold)) as pool:
+            # Chunks are read and written by the parent so workers stay database-free.
+            pending = []
+            for rows in _iter_unlinked_chunks(chunk_size, relink):
+                processed += len(rows)
+                pending.append((rows, pool.apply_async(_match_chunk, (rows,))))
+                if len(pending) >= workers * 2:
+                    done_rows, result = pending.pop(0)
+                    linked += _store_matches(done_rows, result.get(), relink)
+            for done_rows, result in pending:
+                linked += _store_matches(done_rows, result.get(), relink)
+    else:
+        _init_worker(index, threshold)
+        for rows in _iter_unlinked_chunks(chunk_size, relink):
+            processed += len(rows)
+            linked += _store_matches(rows, _match_chunk(rows), relink)
+        _worker_state.clear()
+
+    return {
+        'catalog': len(index),
+        'processed': processed,
+        'linked': linked,
+        'seconds': time.perf_counter() - started,
+    }
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+
+LEADING_ARTICLES = {'the', 'a', 'an'}
+PLACEHOLDER_TITLES = {'untitled movie'}
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_YEAR_SUFFIX = re.compile(r'\s*[\(\[]\s*((?:18|19|20)\d{2})\s*[\)\]]\s*$')
+
+
+def split_title_year(title: str) -> tuple[str, int | None]:
+    """Strip a trailing year hint such as ``Heat (1995)`` and return it separately."""
+    value = (title or '').strip()
+    match = _YEAR_SUFFIX.search(value)
+    if not match or match.start() == 0:
+        return value, None
+    return value[:match.start()], int(match.group(1))
+
+
+def normalize_title(title: str) -> str:
+    value = unicodedata.normalize('NFKD', title or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    words = _NON_WORD.sub(' ', value.casefold()).split()
+    if len(words) > 1 and words[0] in LEADING_ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+
+def is_placeholder_title(normalized_title: str) -> bool:
+    return not normalized_title or normalized_title in PLACEHOLDER_TITLES
+
+
+def title_ngrams(normalized_title: str, size: int = 3) -> frozenset[str]:
+    padded = f' {normalized_title} '
+    if len(padded) <= size:
+        return frozenset({padded})
+    return frozenset(padded[index:index + size] for index in range(len(padded) - size + 1))
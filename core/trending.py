@@ -0,0 +1,73 @@
+"""Exponentially time-decayed "trending" scores kept in log space.
+
+A vote cast at time ``t`` contributes ``exp(-lambda * (now - t))`` to an item's
+heat. Factoring out ``now`` leaves ``exp(lambda * (t - EPOCH))``, which never
+changes after the vote, so each item stores ``log(sum(exp(lambda * (t_i - EPOCH))))``
+and a new vote is a single log-add-exp UPDATE. Because ``now`` is common to
+every item, ordering by the stored column is ordering by current heat.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+EMPTY_SCORE = 0.0
+# exp() below this is negligible, and Postgres raises on underflow instead of returning 0.
+MIN_EXPONENT = -30.0
+
+
+def decay_rate() -> float:
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def vote_weight(moment: datetime) -> float:
+    return decay_rate() * (moment - EPOCH).total_seconds()
+
+
+def log_add_exp(a: float, b: float) -> float:
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(max(low - high, MIN_EXPONENT)))
+
+
+def score_after_votes(voted_at: datetime, count: int = 1, column: str = 'trending_score'):
+    """Expression adding ``count`` votes cast at ``voted_at`` to ``column``."""
+    weight = Value(vote_weight(voted_at) + math.log(count), output_field=FloatField())
+    return Greatest(F(column), weight) + Ln(
+        Value(1.0) + Exp(Greatest(-Abs(F(column) - weight), Value(MIN_EXPONENT)))
+    )
+
+
+def heat(score: float, now: datetime | None = None) -> float:
+    """Decayed vote-equivalents for a stored score."""
+    return math.exp(min(score - vote_weight(now or timezone.now()), 700.0))
+
+
+def trending_floor(now: datetime | None = None) -> float:
+    """Stored score below which an item has less than ``TRENDING_MIN_HEAT`` left."""
+    return vote_weight(now or timezone.now()) + math.log(settings.TRENDING_MIN_HEAT)
+
+
+def trending(queryset, limit: int = 20, now: datetime | None = None) -> list:
+    now = now or timezone.now()
+    items = list(queryset.filter(trending_score__gt=trending_floor(now)).order_by('-trending_score')[:limit])
+    for item in items:
+        item.heat = heat(item.trending_score, now)
+    return items
+
+
+def score_from_buckets(buckets) -> float:
+    """Rebuild a score from ``(bucket_start, granularity, vote_count)`` rollup rows."""
+    score = None
+    for bucket_start, granularity, vote_count in buckets:
+        if not vote_count:
+            continue
+        span = timedelta(days=1) if granularity == 'd' else timedelta(hours=1)
+        weight = vote_weight(bucket_start + span / 2) + math.log(vote_count)
+        score = weight if score is None else log_add_exp(score, weight)
+    return EMPTY_SCORE if score is None else score
@@ -0,0 +1,196 @@
+"""Streaming validation for poster uploads.
+
+``PosterUploadHandler`` sits in front of Django's ``TemporaryFileUploadHandler``,
+so poster bytes go straight to a temporary file on disk and never accumulate in
+worker memory. While the chunks stream past it checks the magic bytes and the
+image dimensions from the header, and enforces the per-file and per-user byte
+limits. A failing file is dropped mid-stream with ``SkipFile`` and the reason is
+recorded on the request for ``report_rejected_uploads`` to attach to the form.
+"""
+from __future__ import annotations
+
+import struct
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.db.models import Sum
+
+POSTER_FIELD = 'poster_image'
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+JPEG_MAGIC = b'\xff\xd8\xff'
+# Start-of-frame markers carry the dimensions; C4, C8 and CC share the range but are not frames.
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+# Header bytes scanned for the frame size before giving up; skipped segments are never buffered.
+MAX_HEADER_SCAN = 1024 * 1024
+
+
+class UploadRejected(Exception):
+    pass
+
+
+class ImageHeaderSniffer:
+    """Incrementally read the format and dimensions of a PNG or JPEG from its first chunks."""
+
+    def __init__(self):
+        self.kind = None
+        self.width = None
+        self.height = None
+        self._buffer = bytearray()
+        self._skip = 0
+        self._scanned = 0
+
+    @property
+    def done(self) -> bool:
+        return self.width is not None
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done:
+            return
+        self._scanned += len(chunk)
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            self._skip -= skipped
+            chunk = chunk[skipped:]
+        self._buffer += chunk
+        if self.kind is None:
+            self._detect_kind()
+        if self.kind == 'png':
+            self._read_png()
+        elif self.kind == 'jpeg':
+            self._read_jpeg()
+        if not self.done and self._scanned > MAX_HEADER_SCAN:
+            raise UploadRejected('Could not read the poster image dimensions.')
+
+    def _detect_kind(self) -> None:
+        if self._buffer.startswith(PNG_MAGIC):
+            self.kind = 'png'
+        elif self._buffer.startswith(JPEG_MAGIC):
+            self.kind = 'jpeg'
+            # Drop the SOI marker so the buffer starts at the first segment.
+            del self._buffer[:2]
+        elif not (PNG_MAGIC.startswith(self._buffer) or JPEG_MAGIC.startswith(self._buffer)):
+            raise UploadRejected('Poster must be a PNG or JPEG image.')
+
+    def _read_png(self) -> None:
+        # The IHDR chunk always comes first: length(4) type(4) width(4) height(4).
+        if len(self._buffer) < 24:
+            return
+        if self._buffer[12:16] != b'IHDR':
+            raise UploadRejected('Poster must be a PNG or JPEG image.')
+        self.width, self.height = struct.unpack('>II', self._buffer[16:24])
+
+    def _read_jpeg(self) -> None:
+        buffer = self._buffer
+        while len(buffer) >= 2:
+            if buffer[0] != 0xFF:
+                raise UploadRejected('Poster must be a PNG or JPEG image.')
+            marker = buffer[1]
+            if marker == 0xFF:
+                del buffer[:1]
+                continue
+            if marker in JPEG_STANDALONE_MARKERS:
+                del buffer[:2]
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                if len(buffer) < 9:
+                    return
+                self.height, self.width = struct.unpack('>HH', buffer[5:9])
+                return
+            if len(buffer) < 4:
+                return
+            segment = 2 + struct.unpack('>H', buffer[2:4])[0]
+            if len(buffer) >= segment:
+                del buffer[:segment]
+            else:
+                self._skip = segment - len(buffer)
+                buffer.clear()
+
+
+def stored_poster_bytes(user) -> int:
+    from .models import PersonalActor, PersonalMovie
+
+    total = 0
+    for model in (PersonalMovie, PersonalActor):
+        total += model.objects.filter(user=user).aggregate(total=Sum('poster_size'))['total'] or 0
+    return total
+
+
+class PosterUploadHandler(FileUploadHandler):
+    """Validate poster files while they stream and pass the bytes on unchanged."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self._budget = None
+        self._active = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self._active = field_name.rsplit('-', 1)[-1] == POSTER_FIELD
+        self._sniffer = ImageHeaderSniffer()
+        self._received = 0
+        if self._active:
+            self._guard(self._check_budget, 0)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._active:
+            return raw_data
+        self._guard(self._check_chunk, raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self._active:
+            self._guard(self._check_complete)
+            self._budget -= self._received
+        return None
+
+    def _guard(self, check, *args) -> None:
+        try:
+            check(*args)
+        except UploadRejected as exc:
+            rejected = getattr(self.request, 'rejected_uploads', None)
+            if rejected is None:
+                rejected = self.request.rejected_uploads = {}
+            rejected[self.field_name] = str(exc)
+            raise SkipFile(str(exc))
+
+    def _check_budget(self, incoming: int) -> None:
+        if self._budget is None:
+            user = getattr(self.request, 'user', None)
+            if user is None or not user.is_authenticated:
+                self._budget = 0
+            else:
+                self._budget = settings.POSTER_UPLOAD_USER_QUOTA_BYTES - stored_poster_bytes(user)
+        if self._received + incoming > self._budget:
+            raise UploadRejected('You have used up your poster storage quota. Remove some posters first.')
+
+    def _check_chunk(self, raw_data: bytes) -> None:
+        self._check_budget(len(raw_data))
+        self._received += len(raw_data)
+        if self._received > settings.POSTER_UPLOAD_MAX_BYTES:
+            limit = settings.POSTER_UPLOAD_MAX_BYTES / (1024 * 1024)
+            raise UploadRejected(f'Poster must be smaller than {limit:g} MB.')
+        if not self._sniffer.done:
+            self._sniffer.feed(raw_data)
+            if self._sniffer.done:
+                self._check_dimensions()
+
+    def _check_dimensions(self) -> None:
+        limit = settings.POSTER_MAX_DIMENSION
+        width, height = self._sniffer.width, self._sniffer.height
+        if not width or not height:
+            raise UploadRejected('Poster image is empty.')
+        if width > limit or height > limit:
+            raise UploadRejected(f'Poster is {width}x{height} pixels; the limit is {limit}x{limit}.')
+
+    def _check_complete(self) -> None:
+        if not self._sniffer.done:
+            raise UploadRejected('Poster must be a PNG or JPEG image.')
+
+
+def report_rejected_uploads(request, form) -> None:
+    """Attach the reasons ``PosterUploadHandler`` dropped files to the matching form fields."""
+    rejected = getattr(request, 'rejected_uploads', None) or {}
+    for name in form.fields:
+        if form.add_prefix(name) in rejected:
+            form.add_error(name, rejected[form.add_prefix(name)])
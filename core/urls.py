@@ -6,28 +6,46 @@ from django.contrib.auth.views import (
     PasswordResetDoneView,
     PasswordResetView,
 )
-from django.urls import path
+from django.urls import path, re_path
 
+from .live import LIVE_VOTES_PATH
 from .views import (
     UserLoginView,
     UserLogoutView,
+    actor_vote_history_view,
+    batch_view,
     home_view,
     landing_redirect_view,
+    movie_rankings_view,
+    movie_vote_history_view,
+    poster_blob_view,
+    profile_download_view,
+    profiles_view,
     register_view,
+    trending_view,
     profile_view,
     vote_actor_view,
     vote_movie_view,
+    vote_stream_view,
 )
 
 urlpatterns = [
     path('', landing_redirect_view, name='landing'),
     path('home/', home_view, name='home'),
     path('profile/', profile_view, name='profile'),
+    path('rankings/movies/', movie_rankings_view, name='movie_rankings'),
+    path('trending/', trending_view, name='trending'),
     path('register/', register_view, name='register'),
     path('login/', UserLoginView.as_view(), name='login'),
     path('logout/', UserLogoutView.as_view(), name='logout'),
     path('vote/movie/<int:movie_id>/', vote_movie_view, name='vote_movie'),
     path('vote/actor/<int:actor_id>/', vote_actor_view, name='vote_actor'),
+    path('batch/', batch_view, name='batch'),
+    path(LIVE_VOTES_PATH.lstrip('/'), vote_stream_view, name='vote_stream'),
+    path('stats/movie/<int:movie_id>/votes/', movie_vote_history_view, name='movie_vote_history'),
+    path('stats/actor/<int:actor_id>/votes/', actor_vote_history_view, name='actor_vote_history'),
+    path('staff/profiles/', profiles_view, name='profiles'),
+    path('staff/profiles/<str:name>', profile_download_view, name='profile_download'),
     path(
         'forgot-password/',
         PasswordResetView.as_view(
@@ -56,4 +74,5 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
+    urlpatterns += [re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>posters/blobs/.*)$', poster_blob_view)]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
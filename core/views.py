@@ -1,15 +1,24 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
-from django.db import connection
-from django.db.models import F
+from django.core.paginator import Paginator
 from django.db.utils import OperationalError, ProgrammingError
-from django.http import HttpRequest, HttpResponse
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.views.static import serve
 
-from .db_guards import table_has_column
+from .batch import BatchError, apply_batch, summarize_results
+from .content_version import page_etag
+from .db_guards import table_exists, table_has_column
 from .forms import (
     LoginForm,
     PersonalActorForm,
@@ -18,14 +27,25 @@ from .forms import (
     ProfilePasswordForm,
     RegisterForm,
 )
-from .models import Actor, ActorVote, Country, Movie, MovieVote, PersonalActor, PersonalMovie
-
-def _table_exists(table_name: str) -> bool:
-    try:
-        return table_name in connection.introspection.table_names()
-    except (ProgrammingError, OperationalError):
-        return False
+from .list_rows import actor_rows, movie_rows
+from .models import (
+    Actor,
+    Country,
+    Movie,
+    MovieRating,
+    MovieRecommendation,
+    PersonalActor,
+    PersonalMovie,
+    VoteBucket,
+)
+from .profiling import list_profiles, profile_path
+from .rollups import top_between, vote_series
+from .summaries import get_summary
+from .trending import trending
+from .uploads import report_rejected_uploads
+from .voting import cast_actor_vote, cast_movie_vote
 
+POSTER_BLOB_MAX_AGE = 365 * 24 * 60 * 60
 
 class UserLoginView(LoginView):
     template_name = 'registration/login.html'
@@ -60,6 +80,8 @@ def register_view(request: HttpRequest) -> HttpResponse:
     return render(request, 'registration/register.html', {'form': form})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=page_etag)
 def profile_view(request: HttpRequest) -> HttpResponse:
 
     info_form = ProfileInfoForm(instance=request.user)
@@ -88,6 +110,8 @@ def profile_view(request: HttpRequest) -> HttpResponse:
     return render(request, 'core/profile.html', context)
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=page_etag)
 def home_view(request: HttpRequest) -> HttpResponse:
 
     countries = Country.objects.none()
@@ -100,8 +124,8 @@ def home_view(request: HttpRequest) -> HttpResponse:
     else:
         messages.error(request, 'Country data is unavailable until database migrations are applied.')
 
-    personal_movie_table_exists = _table_exists(PersonalMovie._meta.db_table)
-    personal_actor_table_exists = _table_exists(PersonalActor._meta.db_table)
+    personal_movie_table_exists = table_exists(PersonalMovie._meta.db_table)
+    personal_actor_table_exists = table_exists(PersonalActor._meta.db_table)
 
     movie_form = PersonalMovieForm(prefix='movie')
     actor_form = PersonalActorForm(prefix='actor')
@@ -110,6 +134,7 @@ def home_view(request: HttpRequest) -> HttpResponse:
         if 'add_movie' in request.POST:
             if personal_movie_table_exists:
                 movie_form = PersonalMovieForm(request.POST, request.FILES, prefix='movie')
+                report_rejected_uploads(request, movie_form)
                 if movie_form.is_valid():
                     movie = movie_form.save(commit=False)
                     movie.user = request.user
@@ -121,6 +146,7 @@ def home_view(request: HttpRequest) -> HttpResponse:
         elif 'add_actor' in request.POST:
             if personal_actor_table_exists:
                 actor_form = PersonalActorForm(request.POST, request.FILES, prefix='actor')
+                report_rejected_uploads(request, actor_form)
                 if actor_form.is_valid():
                     actor = actor_form.save(commit=False)
                     actor.user = request.user
@@ -146,33 +172,51 @@ def home_view(request: HttpRequest) -> HttpResponse:
     try:
 
         if personal_movie_table_exists:
-            movie_queryset = PersonalMovie.objects.filter(user=request.user).select_related('country')
+            movie_queryset = PersonalMovie.objects.filter(user=request.user)
             if movie_country:
                 movie_queryset = movie_queryset.filter(country__name__icontains=movie_country)
-            movies = list(movie_queryset)
+            movies = movie_rows(movie_queryset)
         
         if personal_actor_table_exists:
-            actor_queryset = PersonalActor.objects.filter(user=request.user).select_related('country')
+            actor_queryset = PersonalActor.objects.filter(user=request.user)
             if actor_country:
                 actor_queryset = actor_queryset.filter(country__name__icontains=actor_country)
-            actors = list(actor_queryset)
+            actors = actor_rows(actor_queryset)
 
     except (ProgrammingError, OperationalError):
         movies = []
         actors = []
         messages.error(request, 'Your personal lists are unavailable until database migrations are applied.')
 
-    top_movie = movies[0] if movies else None
-    top_actor = actors[0] if actors else None
+    try:
+        recommendations = (
+            MovieRecommendation.objects.filter(user=request.user).values_list('items', flat=True).first() or []
+        )
+    except (ProgrammingError, OperationalError):
+        recommendations = []
+
+    try:
+        summary = get_summary(request.user)
+    except (ProgrammingError, OperationalError):
+        summary = None
+    top_movie = summary.top_movie if summary else None
+    top_actor = summary.top_actor if summary else None
+    # Under a country filter the hero shows the best entry within it: the first row of the list below.
+    if movie_country:
+        top_movie = PersonalMovie.objects.select_related('country').filter(id=movies[0].id).first() if movies else None
+    if actor_country:
+        top_actor = PersonalActor.objects.select_related('country').filter(id=actors[0].id).first() if actors else None
 
     context = {
         'countries': countries,
         'movie_country': movie_country,
         'actor_country': actor_country,
+        'summary': summary,
         'top_movie': top_movie,
         'top_actor': top_actor,
         'movies_ranked': movies,
         'actors_ranked': actors,
+        'recommendations': recommendations,
         'movie_form': movie_form,
         'actor_form': actor_form,
     }
@@ -180,24 +224,116 @@ def home_view(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
-def vote_movie_view(request: HttpRequest, movie_id: int) -> HttpResponse:
-    movie = get_object_or_404(Movie, id=movie_id)
-    _, created = MovieVote.objects.get_or_create(user=request.user, movie=movie)
+def movie_rankings_view(request: HttpRequest) -> HttpResponse:
+    ratings = MovieRating.objects.filter(rating_count__gt=0).select_related('movie__country').order_by('-weighted_score', 'movie')
+    page = Paginator(ratings, 50).get_page(request.GET.get('page'))
+    return render(request, 'core/movie_rankings.html', {'page': page})
+
+
+def _most_voted(kind: str, model, start, end, limit: int = 10) -> list:
+    """Top targets by votes in ``[start, end)`` from the rollup buckets, as ``(object, votes)``."""
+    totals = top_between(kind, start, end, limit)
+    objects = model.objects.select_related('country').in_bulk([target_id for target_id, _ in totals])
+    return [(objects[target_id], votes) for target_id, votes in totals if target_id in objects]
+
+
+@login_required
+def trending_view(request: HttpRequest) -> HttpResponse:
+    now = timezone.now()
+    week_ago = now - timedelta(days=7)
+    context = {
+        'trending_movies': trending(Movie.objects.select_related('country'), now=now),
+        'trending_actors': trending(Actor.objects.select_related('country'), now=now),
+        'week_movies': _most_voted('movie', Movie, week_ago, now),
+        'week_actors': _most_voted('actor', Actor, week_ago, now),
+    }
+    return render(request, 'core/trending.html', context)
+
+
+def _vote_response(request: HttpRequest, kind: str, target, created: bool, label: str) -> HttpResponse:
+    """Redirect with a flash message for form posts; ``204`` or the new count for ``fetch`` callers."""
+    if request.headers.get('Prefer') == 'return=minimal':
+        return HttpResponse(status=204)
+    if 'application/json' in request.headers.get('Accept', ''):
+        vote_count = type(target).objects.filter(id=target.id).values_list('vote_count', flat=True).first()
+        return JsonResponse({'kind': kind, 'id': target.id, 'voted': True, 'created': created, 'vote_count': vote_count})
     if created:
-        Movie.objects.filter(id=movie.id).update(vote_count=F('vote_count') + 1)
-        messages.success(request, f'You voted for {movie.title}.')
+        messages.success(request, f'You voted for {label}.')
     else:
-        messages.info(request, f'You already voted for {movie.title}.')
+        messages.info(request, f'You already voted for {label}.')
     return redirect('home')
 
 
+@login_required
+def vote_movie_view(request: HttpRequest, movie_id: int) -> HttpResponse:
+    movie = get_object_or_404(Movie, id=movie_id)
+    return _vote_response(request, 'movie', movie, cast_movie_vote(request.user, movie), movie.title)
+
+
 @login_required
 def vote_actor_view(request: HttpRequest, actor_id: int) -> HttpResponse:
     actor = get_object_or_404(Actor, id=actor_id)
-    _, created = ActorVote.objects.get_or_create(user=request.user, actor=actor)
-    if created:
-        Actor.objects.filter(id=actor.id).update(vote_count=F('vote_count') + 1)
-        messages.success(request, f'You voted for {actor.name}.')
-    else:
-        messages.info(request, f'You already voted for {actor.name}.')
-    return redirect('home')
\ No newline at end of file
+    return _vote_response(request, 'actor', actor, cast_actor_vote(request.user, actor), actor.name)
+
+
+def _vote_history_response(request: HttpRequest, kind: str, target_id: int) -> JsonResponse:
+    try:
+        days = min(max(int(request.GET.get('days', 7)), 1), 365)
+    except ValueError:
+        days = 7
+    granularity = VoteBucket.HOURLY if request.GET.get('granularity') == 'hour' else VoteBucket.DAILY
+    end = timezone.now()
+    series = vote_series(kind, target_id, end - timedelta(days=days), end, granularity)
+    return JsonResponse({
+        kind: target_id,
+        'days': days,
+        'series': [{'start': start.isoformat(), 'votes': votes} for start, votes in series],
+    })
+
+
+@login_required
+def movie_vote_history_view(request: HttpRequest, movie_id: int) -> JsonResponse:
+    get_object_or_404(Movie, id=movie_id)
+    return _vote_history_response(request, 'movie', movie_id)
+
+
+@login_required
+def actor_vote_history_view(request: HttpRequest, actor_id: int) -> JsonResponse:
+    get_object_or_404(Actor, id=actor_id)
+    return _vote_history_response(request, 'actor', actor_id)
+
+
+def vote_stream_view(request: HttpRequest) -> HttpResponse:
+    # Under ASGI core.live.with_live_votes answers this path; 204 tells EventSource not to retry.
+    return HttpResponse(status=204)
+
+
+@login_required
+@require_POST
+def batch_view(request: HttpRequest) -> JsonResponse:
+    try:
+        payload = json.loads(request.body)
+        results = apply_batch(request.user, payload.get('operations') if isinstance(payload, dict) else None, settings.BATCH_MAX_OPERATIONS)
+    except (ValueError, BatchError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'results': results, 'summary': summarize_results(results)})
+
+
+def poster_blob_view(request: HttpRequest, path: str) -> HttpResponse:
+    # Blob names are content digests, so a URL always refers to the same bytes.
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = f'public, max-age={POSTER_BLOB_MAX_AGE}, immutable'
+    return response
+
+
+@staff_member_required
+def profiles_view(request: HttpRequest) -> HttpResponse:
+    return render(request, 'core/profiles.html', {'profiles': list_profiles(), 'max_profiles': settings.PROFILE_MAX_FILES})
+
+
+@staff_member_required
+def profile_download_view(request: HttpRequest, name: str) -> FileResponse:
+    path = profile_path(name)
+    if path is None:
+        raise Http404('No such profile.')
+    return FileResponse(path.open('rb'), as_attachment=True, filename=name, content_type='application/octet-stream')
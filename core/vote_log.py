@@ -0,0 +1,93 @@
+"""Append-only vote log and reconciliation of the denormalized vote counters.
+
+Every vote path writes its ``MovieVote``/``ActorVote`` rows, the counter update
+and one ``VoteEvent`` per vote in a single transaction, so the counters can
+only drift through raw writes, cascading deletes of users or titles, or manual
+repairs. ``reconcile`` walks the catalog in primary-key chunks. For each chunk a
+single statement reads the stored counters next to the true counts, taken by a
+``GROUP BY`` over the vote table or, with ``source='log'``, over the event log.
+Drift is repaired by adding the difference rather than overwriting, so a vote
+committed after the read is never lost. Each chunk runs in autocommit and only
+locks the rows it corrects, so this is safe to run alongside live traffic.
+
+The log is never updated or pruned, and the vote admins are read-only, so a vote
+ends only when its user or its title is deleted; counting from the log skips
+events of deleted users and titles, which lets ``source='log'`` rebuild
+counters after the vote tables themselves were damaged.
+"""
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Actor, ActorVote, Movie, MovieVote, VoteEvent
+
+TARGETS = {
+    VoteEvent.MOVIE: (Movie, MovieVote, 'movie_id'),
+    VoteEvent.ACTOR: (Actor, ActorVote, 'actor_id'),
+}
+SOURCES = ('votes', 'log')
+
+
+def log_votes(kind: str, votes: dict, user_id: int) -> None:
+    """Append an event per ``{target_id: created_at}`` vote, inside the transaction that stores the votes."""
+    VoteEvent.objects.bulk_create([
+        VoteEvent(kind=kind, target_id=target_id, user_id=user_id, created_at=created_at) for target_id, created_at in votes.items()
+    ])
+
+
+def _true_counts(kind: str, source: str) -> Subquery:
+    _, vote_model, field_name = TARGETS[kind]
+    if source == 'votes':
+        counts = vote_model.objects.filter(**{field_name: OuterRef('pk')}).values(field_name).annotate(total=Count('id'))
+    else:
+        voter_exists = Exists(get_user_model().objects.filter(pk=OuterRef('user_id')))
+        counts = (
+            VoteEvent.objects.filter(voter_exists, kind=kind, target_id=OuterRef('pk'))
+            .values('target_id')
+            .annotate(total=Count('id'))
+        )
+    return Subquery(counts.order_by().values('total'), output_field=IntegerField())
+
+
+def reconcile(kind: str, source: str = 'votes', chunk_size: int = 1000, fix: bool = True, on_drift=None) -> dict:
+    """Compare the ``kind`` counters with ``source`` chunk by chunk; returns scanned, drifted and net correction.
+
+    ``on_drift(target_id, stored, actual)`` is called for every drifted row.
+    """
+    if source not in SOURCES:
+        raise ValueError(f'Unknown source {source!r}; expected one of {", ".join(SOURCES)}.')
+    target_model = TARGETS[kind][0]
+    true_counts = Coalesce(_true_counts(kind, source), Value(0))
+    scanned = drifted = correction = 0
+    last_id = 0
+    while True:
+        rows = list(
+            target_model.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .annotate(actual=true_counts)
+            .values_list('pk', 'vote_count', 'actual')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        deltas = {target_id: actual - stored for target_id, stored, actual in rows if actual != stored}
+        if not deltas:
+            continue
+        drifted += len(deltas)
+        correction += sum(deltas.values())
+        if on_drift:
+            for target_id, stored, actual in rows:
+                if target_id in deltas:
+                    on_drift(target_id, stored, actual)
+        if fix:
+            target_model.objects.filter(pk__in=deltas).update(
+                vote_count=F('vote_count') + Case(
+                    *(When(pk=target_id, then=Value(delta)) for target_id, delta in deltas.items()),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+            )
+    return {'scanned': scanned, 'drifted': drifted, 'correction': correction}
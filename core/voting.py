@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import F
+
+from .content_version import bump_content_version
+from .live import publish_votes
+from .models import Actor, ActorVote, Movie, MovieVote
+from .rollups import record_vote
+from .trending import score_after_votes
+from .vote_log import log_votes
+
+
+def cast_movie_vote(user, movie: Movie) -> bool:
+    # The vote, its counter and its log event commit together or not at all.
+    with transaction.atomic():
+        vote, created = MovieVote.objects.get_or_create(user=user, movie=movie)
+        if not created:
+            return False
+        Movie.objects.filter(id=movie.id).update(
+            vote_count=F('vote_count') + 1,
+            trending_score=score_after_votes(vote.created_at),
+        )
+        log_votes('movie', {movie.id: vote.created_at}, user.pk)
+        record_vote('movie', movie.id, vote.created_at)
+        publish_votes('movie', [movie.id])
+        bump_content_version([user.pk])
+    return True
+
+
+def cast_actor_vote(user, actor: Actor) -> bool:
+    with transaction.atomic():
+        vote, created = ActorVote.objects.get_or_create(user=user, actor=actor)
+        if not created:
+            return False
+        Actor.objects.filter(id=actor.id).update(
+            vote_count=F('vote_count') + 1,
+            trending_score=score_after_votes(vote.created_at),
+        )
+        log_votes('actor', {actor.id: vote.created_at}, user.pk)
+        record_vote('actor', actor.id, vote.created_at)
+        publish_votes('actor', [actor.id])
+        bump_content_version([user.pk])
+    return True
@@ -0,0 +1,98 @@
+"""Preload the cold paths a fresh worker would otherwise pay for on its first requests."""
+from __future__ import annotations
+
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.db import connections
+from django.db.utils import DatabaseError
+from django.template.loader import get_template
+from django.urls import get_resolver, resolve, reverse
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEMPLATES = [
+    'base.html',
+    'core/home.html',
+    'core/profile.html',
+    'registration/login.html',
+    'registration/register.html',
+]
+WARMUP_URL_NAMES = ['home', 'profile', 'login', 'register']
+
+
+def _warm_urls() -> None:
+    get_resolver().url_patterns
+    for name in WARMUP_URL_NAMES:
+        resolve(reverse(name))
+
+
+def _warm_templates() -> None:
+    for name in WARMUP_TEMPLATES:
+        get_template(name)
+
+
+def _warm_translations() -> None:
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('This password is too common.')
+    translation.deactivate()
+
+
+def _warm_title_index() -> None:
+    from .title_matching import refresh_catalog_index
+
+    refresh_catalog_index()
+
+
+def _warm_database() -> None:
+    # Only useful with persistent connections (CONN_MAX_AGE > 0); otherwise the first request closes it.
+    for alias in ['default', *settings.DATABASE_REPLICAS]:
+        connections[alias].ensure_connection()
+
+
+def warm_up(database: bool = True) -> dict[str, float]:
+    """Run every warm-up step and return how long each took, in milliseconds."""
+    steps = [
+        ('urls', _warm_urls),
+        ('templates', _warm_templates),
+        ('translations', _warm_translations),
+        ('password_validators', get_default_password_validators),
+    ]
+    if database:
+        steps.append(('database', _warm_database))
+        # Built per worker (it reads the catalog), so saving a personal movie never waits for it.
+        steps.append(('title_index', _warm_title_index))
+
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except DatabaseError as exc:
+            logger.warning('Warm-up step %s failed: %s', name, exc)
+        timings[name] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def with_lifespan_warmup(application):
+    """Wrap an ASGI application so the lifespan startup event runs ``warm_up``."""
+
+    async def app(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Django gives each ASGI request its own sync thread, so a connection opened here would not be reused.
+                timings = await sync_to_async(warm_up)(database=False)
+                logger.info('Worker warm-up finished: %s', timings)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return app
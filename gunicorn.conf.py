@@ -0,0 +1,43 @@
+import os
+import time
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '').strip().lower() in {'1', 'true', 'yes', 'on'}
+# Above 1, gunicorn runs threaded (gthread) workers. A sync worker serves one request at a time,
+# so the in-flight and vote limits of core/admission.py only come into play with threads.
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+
+_first_request_pending = True
+_worker_ready_at = None
+
+
+def when_ready(server):
+    if preload_app:
+        # Warm shared, read-only state once in the master; workers inherit it on fork.
+        from core.warmup import warm_up
+
+        server.log.info('Master warm-up: %s', _format(warm_up(database=False)))
+
+
+def post_worker_init(worker):
+    global _worker_ready_at
+    from core.warmup import warm_up
+
+    worker.log.info('Worker %s warm-up: %s', worker.pid, _format(warm_up()))
+    _worker_ready_at = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    global _first_request_pending
+    if _first_request_pending and _worker_ready_at is not None:
+        _first_request_pending = False
+        worker.log.info(
+            'Worker %s served its first response %.1f ms after becoming ready (%s %s).',
+            worker.pid,
+            (time.perf_counter() - _worker_ready_at) * 1000,
+            req.method,
+            req.path,
+        )
+
+
+def _format(timings):
+    return ', '.join(f'{name}={elapsed:.1f}ms' for name, elapsed in timings.items())
@@ -45,4 +45,78 @@ document.addEventListener('DOMContentLoaded', () => {
                 });
         });
     });
-});
\ No newline at end of file
+
+    const updateVoteCounts = (target, update) => {
+        document.querySelectorAll(`[data-vote-count="${target}"]`).forEach((node) => {
+            node.textContent = String(update(Number(node.textContent)));
+        });
+    };
+    // Votes this page cast itself; their echo on the live stream is already counted.
+    const ownVotes = new Map();
+    const forgetOwnVote = (target) => {
+        const left = (ownVotes.get(target) || 0) - 1;
+        if (left > 0) ownVotes.set(target, left);
+        else ownVotes.delete(target);
+    };
+
+    document.querySelectorAll('form.vote-form[data-vote-target]').forEach((form) => {
+        form.addEventListener('submit', async (event) => {
+            if (!window.fetch) return;
+            event.preventDefault();
+            const button = form.querySelector('.vote-btn');
+            if (button.disabled) return;
+            const target = form.dataset.voteTarget;
+            button.disabled = true;
+            updateVoteCounts(target, (count) => count + 1);
+            // Recorded before sending: the echo on the live stream can arrive before the response.
+            ownVotes.set(target, (ownVotes.get(target) || 0) + 1);
+            try {
+                const response = await fetch(form.action, {
+                    method: 'POST',
+                    body: new FormData(form),
+                    headers: { Accept: 'application/json' },
+                    credentials: 'same-origin',
+                });
+                if (response.redirected) {
+                    // Signed out meanwhile: the login page takes over.
+                    window.location.assign(response.url);
+                    return;
+                }
+                if (response.status === 503) {
+                    // Shed under load; leave the button for a later retry.
+                    updateVoteCounts(target, (count) => count - 1);
+                    forgetOwnVote(target);
+                    button.disabled = false;
+                    return;
+                }
+                if (!response.ok) throw new Error(`Vote failed with ${response.status}`);
+                const result = await response.json();
+                if (!result.created) forgetOwnVote(target);
+                updateVoteCounts(target, () => result.vote_count);
+                button.classList.add('voted');
+                button.title = result.created ? 'Vote counted' : 'You already voted';
+            } catch (error) {
+                // Let the server answer the plain form post and show its message.
+                updateVoteCounts(target, (count) => count - 1);
+                forgetOwnVote(target);
+                form.submit();
+            }
+        });
+    });
+
+    const liveVotes = document.querySelector('[data-live-votes]');
+    if (liveVotes && window.EventSource) {
+        const stream = new EventSource(liveVotes.dataset.liveVotes);
+        stream.addEventListener('votes', (event) => {
+            const deltas = JSON.parse(event.data);
+            Object.entries(deltas).forEach(([kind, targets]) => {
+                Object.entries(targets).forEach(([id, delta]) => {
+                    const target = `${kind}:${id}`;
+                    const echoed = Math.min(delta, ownVotes.get(target) || 0);
+                    if (echoed) ownVotes.set(target, ownVotes.get(target) - echoed);
+                    if (delta > echoed) updateVoteCounts(target, (count) => count + delta - echoed);
+                });
+            });
+        });
+    }
+});